@@ -28,23 +28,34 @@ biclusters fitting the Bayesian biclustering model.
 
 """
 from bibench.algorithms.wrapper import \
-    wrapper_helper, WrapperException
+    wrapper_helper, WrapperException, WrapperCancelled, \
+    call, cancellable, exported_dataset, run_async, WrapperRun
 from bibench.bicluster import \
     Bicluster, BiclusterList, bicluster_algorithm
-from bibench.datasets.io import write_expression_data
+from bibench.datasets.io import write_expression_data, EXACT_PRECISION
 import numpy
 import os
-import subprocess
+import shutil
+import tempfile
+import threading
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 
 BINARY = 'BBC'
 
-def bbc(data, nclus, norm_method='none', alpha=None):
+def bbc(data,
+        nclus,
+        norm_method='none',
+        alpha=None,
+        processes=None,
+        monotone=False):
     """
     Wrapper to the BBC binary.
 
     If 'nclus' is a list of integers, tries to determine the number of
     clusters in the dataset by performing multiple clusterings and
-    choosing the one with the best BIC.
+    choosing the one with the best BIC. The clusterings run
+    concurrently, and share one exported copy of the dataset.
 
     sqrn sometimes causes a divide by zero if the data is too uniform.
 
@@ -58,19 +69,120 @@ def bbc(data, nclus, norm_method='none', alpha=None):
 
         * alpha: alpha% quartile used for IRQN or SQRN normalization.
 
+        * processes: the maximum number of BBC processes to run at
+            once, if 'nclus' is a list. Defaults to the number of CPUs.
+
+        * monotone: if True, assume the BIC first decreases and then
+            increases with k. Once some k has a worse BIC than a
+            smaller k, larger values cannot win, and their runs are
+            stopped.
+
     Returns: BiclusterList
 
     """
+    kwargs = dict(data=data, nclus=nclus, norm_method=norm_method, alpha=alpha)
+    try:
+        ks = sorted(set(nclus))
+    except TypeError:
+        return _bbc_(**kwargs)
+
+    directory = tempfile.mkdtemp()
+    try:
+        datafile = os.path.join(directory, 'data.txt')
+        _write_dataset_(data, datafile)
+        results = _bbc_multi_(ks, datafile, processes, monotone, **kwargs)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if not results:
+        return BiclusterList([])
+    finished = sorted(results)
+    idx = numpy.argmin([results[k].properties['bic'] for k in finished])
+    return results[finished[idx]]
+
+
+def bbc_async(*args, **kwargs):
     """
+    Like bbc(), but returns a WrapperRun without waiting for the
+    binary to finish. Accepts an extra keyword argument, 'timeout', in
+    seconds. Only one value of 'nclus' is allowed. See
+    wrapper.run_async().
 
     """
-    kwargs = locals()
+    return run_async(_bbc_, *args, **kwargs)
+
+
+def _bbc_multi_(ks, datafile, processes, monotone, **kwargs):
+    """
+    Run _bbc_() for each k in 'ks' on a pool of threads; each thread
+    waits on its own BBC process, in its own directory, which links to
+    the already exported 'datafile'. Returns a dict mapping each k
+    that finished, and found biclusters, to its BiclusterList.
+
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    events = dict((k, threading.Event()) for k in ks)
+
+    def run(k):
+        args = dict(kwargs, nclus=k)
+        try:
+            with cancellable(events[k]), \
+                    exported_dataset(_write_dataset_, datafile):
+                return k, _bbc_(**args)
+        except WrapperCancelled:
+            return k, None
+
+    pool = ThreadPool(min(processes, len(ks)))
+    results = dict()
     try:
-        results = [_bbc_(**dict(kwargs.items() + dict(nclus=k).items())) for k in nclus]
-        idx = numpy.argmin([r.properties['bic'] for r in results])
-        return results[idx]
-    except TypeError:
-        return _bbc_(**kwargs)
+        for k, result in pool.imap_unordered(run, ks):
+            if not _selectable_(result):
+                continue
+            results[k] = result
+            if monotone:
+                for cutoff in _monotone_cutoffs_(results):
+                    for other in ks:
+                        if other > cutoff:
+                            events[other].set()
+    except:
+        for event in events.values():
+            event.set()
+        raise
+    finally:
+        pool.close()
+        pool.join()
+    return results
+
+
+def _selectable_(result):
+    """
+    True if 'result' may take part in choosing k: it has a BIC, and
+    is not the partial result of a run that timed out.
+
+    """
+    if result is None:
+        return False
+    properties = result.properties or {}
+    return 'bic' in properties and not properties.get('timed_out')
+
+
+def _monotone_cutoffs_(results):
+    """
+    The values of k, among finished runs, with a worse BIC than some
+    smaller k. If the BIC first decreases and then increases, no k
+    larger than these can have the best BIC.
+
+    """
+    cutoffs = []
+    best = None
+    for k in sorted(results):
+        bic = results[k].properties['bic']
+        if best is not None and bic > best:
+            cutoffs.append(k)
+        if best is None or bic < best:
+            best = bic
+    return cutoffs
 
 
 @bicluster_algorithm
@@ -89,7 +201,15 @@ def _bbc_(data, nclus, norm_method='none', alpha=None):
                             _read_results_,
                             _do_call_,
                             **kwargs)
+    if isinstance(result, WrapperRun):
+        return result.add_callback(_make_list_)
+    return _make_list_(result)
+
 
+def _make_list_(result):
+    if isinstance(result, BiclusterList):
+        #partial results of a run that timed out
+        return result
     try:
         biclusters, props = result
         return BiclusterList(biclusters, properties=props)
@@ -108,11 +228,12 @@ def _do_call_(data, datafile, results_dir, **kwargs):
                                    **kwargs)
     if kwargs['alpha'] is not None:
         command += " -r {alpha}".format(**kwargs)
-    subprocess.check_call(command.split())
+    call(command.split())
 
 
 def _write_dataset_(data, filename):
-    write_expression_data(data, filename, sep='\t')
+    write_expression_data(data, filename, sep='\t',
+                          precision=EXACT_PRECISION)
 
 
 def _read_result_file_(filename, data):
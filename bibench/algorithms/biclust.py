@@ -33,52 +33,63 @@ import logging
 from cStringIO import StringIO
 
 from bibench.bicluster import \
-    Bicluster, BiclusterList, bicluster_algorithm
+    BiclusterList, bicluster_algorithm, biclusters_from_matrices
 
 from bibench.datasets.transform import is_discrete, is_binary
+from bibench.profiling import phase
+from bibench import rpool
+from bibench import rutil
 
-import rpy2.robjects as robjects
-from rpy2.rinterface import RRuntimeError
-import numpy
 
-#enables automatic conversion from numpy to R:
-import rpy2.robjects.numpy2ri
-import pkg_resources
-v = pkg_resources.get_distribution('rpy2').version
-if v[0:3] >= '2.2':
-    rpy2.robjects.numpy2ri.activate()
-
-
-def _run_biclust_(function_name, data, **kwargs):
-    """Convenience function for the various methods implemented in 'biclust'.
-
-    Performs biclustering on the dataset and returns a set of biclusters.
+def _biclust_matrices_(function_name, data, **kwargs):
+    """Runs 'biclust' and returns its RowxNumber and NumberxCol matrices,
+    or None if R raised an error. Called through bibench.rpool.
 
     """
-    #replace underscores with dots:
-    keys = kwargs.keys()
-    for key in keys:
-        kwargs[key.replace("_", ".")] = kwargs.pop(key)
+    robjects = rutil.robjects()
+    RRuntimeError = rutil.rinterface().RRuntimeError
+    rutil.library('biclust')
 
-    robjects.r.library('biclust')
+    if isinstance(kwargs.get('fit.model'), basestring):
+        kwargs['fit.model'] = robjects.r(kwargs['fit.model'])
 
     #run biclustering
     biclust = robjects.r["biclust"]
     function = robjects.r[function_name]
 
     try:
-        result = biclust(data, method=function_name, **kwargs)
+        result = biclust(rutil.to_r_matrix(data), method=function_name, **kwargs)
     except RRuntimeError as e:
         logging.error(
             '{0} caught an R exception. Assuming no biclusters were found. Message: {1}'
             .format(function_name, e.message))
-        return []
+        return None
 
     #get rowXnumber array
-    row_matrix = numpy.array(result.do_slot("RowxNumber"))
+    row_matrix = rutil.from_r_matrix(result.do_slot("RowxNumber"))
 
     #get numberXcolumn array
-    col_matrix = numpy.array(result.do_slot("NumberxCol"))
+    col_matrix = rutil.from_r_matrix(result.do_slot("NumberxCol"))
+
+    return row_matrix, col_matrix
+
+
+def _run_biclust_(function_name, data, **kwargs):
+    """Convenience function for the various methods implemented in 'biclust'.
+
+    Performs biclustering on the dataset and returns a set of biclusters.
+
+    """
+    #replace underscores with dots:
+    keys = kwargs.keys()
+    for key in keys:
+        kwargs[key.replace("_", ".")] = kwargs.pop(key)
+
+    with phase('r'):
+        result = rpool.call(_biclust_matrices_, function_name, data, **kwargs)
+    if result is None:
+        return []
+    row_matrix, col_matrix = result
 
     num_biclusters = row_matrix.shape[1]
 
@@ -94,18 +105,7 @@ def _run_biclust_(function_name, data, **kwargs):
         raise Exception(
             'There is a problem with the results returned by {0}'.format(function_name))
 
-    #make list of biclusters
-    biclusters = []
-    for i in range(num_biclusters):
-        rows_bools = row_matrix[:, i] != 0
-        cols_bools = col_matrix[i, :] != 0
-
-        rows = [index for index, elt in enumerate(rows_bools) if elt]
-        cols = [index for index, elt in enumerate(cols_bools) if elt]
-
-        biclusters.append(Bicluster(rows, cols, data=data))
-
-    return biclusters
+    return biclusters_from_matrices(row_matrix, col_matrix.T, data)
 
 
 @bicluster_algorithm
@@ -165,7 +165,6 @@ def plaid(data,
 
     """
     kwargs = locals()
-    kwargs["fit_model"] = robjects.r(fit_model)
     function_name = "BCPlaid"
     fnd = _run_biclust_(function_name, **kwargs)
     if len(fnd) == 1:
@@ -0,0 +1,379 @@
+####################################################################
+###     ____  _ ____                  _                          ###
+###    | __ )(_) __ )  ___ _ __   ___| |__                       ###
+###    |  _ \| |  _ \ / _ \ '_ \ / __| '_ \                      ###
+###    | |_) | | |_) |  __/ | | | (__| | | |                     ###
+###    |____/|_|____/ \___|_| |_|\___|_| |_|                     ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### This file is part of the BiBench package for biclustering    ###
+### analysis.                                                    ###
+###                                                              ###
+### Copyright (c) 2011 by:                                       ###
+###   * Kemal Eren,                                              ###
+###   * Mehmet Deveci,                                           ###
+###   * Umit V. Catalyurek                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### For license info, please see the README and LICENSE files    ###
+### in the main directory.                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+
+"""
+A numpy implementation of the Cheng and Church biclustering
+algorithm, following the 'BCCC' method of the R package 'biclust'.
+
+Row and column sums of the current submatrix are kept up to date as
+rows and columns are deleted or added, so a step costs at most one
+matrix-vector product instead of recomputing the residue matrix, and
+single node deletion mostly only scores a shortlist of rows. On
+50000 x 200 data from make_const_data(), each bicluster takes about
+8 to 12 seconds.
+
+"""
+
+import numpy
+
+from bibench.bicluster import Bicluster, bicluster_algorithm
+
+#multiple node deletion is only used above this many rows or columns
+MULTIPLE_DELETION_MIN = 100
+
+
+class _Submatrix_(object):
+    """
+    The submatrix data[rows][:, cols] of the rows and columns that
+    are set in the boolean masks 'rows' and 'cols'.
+
+    For every row of 'data', the sum and sum of squares of its
+    elements in 'cols' are stored, and likewise for every column over
+    'rows', which gives the mean squared residue scores of the rows
+    and columns, inside or outside the submatrix. The residue
+    a_ij - a_iJ - a_Ij + a_IJ expands into products of these sums
+    with the data, since the centered means sum to zero.
+
+    """
+    def __init__(self, data, rows=None, cols=None):
+        nrows, ncols = data.shape
+        self.data = data
+        if rows is None:
+            rows = numpy.ones(nrows, dtype=bool)
+        if cols is None:
+            cols = numpy.ones(ncols, dtype=bool)
+        self.rows = rows.copy()
+        self.cols = cols.copy()
+        self.recompute()
+
+    def recompute(self):
+        """Recompute the sums, dropping accumulated rounding errors."""
+        self.nrows = int(self.rows.sum())
+        self.ncols = int(self.cols.sum())
+        by_rows = self.data[:, self.cols]
+        by_cols = self.data[self.rows]
+        self.row_sums = by_rows.sum(1)
+        self.row_squares = numpy.einsum('ij,ij->i', by_rows, by_rows)
+        self.col_sums = by_cols.sum(0)
+        self.col_squares = numpy.einsum('ij,ij->j', by_cols, by_cols)
+        self.total = self.row_sums[self.rows].sum()
+        self._active_ = numpy.flatnonzero(self.rows)
+        self._block_ = by_cols
+        self._weigh_rows_()
+
+    def _compact_(self):
+        """Keep the block of candidate rows at most twice too large."""
+        if 2 * self.nrows < len(self._active_):
+            self._active_ = numpy.flatnonzero(self.rows)
+            self._block_ = self.data[self._active_]
+
+    def _weigh_rows_(self):
+        """
+        The sum over 'rows' of each row times its mean, and of the
+        squared row means; they change with every column.
+
+        """
+        self._compact_()
+        row_means = self.row_sums[self._active_] / self.ncols
+        row_means[~self.rows[self._active_]] = 0
+        self._weighted_ = self._block_.T.dot(row_means)
+        self._mean_squares_ = row_means.dot(row_means)
+        self._shortlist_ = None
+
+    def _col_effects_(self):
+        mean = self.total / (self.nrows * self.ncols)
+        return numpy.where(self.cols, self.col_sums / self.nrows - mean, 0.0)
+
+    def col_scores(self):
+        """Returns (col_scores, h), where h is the mean squared residue."""
+        nrows, ncols = self.nrows, self.ncols
+        col_means = self.col_sums / nrows
+        mean = self.total / (nrows * ncols)
+        row_effect_squares = self._mean_squares_ - \
+            2 * mean * self.total / ncols + nrows * mean ** 2
+        col_products = self._weighted_ - mean * self.col_sums
+        col_scores = self.col_squares / nrows - col_means ** 2 + \
+            (row_effect_squares - 2 * col_products) / nrows
+        return col_scores, col_scores[self.cols].mean()
+
+    def _row_base_(self):
+        """Row scores, less the products of the rows with the column
+        effects, and the column effects."""
+        ncols = self.ncols
+        col_effects = self._col_effects_()
+        row_means = self.row_sums / ncols
+        return self.row_squares / ncols - row_means ** 2 + \
+            col_effects.dot(col_effects) / ncols, col_effects
+
+    def scores(self, everything=False):
+        """
+        Returns (row_scores, col_scores, inverse_row_scores, h).
+
+        The scores are the mean squared residues of each row over
+        'cols', of each row negated, and of each column over 'rows'.
+        Row scores are only valid for rows in the submatrix unless
+        'everything' is True.
+
+        """
+        base, col_effects = self._row_base_()
+        if everything:
+            products = self.data.dot(col_effects)
+        else:
+            self._compact_()
+            products = numpy.zeros(len(self.rows))
+            products[self._active_] = self._block_.dot(col_effects)
+        products *= 2.0 / self.ncols
+        col_scores, h = self.col_scores()
+        return base - products, col_scores, base + products, h
+
+    def worst_row(self):
+        """
+        Returns the row of the submatrix with the highest score, and
+        the score, without multiplying every row by the column effects.
+
+        All rows are scored now and then, and the best of them kept on
+        a shortlist. In between, only the shortlist is scored: the
+        scores of the other rows can only have moved by a bounded
+        amount, depending on the rows removed since, so as long as the
+        best of the shortlist stays above that bound it is the best
+        row overall.
+
+        """
+        if self._shortlist_ is None:
+            self._refresh_shortlist_()
+        nrows, ncols = self.nrows, self.ncols
+        col_sums = numpy.where(self.cols, self.col_sums, 0.0)
+        mean = self.total / (nrows * ncols)
+        col_effects = self._col_effects_()
+        common = col_effects.dot(col_effects) / ncols
+        a = 2 * mean / ncols
+        b = 2.0 / (ncols * nrows)
+
+        shortlist = self._shortlist_
+        scores = self._fixed_ + a * self._short_sums_ - \
+            b * self._short_block_.dot(col_sums)
+        scores[~self.rows[shortlist]] = -numpy.inf
+        best = numpy.argmax(scores)
+
+        a0, b0, sums, products, norms, others = self._bounds_
+        drift = numpy.where(self.cols, self._drift_, 0.0)
+        bound = others + abs(a - a0) * sums + abs(b - b0) * products + \
+            b * norms * numpy.sqrt(drift.dot(drift))
+        if scores[best] < bound:
+            self._shortlist_ = None
+            return self.worst_row()
+        return shortlist[best], scores[best] + common
+
+    def _refresh_shortlist_(self, size=256):
+        self._compact_()
+        nrows, ncols = self.nrows, self.ncols
+        inside = numpy.flatnonzero(self.rows[self._active_])
+        active = self._active_[inside]
+        col_sums = numpy.where(self.cols, self.col_sums, 0.0)
+        mean = self.total / (nrows * ncols)
+        a = 2 * mean / ncols
+        b = 2.0 / (ncols * nrows)
+
+        row_sums = self.row_sums[active]
+        fixed = self.row_squares[active] / ncols - (row_sums / ncols) ** 2
+        products = self._block_.dot(col_sums)[inside]
+        scores = fixed + a * row_sums - b * products
+
+        if len(active) > size:
+            order = numpy.argpartition(-scores, size)
+            short, rest = order[:size], order[size:]
+        else:
+            short, rest = numpy.arange(len(active)), numpy.arange(0)
+        self._shortlist_ = active[short]
+        self._short_block_ = self._block_[inside[short]]
+        self._fixed_ = fixed[short]
+        self._short_sums_ = row_sums[short]
+        self._drift_ = numpy.zeros(len(self.cols))
+        if len(rest) == 0:
+            self._bounds_ = (a, b, 0, 0, 0, -numpy.inf)
+            return
+        norms = numpy.sqrt(numpy.maximum(self.row_squares[active[rest]], 0))
+        self._bounds_ = (a, b,
+                         numpy.abs(row_sums[rest]).max(),
+                         numpy.abs(products[rest]).max(),
+                         norms.max(),
+                         scores[rest].max())
+
+    def remove_rows(self, which):
+        block = self.data[which]
+        row_means = self.row_sums[which] / self.ncols
+        self.total -= self.row_sums[which].sum()
+        self.col_sums -= block.sum(0)
+        self.col_squares -= numpy.einsum('ij,ij->j', block, block)
+        self._weighted_ -= block.T.dot(row_means)
+        self._mean_squares_ -= row_means.dot(row_means)
+        if self._shortlist_ is not None:
+            self._drift_ += block.sum(0)
+        self.rows[which] = False
+        self.nrows -= len(which)
+
+    def add_rows(self, which):
+        block = self.data[which]
+        row_means = self.row_sums[which] / self.ncols
+        self.total += self.row_sums[which].sum()
+        self.col_sums += block.sum(0)
+        self.col_squares += numpy.einsum('ij,ij->j', block, block)
+        self._weighted_ += block.T.dot(row_means)
+        self._mean_squares_ += row_means.dot(row_means)
+        self._shortlist_ = None
+        self.rows[which] = True
+        self.nrows += len(which)
+        self._active_ = numpy.flatnonzero(self.rows)
+        self._block_ = self.data[self._active_]
+
+    def remove_cols(self, which):
+        block = self.data[:, which]
+        self.total -= self.col_sums[which].sum()
+        self.row_sums -= block.sum(1)
+        self.row_squares -= numpy.einsum('ij,ij->i', block, block)
+        self.cols[which] = False
+        self.ncols -= len(which)
+        self._weigh_rows_()
+
+    def add_cols(self, which):
+        block = self.data[:, which]
+        self.total += self.col_sums[which].sum()
+        self.row_sums += block.sum(1)
+        self.row_squares += numpy.einsum('ij,ij->i', block, block)
+        self.cols[which] = True
+        self.ncols += len(which)
+        self._weigh_rows_()
+
+
+def _multiple_deletion_(sub, delta, alpha):
+    """Remove all rows, then columns, scoring above alpha * h."""
+    h = sub.scores()[3]
+    while h > delta:
+        removed = False
+        if sub.nrows > MULTIPLE_DELETION_MIN:
+            row_scores, _, _, h = sub.scores()
+            which = numpy.flatnonzero(sub.rows & (row_scores > alpha * h))
+            if 0 < len(which) < sub.nrows - 1:
+                sub.remove_rows(which)
+                removed = True
+        if sub.ncols > MULTIPLE_DELETION_MIN:
+            _, col_scores, _, h = sub.scores()
+            which = numpy.flatnonzero(sub.cols & (col_scores > alpha * h))
+            if 0 < len(which) < sub.ncols - 1:
+                sub.remove_cols(which)
+                removed = True
+        if not removed:
+            break
+        h = sub.scores()[3]
+
+
+def _single_deletion_(sub, delta):
+    """
+    Remove the worst row or column until h <= delta. Returns False if
+    fewer than two rows or columns remain.
+
+    """
+    sub.recompute()
+    col_scores, h = sub.col_scores()
+    while h > delta:
+        row, row_score = sub.worst_row()
+        col = numpy.argmax(numpy.where(sub.cols, col_scores, -numpy.inf))
+        if row_score > col_scores[col]:
+            sub.remove_rows([row])
+        else:
+            sub.remove_cols([col])
+        if sub.nrows < 2 or sub.ncols < 2:
+            return False
+        col_scores, h = sub.col_scores()
+    return True
+
+
+def _node_addition_(sub):
+    """Add columns, then rows or inverted rows, that do not raise h."""
+    sub.recompute()
+    while True:
+        size = sub.nrows + sub.ncols
+
+        _, col_scores, _, h = sub.scores(everything=True)
+        which = numpy.flatnonzero(~sub.cols & (col_scores <= h))
+        if len(which) > 0:
+            sub.add_cols(which)
+
+        row_scores, _, inverse_row_scores, h = sub.scores(everything=True)
+        which = numpy.flatnonzero(~sub.rows & ((row_scores <= h) |
+                                               (inverse_row_scores <= h)))
+        if len(which) > 0:
+            sub.add_rows(which)
+
+        if sub.nrows + sub.ncols == size:
+            break
+
+
+def _find_bicluster_(data, delta, alpha):
+    """
+    Returns the row and column masks of a bicluster in 'data' with
+    mean squared residue at most 'delta', or None.
+
+    """
+    sub = _Submatrix_(data)
+    _multiple_deletion_(sub, delta, alpha)
+    if not _single_deletion_(sub, delta):
+        return None
+    _node_addition_(sub)
+    return sub.rows, sub.cols
+
+
+@bicluster_algorithm
+def cheng_church_numpy(data, delta, alpha=1.5, number=100):
+    """
+    Cheng and Church algorithm, in numpy. Takes the same arguments as
+    bibench.algorithms.biclust.cheng_church(), without calling R.
+
+    Found biclusters are masked with uniform random values between
+    the minimum and maximum of the data, drawn from numpy.random.
+
+    Args:
+        * data: numpy.ndarray
+        * delta: Maximum of accepted score.
+        * alpha: Scaling factor.
+        * number: Number of biclusters to find.
+
+    Returns:
+        A list of biclusters.
+    """
+    #the working copy, in which found biclusters are masked
+    masked = numpy.array(data, dtype=numpy.float64)
+    low, high = masked.min(), masked.max()
+
+    biclusters = []
+    for _ in range(number):
+        found = _find_bicluster_(masked, delta, alpha)
+        if found is None:
+            break
+        rows, cols = [numpy.flatnonzero(mask) for mask in found]
+        biclusters.append(Bicluster(rows.tolist(), cols.tolist(), data))
+        block = numpy.ix_(rows, cols)
+        masked[block] = numpy.random.uniform(low, high,
+                                             (len(rows), len(cols)))
+    return biclusters
@@ -23,9 +23,9 @@
 ###--------------------------------------------------------------###
 
 """Coalesce algorithm wrapper for finding biclusters with up and down regulated TF."""
-import os, subprocess
+import os
 
-from bibench.algorithms.wrapper import wrapper_helper
+from bibench.algorithms.wrapper import wrapper_helper, call, run_async
 from bibench.bicluster import \
     Bicluster, BiclusterList, bicluster_algorithm
 from bibench.datasets import io
@@ -68,6 +68,16 @@ def coalesce(data,
                           **kwargs)
 
 
+def coalesce_async(*args, **kwargs):
+    """
+    Like coalesce(), but returns a WrapperRun without waiting for the
+    binary to finish. Accepts an extra keyword argument, 'timeout', in
+    seconds. See wrapper.run_async().
+
+    """
+    return run_async(coalesce, *args, **kwargs)
+
+
 def _do_call_(data, datafile, results_dir, **kwargs):
     """Executes the COALESCE with given parameters"""
 
@@ -84,7 +94,7 @@ def _do_call_(data, datafile, results_dir, **kwargs):
 
     with open(stndout, 'w') as out:
         with open(stnderr, 'w') as err:
-            subprocess.check_call(command.split(), stdout=out, stderr=err)
+            call(command.split(), stdout=out, stderr=err)
 
 
 def _read_results_(dirname, data):
@@ -117,4 +127,4 @@ def _createBicluster_(geneLine, conditionLine, data):
 
 def _write_dataset_(data, filename):
     """Writes a dataset in the format for Coalesce into pcl format."""
-    io.write_pcl_dataset(data, filename)
+    io.write_pcl_dataset(data, filename, io.EXACT_PRECISION)
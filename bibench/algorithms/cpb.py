@@ -27,10 +27,13 @@ Correlated Pattern Bicluster (CPB) algorithm. Finds biclusters with genes
 that have large pairwise Pearson correlation.
 """
 import os
+import time
 import subprocess
 
 import bibench
-from bibench.algorithms.wrapper import wrapper_helper
+from bibench.algorithms.wrapper import \
+    wrapper_helper, call, run_async, POLL_INTERVAL
+from bibench.datasets.io import write_matrix, EXACT_PRECISION
 from bibench.bicluster import \
     Bicluster, BiclusterList, bicluster_algorithm, filter
 
@@ -88,6 +91,16 @@ def cpb(data,
     return biclusters
 
 
+def cpb_async(*args, **kwargs):
+    """
+    Like cpb(), but returns a WrapperRun without waiting for the
+    binary to finish. Accepts an extra keyword argument, 'timeout', in
+    seconds. See wrapper.run_async().
+
+    """
+    return run_async(cpb, *args, **kwargs)
+
+
 def cpb_filter(biclusters,
                data,
                nclus,
@@ -158,7 +171,7 @@ def _do_call_(data, datafile, results_dir, **kwargs):
     try:
         os.chdir(results_dir)
         command = '{0} {1} {initfile} 1 {targetpcc} {fixw}'.format(BINARY, datafile, **kwargs)
-        subprocess.check_call(command.split())
+        call(command.split())
 
     except OSError:
         raise Exception("Error calling 'cpb'. Is it on the PATH?")
@@ -179,14 +192,76 @@ def _write_dataset_(data, filename):
     """
     outfile = file(filename, 'w')
     rows, cols = data.shape
-    outfile.write("{0} {1}".format(rows, cols))
-    for row in data:
-        outfile.write("\n")
-        outfile.write(" ".join([str(j) for j in row]))
-    outfile.write("\n")
+    outfile.write("{0} {1}\n".format(rows, cols))
+    write_matrix(outfile, data, sep=" ", precision=EXACT_PRECISION)
     outfile.close()
 
 
+def iter_cpb(data, *args, **kwargs):
+    """
+    Like cpb(), but yields biclusters one at a time, as CPB writes
+    them, while it is still running. Accepts the extra keyword
+    argument 'timeout' of cpb_async(); if CPB is killed for exceeding
+    it, the biclusters it had written are yielded, and iteration ends.
+
+    """
+    #keep the results directory, to read what is left after a timeout
+    run = cpb_async(data, *args, **kwargs).keep_files()
+    try:
+        if run.results_dir is None:
+            #a cached result
+            for bicluster in run.result():
+                yield bicluster
+            return
+        for filename in _watch_outfiles_(run):
+            bicluster = _read_result_file_(filename, data)
+            if bicluster is not None:
+                yield bicluster
+        run.check()
+    finally:
+        run.close()
+
+
+def _outfiles_(results_dir):
+    if not os.path.isdir(results_dir):
+        #removed after a timeout
+        return []
+    files = os.listdir(results_dir)
+    return [os.path.join(results_dir, f) for f in files
+            if os.path.splitext(f)[1] == '.out']
+
+
+def _watch_outfiles_(run):
+    """
+    Yield the names of the .out files of a running CPB as they are
+    finished. While CPB runs, the newest file may still be being
+    written, so it is held back until CPB writes another or exits.
+    Timestamps may be coarse, so every file as new as the newest is
+    held back.
+
+    """
+    seen = set()
+    while True:
+        running = run.running()
+        new = []
+        for filename in _outfiles_(run.results_dir):
+            if filename not in seen:
+                try:
+                    new.append((os.path.getmtime(filename), filename))
+                except OSError:
+                    pass
+        new.sort()
+        if running and new:
+            newest = new[-1][0]
+            new = [(mtime, f) for mtime, f in new if mtime < newest]
+        for _, filename in new:
+            seen.add(filename)
+            yield filename
+        if not running:
+            return
+        time.sleep(POLL_INTERVAL)
+
+
 def _read_results_(results_dir, data):
     #find the results file with extension .out
     files = os.listdir(results_dir)
@@ -194,7 +269,9 @@ def _read_results_(results_dir, data):
 
     biclusters = []
     for f in outfiles:
-        biclusters.append(_read_result_file_(os.path.join(results_dir, f), data))
+        bicluster = _read_result_file_(os.path.join(results_dir, f), data)
+        if bicluster is not None:
+            biclusters.append(bicluster)
 
     return biclusters
 
@@ -216,6 +293,9 @@ def _read_result_file_(filename, data):
     ...
     [col index]     [col score]
 
+    Returns None if the file is incomplete, as when CPB was killed
+    while writing it.
+
     """
     rows, cols = [], []
     with open (filename, 'r') as f:
@@ -227,7 +307,12 @@ def _read_result_file_(filename, data):
                 target = cols
                 continue
             else:
-                target.append(int(line.split()[0]))
+                fields = line.split()
+                if len(fields) < 2:
+                    return None
+                target.append(int(fields[0]))
         rows.sort()
         cols.sort()
+    if not cols:
+        return None
     return Bicluster(rows, cols, data=data)
@@ -27,11 +27,12 @@ FABIA biclustering algorithm.
 
 """
 
-import numpy
 from bibench import util
+from bibench.profiling import phase
+from bibench import rpool
 from bibench.bicluster import \
     Bicluster, BiclusterList, bicluster_algorithm
-from rpy2 import robjects
+from bibench import rutil
 
 @bicluster_algorithm
 def fabia(data,
@@ -130,6 +131,7 @@ def nmfeu(data, p=5, cyc=100):
 
 def _extract_biclusters_(fact, thresZ=0.5, thresL=None):
     params = dict()
+    robjects = rutil.robjects()
     params['thresZ'] = thresZ
     if thresL is not None:
         params['thresL'] = thresL
@@ -137,30 +139,42 @@ def _extract_biclusters_(fact, thresZ=0.5, thresL=None):
     result = extract(fact, **params)
 
     data = result.rx('X')[0]
-    numpy_data = numpy.array(data)
+    numpy_data = rutil.from_r_matrix(data)
     row_dict = util.make_index_map(list(data.names[0]))
     col_dict = util.make_index_map(list(data.names[1]))
 
     # an R matrix; each row is a bicluster
-    biclusters = []
+    rows_list = []
+    cols_list = []
     r_biclusters = result.rx('bic')[0]
     for b in range(1, r_biclusters.nrow + 1): #r matrices are 1-indexed
         entry = r_biclusters.rx(b, True)
 
         rownames = list(entry.rx('bixn')[0])
         colnames = list(entry.rx('biypn')[0])
-        rows = [row_dict[r] for r in rownames]
-        cols = [col_dict[c] for c in colnames]
-        biclusters.append(Bicluster(rows, cols, numpy_data))
-    return biclusters
+        rows_list.append([row_dict[r] for r in rownames])
+        cols_list.append([col_dict[c] for c in colnames])
+    return numpy_data, rows_list, cols_list
 
 
-def _call_helper_(function_name, data, **kwargs):
+def _factorize_(function_name, data, **kwargs):
+    """Runs the factorization and extracts the biclusters' rows and
+    columns. Called through bibench.rpool.
+
+    """
     params = kwargs
-    params['X'] = data
+    params['X'] = rutil.to_r_matrix(data)
 
-    robjects.r.library('fabia')
-    r_data = robjects.Matrix(data)
+    robjects = rutil.robjects()
+    rutil.library('fabia')
     func = robjects.r[function_name]
     factorization = func(**params)
     return _extract_biclusters_(factorization)
+
+
+def _call_helper_(function_name, data, **kwargs):
+    with phase('r'):
+        numpy_data, rows_list, cols_list = \
+            rpool.call(_factorize_, function_name, data, **kwargs)
+    return [Bicluster(rows, cols, numpy_data)
+            for rows, cols in zip(rows_list, cols_list)]
@@ -25,40 +25,25 @@
 """ISA biclustering algorithm, which is provided in the R package 'isa2'."""
 
 from bibench.bicluster import \
-    Bicluster, BiclusterList, bicluster_algorithm
+    BiclusterList, bicluster_algorithm, biclusters_from_matrices
 from bibench.util import isiterable
-import numpy
-import rpy2.robjects as robjects
+from bibench.profiling import phase
+from bibench import rpool
+from bibench import rutil
 
 
-@bicluster_algorithm
-def isa(data,
-        thr_row=None,
-        thr_col=None,
-        no_seeds=100,
-        direction=['updown', 'updown']):
-    """
-    ISA biclustering algorithm.
-
-    Args:
-        * data: numpy.ndarray.
-        * thr_row: threshold value for rows.
-        * thr_col: threshold value for cols.
-        * no_seeds: number of seeds to generate biclusters.
-        * direction: either 'up' for upregulated,
-            'down' for downregulated, 'updown' for both(default).
-
-    Returns:
-        A list of biclusters.
+def _isa_matrices_(data, thr_row, thr_col, no_seeds, direction):
+    """Runs 'isa' and returns its row and column matrices.
+    Called through bibench.rpool.
 
     """
-
+    robjects = rutil.robjects()
 
     #load the isa library
-    robjects.r.library('isa2')
+    rutil.library('isa2')
 
     #get an R object for the data
-    r_data = robjects.Matrix(data)
+    r_data = rutil.to_r_matrix(data)
 
     def handle_threshold(x):
         if x is None:
@@ -79,23 +64,37 @@ def isa(data,
     result = func(r_data, thr_row, thr_col, no_seeds, direction)
 
     #get rowXnumber array
-    row_matrix = numpy.array(robjects.Matrix(result[0]))
+    row_matrix = rutil.from_r_matrix(result[0])
 
     #get numberXcolumn array
-    col_matrix = numpy.array(robjects.Matrix(result[1]))
+    col_matrix = rutil.from_r_matrix(result[1])
 
-    num_biclusters = row_matrix.shape[1]
-    assert num_biclusters == col_matrix.shape[1]
+    return row_matrix, col_matrix
 
-    #make list of biclusters
-    biclusters = []
-    for i in range(num_biclusters):
-        row_vals = row_matrix[:, i]
-        col_vals = col_matrix[:, i]
 
-        rows = [index for index, elt in enumerate(row_vals) if elt]
-        cols = [index for index, elt in enumerate(col_vals) if elt]
+@bicluster_algorithm
+def isa(data,
+        thr_row=None,
+        thr_col=None,
+        no_seeds=100,
+        direction=['updown', 'updown']):
+    """
+    ISA biclustering algorithm.
+
+    Args:
+        * data: numpy.ndarray.
+        * thr_row: threshold value for rows.
+        * thr_col: threshold value for cols.
+        * no_seeds: number of seeds to generate biclusters.
+        * direction: either 'up' for upregulated,
+            'down' for downregulated, 'updown' for both(default).
 
-        biclusters.append(Bicluster(rows, cols, data=data))
+    Returns:
+        A list of biclusters.
+
+    """
+    with phase('r'):
+        row_matrix, col_matrix = rpool.call(
+            _isa_matrices_, data, thr_row, thr_col, no_seeds, direction)
 
-    return biclusters
+    return biclusters_from_matrices(row_matrix, col_matrix, data)
@@ -25,10 +25,11 @@
 """
 Ordered Preserved SubMatrix wrapper.
 """
-from bibench.algorithms.wrapper import wrapper_helper
+from bibench.algorithms.wrapper import wrapper_helper, call, run_async
+from bibench.datasets.io import write_matrix, EXACT_PRECISION
 from bibench.bicluster import \
     Bicluster, BiclusterList, bicluster_algorithm
-import os, subprocess
+import os
 from bibench import util
 
 BINARY = 'opsm.sh'
@@ -55,12 +56,22 @@ def opsm(data, lValue = 10):
                           **kwargs)
 
 
+def opsm_async(*args, **kwargs):
+    """
+    Like opsm(), but returns a WrapperRun without waiting for the
+    binary to finish. Accepts an extra keyword argument, 'timeout', in
+    seconds. See wrapper.run_async().
+
+    """
+    return run_async(opsm, *args, **kwargs)
+
+
 def _do_call_(data, datafile, results_dir, **kwargs):
     """Executes the OPSM.jar executable with given parameters"""
     outpath = os.path.join(results_dir, RESULTFILE)
     cmd = [BINARY, datafile, str(data.shape[0]),
            str(data.shape[1]), outpath, str(kwargs["lValue"])]
-    subprocess.check_call(cmd)
+    call(cmd)
 
 
 def _read_results_(dirname, data):
@@ -93,7 +104,5 @@ def _write_dataset_(data, filename):
     Separates with tab.
     """
     f = file(filename, 'w')
-    for row in data:
-        f.write('\t'.join(map(str, row)))
-        f.write('\n')
+    write_matrix(f, data, '\t', EXACT_PRECISION)
     f.close()
@@ -26,14 +26,15 @@
 QUalitative BIClustering algorithm. Efficient algorithm for finding biclusters
 with scaling patterns.
 """
-from bibench.algorithms.wrapper import wrapper_helper
+from bibench.algorithms.wrapper import \
+    wrapper_helper, call, run_async, follow
+from bibench.datasets.io import write_matrix, EXACT_PRECISION
 from bibench.bicluster import \
     Bicluster, BiclusterList, bicluster_algorithm
 from bibench import util
 
 import os.path
 import re
-import subprocess
 
 number_regex = re.compile('[0-9]+')
 
@@ -76,6 +77,16 @@ def qubic(data,
                           **kwargs)
 
 
+def qubic_async(*args, **kwargs):
+    """
+    Like qubic(), but returns a WrapperRun without waiting for the
+    binary to finish. Accepts an extra keyword argument, 'timeout', in
+    seconds. See wrapper.run_async().
+
+    """
+    return run_async(qubic, *args, **kwargs)
+
+
 def _do_call_(data, datafile, results_dir, **kwargs):
     command = "{binary} -i {0}" \
         " -q {quantile}" \
@@ -86,22 +97,20 @@ def _do_call_(data, datafile, results_dir, **kwargs):
         " -o {nblocks}".format(datafile, binary=BINARY, **kwargs)
     if kwargs['discrete']:
         command += ' -d'
-    subprocess.check_call(command.split())
+    call(command.split())
 
 def _write_dataset_(data, filename):
     nrows, ncols = data.shape
     with open(filename, 'w') as f:
         #write first line
         line = ['o']
-        line.extend(map(lambda x: 'cond{0}'.format(x), range(ncols)))
+        line.extend(_cond_names_(ncols))
         f.write('\t'.join(line))
         f.write('\n')
 
         #write gene lines
-        for i, line in enumerate(data):
-            f.write('gene{0}\t'.format(i))
-            f.write('\t'.join(map(str, line)))
-            f.write('\n')
+        write_matrix(f, data, '\t', EXACT_PRECISION,
+                     labels=_gene_names_(nrows))
 
 def _get_expected_(string, regex):
     matches = re.search(regex, string)
@@ -144,33 +153,92 @@ def _handle_cond_lines_(string, name_dict):
     return [name_dict[name] for name in string.split()]
 
 
-def _get_names_(results_dir):
-    #map gene and condition names to rows/columns
-    datafile = os.path.join(results_dir, 'data.txt')
-    with open(datafile) as f:
-        first = f.readline()
-        rest = f.read()
+def _gene_names_(nrows):
+    return ['gene{0}'.format(i) for i in range(nrows)]
+
+
+def _cond_names_(ncols):
+    return ['cond{0}'.format(j) for j in range(ncols)]
+
+
+def _get_names_(shape):
+    """
+    Map the gene and condition names written by _write_dataset_() to
+    rows and columns. They are made from the shape of the dataset,
+    instead of being read back from the datafile, which may be a FIFO
+    (see wrapper.enable_fifo()).
+
+    """
+    nrows, ncols = shape
+    return util.make_index_map(_gene_names_(nrows)), \
+        util.make_index_map(_cond_names_(ncols))
+
+
+_start_regex_ = re.compile('^BC[0-9]+\s*S=[0-9]+$')
 
-        cond_names = first.split()[1:]
-        gene_names = [line.split()[0] for line in rest.split('\n')
-                      if line is not '']
 
-        gene_dict = util.make_index_map(gene_names)
-        cond_dict = util.make_index_map(cond_names)
+def _is_complete_(string):
+    """True if the 'Conds' line of a block has been written in full."""
+    match = _cond_regex_.search(string)
+    return match is not None and '\n' in string[match.end():]
 
-        return gene_dict, cond_dict
+
+def _iter_blocks_(lines):
+    """
+    Group the lines of a .blocks file into one string per bicluster,
+    without its 'BC... S=...' header line.
+
+    The last block is dropped if it is incomplete, as it may be when
+    QUBIC was killed while writing it.
+
+    """
+    block = None
+    for line in lines:
+        if _start_regex_.match(line.rstrip('\n')):
+            if block is not None:
+                yield ''.join(block)
+            block = []
+        elif block is not None:
+            block.append(line)
+    if block is not None and _is_complete_(''.join(block)):
+        yield ''.join(block)
+
+
+def _blocks_file_(results_dir):
+    return os.path.join(os.path.split(results_dir)[0], 'data.txt.blocks')
+
+
+def _iter_results_(lines, results_dir, data):
+    gene_dict, cond_dict = _get_names_(data.shape)
+    for string in _iter_blocks_(lines):
+        yield _parse_bicluster_(string, gene_dict, cond_dict, data)
 
 
 def _read_results_(results_dir, data):
-    results_dir = os.path.split(results_dir)[0]
-    filename = os.path.join(results_dir, 'data.txt.blocks')
-    with open(filename, 'r') as f:
-        result_string = f.read()
-
-    gene_dict, cond_dict = _get_names_(results_dir)
-
-    start_regex = re.compile('^BC[0-9]+\s*S=[0-9]+$', flags=re.MULTILINE)
-    bicluster_strings = re.split(start_regex, result_string)[1:]
-    biclusters = [_parse_bicluster_(string, gene_dict, cond_dict, data)
-                  for string in bicluster_strings]
-    return biclusters
+    with open(_blocks_file_(results_dir), 'r') as f:
+        return list(_iter_results_(f, results_dir, data))
+
+
+def iter_qubic(data, *args, **kwargs):
+    """
+    Like qubic(), but yields biclusters one at a time, as QUBIC
+    writes them, while it is still running. Accepts the extra keyword
+    argument 'timeout' of qubic_async(); if QUBIC is killed for
+    exceeding it, the biclusters it had written are yielded, and
+    iteration ends.
+
+    """
+    #keep the results directory, to read what is left after a timeout
+    run = qubic_async(data, *args, **kwargs).keep_files()
+    try:
+        if run.results_dir is None:
+            #a cached result
+            for bicluster in run.result():
+                yield bicluster
+            return
+        lines = follow(_blocks_file_(run.results_dir), run)
+        for bicluster in _iter_results_(lines, run.results_dir, data):
+            yield bicluster
+        run.check()
+    finally:
+        run.close()
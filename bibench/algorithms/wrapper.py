@@ -37,6 +37,12 @@ wrapper_helper(), passing those functions
 To see how this works, try looking at qubic.py, cpb.py, or any other
 module that uses this function.
 
+Wrapped algorithms can also be started without waiting for them, with
+run_async(). Binaries started by do_call() through call() then keep
+running in the background, and a WrapperRun is returned instead of the
+biclusters. Many runs can be driven from a single thread this way,
+eg with as_completed().
+
 """
 
 import os
@@ -45,13 +51,783 @@ import shutil
 import tempfile
 import subprocess
 import logging
+import threading
+import time
+import signal
+import resource
+from contextlib import contextmanager
 
 import bibench.util as util
+from bibench.bicluster import BiclusterList
+from bibench.profiling import phase, count
 
 class WrapperException(Exception):
     pass
 
 
+class WrapperCancelled(WrapperException):
+    """Raised by call() when the current run is cancelled."""
+    pass
+
+
+class WrapperTimeout(WrapperException):
+    """Raised when a run is killed for exceeding its time limit."""
+    pass
+
+
+_local_ = threading.local()
+
+#seconds between checks for cancellation while a binary runs
+POLL_INTERVAL = 0.1
+
+DEFAULT_STAGING_MAXSIZE = 4 << 30
+
+#part of the name of every staged file; increase it when the dataset
+#writers change their output, so that older files are not reused.
+#2: values written with %.17g (io.EXACT_PRECISION).
+_STAGING_VERSION_ = 2
+
+#free space, in bytes, to leave in a scratch directory
+DEFAULT_SCRATCH_RESERVE = 256 << 20
+
+#a generous estimate of the size of one value exported as text
+_TEXT_BYTES_PER_VALUE_ = 24
+
+
+@contextmanager
+def cancellable(event):
+    """
+    Make binaries started by call() in this thread, within the block,
+    stop when 'event' (a threading.Event) is set.
+
+    """
+    saved = getattr(_local_, 'cancel', None)
+    _local_.cancel = event
+    try:
+        yield
+    finally:
+        _local_.cancel = saved
+
+
+@contextmanager
+def limits(wall=None, cpu=None, memory=None):
+    """
+    Limit each binary started by call() in this thread, within the
+    block.
+
+    Args:
+        * wall: wall clock time, in seconds. The binary is killed
+            when it runs longer.
+        * cpu: CPU time, in seconds, enforced with RLIMIT_CPU.
+        * memory: address space, in bytes, enforced with RLIMIT_AS.
+            Allocations beyond it fail, and the binary usually exits
+            with an error.
+
+    A binary that exceeds its wall clock or CPU time makes call()
+    raise WrapperTimeout. wrapper_helper() then returns whatever
+    results the binary had already written, with
+    properties['timed_out'] set.
+
+    """
+    saved = getattr(_local_, 'limits', None)
+    _local_.limits = dict(wall=wall, cpu=cpu, memory=memory)
+    try:
+        yield
+    finally:
+        _local_.limits = saved
+
+
+def _set_rlimits_(cpu, memory):
+    """A preexec_fn that sets resource limits in the child."""
+    def preexec():
+        if cpu is not None:
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+        if memory is not None:
+            resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    return preexec
+
+
+def _kill_(process):
+    if process.poll() is None:
+        process.kill()
+        process.wait()
+
+
+def call(command, **kwargs):
+    """
+    Like subprocess.check_call(), but kills the process and raises
+    WrapperCancelled if the run is cancelled (see cancellable()), or
+    WrapperTimeout if it exceeds its time limits (see limits()).
+
+    When called from an algorithm started by run_async(), starts the
+    process and returns without waiting for it.
+
+    """
+    limit = getattr(_local_, 'limits', None) or dict()
+    cpu, memory = limit.get('cpu'), limit.get('memory')
+    if cpu is not None or memory is not None:
+        kwargs['preexec_fn'] = _set_rlimits_(cpu, memory)
+
+    launched = getattr(_local_, 'launched', None)
+    if launched is not None:
+        launched.append((command, subprocess.Popen(command, **kwargs)))
+        return 0
+
+    event = getattr(_local_, 'cancel', None)
+    if event is not None and event.is_set():
+        raise WrapperCancelled(command)
+    deadline = None
+    if limit.get('wall') is not None:
+        deadline = time.time() + limit['wall']
+
+    process = subprocess.Popen(command, **kwargs)
+    if event is None and deadline is None:
+        process.wait()
+    while process.poll() is None:
+        if event is not None:
+            event.wait(POLL_INTERVAL)
+        else:
+            time.sleep(POLL_INTERVAL)
+        if event is not None and event.is_set():
+            _kill_(process)
+            raise WrapperCancelled(command)
+        if deadline is not None and time.time() >= deadline:
+            _kill_(process)
+            raise WrapperTimeout(
+                '{0} exceeded {1} seconds'.format(command, limit['wall']))
+    if process.returncode != 0:
+        if cpu is not None and \
+                -process.returncode in (signal.SIGXCPU, signal.SIGKILL):
+            raise WrapperTimeout(
+                '{0} exceeded {1} CPU seconds'.format(command, cpu))
+        raise subprocess.CalledProcessError(process.returncode, command)
+    return 0
+
+
+@contextmanager
+def exported_dataset(write_dataset, datafile):
+    """
+    Within the block, in this thread, make wrapper_helper() link to
+    'datafile' instead of calling 'write_dataset' to export the
+    dataset. 'datafile' must already hold the dataset as
+    'write_dataset' would have written it.
+
+    """
+    saved = getattr(_local_, 'exported', None)
+    _local_.exported = (write_dataset, datafile)
+    try:
+        yield
+    finally:
+        _local_.exported = saved
+
+
+class StagingCache(object):
+    """
+    Keeps exported datasets on disk, so that repeated runs on the same
+    dataset, for instance in a parameter sweep, write it only once.
+    Staged files are keyed by the contents of the dataset and by the
+    function that wrote them, and are linked into each run's
+    directory. When their total size exceeds 'maxsize' bytes, the
+    least recently used files are removed.
+
+    Binaries must not modify their input files, since those may be
+    hard links to the staged copy. Where a hard link is not possible,
+    eg across filesystems, the staged file is copied, so that evicting
+    it cannot affect a running binary.
+
+    """
+    def __init__(self, directory=None, maxsize=DEFAULT_STAGING_MAXSIZE):
+        if directory is None:
+            directory = util.get_hidden_dir('staging')
+        elif not os.path.exists(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.maxsize = maxsize
+
+
+    def stage(self, write_dataset, data):
+        """
+        Return the name of a file holding 'data' as written by
+        'write_dataset', writing it first if it is not staged yet.
+
+        """
+        writer = '.'.join([write_dataset.__module__, write_dataset.__name__])
+        name = '{0}.{1}.v{2}'.format(util.array_digest(data), writer,
+                                     _STAGING_VERSION_)
+        path = os.path.join(self.directory, name)
+        if os.path.exists(path):
+            os.utime(path, None)
+            return path
+
+        #hidden while being written, so that evict() skips it
+        fd, tmpname = tempfile.mkstemp(prefix='.', dir=self.directory)
+        os.close(fd)
+        try:
+            write_dataset(data, tmpname)
+            os.rename(tmpname, path)
+        except:
+            os.remove(tmpname)
+            raise
+        self.evict(keep=path)
+        return path
+
+
+    def link(self, write_dataset, data, destination):
+        """
+        Make 'destination' hold 'data' as written by 'write_dataset',
+        by linking or copying the staged file (see link_file()).
+        Stages it again if another run evicted it in the meantime.
+
+        """
+        for attempt in range(2):
+            path = self.stage(write_dataset, data)
+            try:
+                link_file(path, destination)
+                return
+            except (IOError, OSError):
+                if os.path.exists(path) or attempt > 0:
+                    raise
+
+
+    def size(self):
+        """The total size, in bytes, of all staged files."""
+        return sum(size for _, size, _ in self._entries_())
+
+
+    def _entries_(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.startswith('.'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+
+    def evict(self, maxsize=None, keep=None):
+        """
+        Remove least recently used files, other than 'keep', until the
+        total size is at most 'maxsize', which defaults to
+        self.maxsize.
+
+        """
+        if maxsize is None:
+            maxsize = self.maxsize
+        entries = sorted(self._entries_())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= maxsize:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+_staging_ = None
+
+
+def enable_staging(directory=None, maxsize=DEFAULT_STAGING_MAXSIZE):
+    """
+    Make wrapper_helper() stage exported datasets in a StagingCache,
+    instead of writing them anew for every run.
+
+    Returns:
+        The StagingCache in use.
+
+    """
+    global _staging_
+    _staging_ = StagingCache(directory, maxsize)
+    return _staging_
+
+
+def disable_staging():
+    """Stop staging exported datasets. Staged files are kept on disk."""
+    global _staging_
+    _staging_ = None
+
+
+_scratch_ = None
+
+_fifo_binaries_ = set()
+
+
+def set_scratch(directories=('/dev/shm',), reserve=DEFAULT_SCRATCH_RESERVE):
+    """
+    Choose where wrapper_helper() creates its temporary directories:
+    in the first of 'directories' with room for the exported dataset
+    plus 'reserve' bytes, or, if none has room, in the default
+    temporary directory. The default, '/dev/shm', keeps the dataset
+    and results in RAM.
+
+    Call with directories=None to always use the default temporary
+    directory again.
+
+    """
+    global _scratch_
+    if directories is None:
+        _scratch_ = None
+    else:
+        _scratch_ = (list(directories), reserve)
+
+
+def _free_space_(directory):
+    st = os.statvfs(directory)
+    return st.f_bavail * st.f_frsize
+
+
+def _scratch_dir_(data):
+    """The directory in which to make a run's temporary directory."""
+    if _scratch_ is None:
+        return None
+    directories, reserve = _scratch_
+    needed = data.size * _TEXT_BYTES_PER_VALUE_ + reserve
+    for directory in directories:
+        try:
+            if os.path.isdir(directory) and _free_space_(directory) >= needed:
+                return directory
+        except OSError:
+            continue
+    return None
+
+
+def enable_fifo(binary):
+    """
+    Make wrapper_helper() pass the dataset to 'binary' through a named
+    pipe. The dataset is written into the pipe as the binary reads it,
+    so it never touches the disk. Only use this for binaries that
+    read their input file once, from start to end, whose
+    write_dataset function opens the file only once, and whose
+    result reader does not open it again.
+
+    """
+    _fifo_binaries_.add(binary)
+
+
+def disable_fifo(binary):
+    """Pass the dataset to 'binary' in a regular file again."""
+    _fifo_binaries_.discard(binary)
+
+
+class _FifoWriter_(threading.Thread):
+    """Writes a dataset into a named pipe, in the background."""
+
+    def __init__(self, write_dataset, data, fifo):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.write_dataset = write_dataset
+        self.data = data
+        self.fifo = fifo
+        self.error = None
+
+
+    def run(self):
+        try:
+            self.write_dataset(self.data, self.fifo)
+        except Exception as e:
+            self.error = e
+
+
+    def finish(self):
+        """
+        Wait for the writer. If the binary exited without opening the
+        pipe, open it to release the writer.
+
+        """
+        if self.is_alive():
+            try:
+                fd = os.open(self.fifo, os.O_RDONLY | os.O_NONBLOCK)
+                self.join(POLL_INTERVAL)
+                os.close(fd)
+            except OSError:
+                pass
+        self.join()
+
+
+class WrapperRun(object):
+    """
+    A handle on a wrapped algorithm started by run_async().
+    'processes' is a list of (command, subprocess.Popen) pairs.
+
+    The run finishes when all binaries it started have exited; its
+    results are then read back, and the temporary directory removed.
+    A run that exceeds its time limit is killed, and finishes with the
+    partial results read back as by wrapper_helper(), with
+    properties['timed_out'] set. Nothing happens in the background
+    between calls: poll(), wait(), and result() check on the binaries.
+
+    """
+    def __init__(self,
+                 processes,
+                 directory,
+                 results_dir,
+                 read_results,
+                 data,
+                 fifo_writer=None,
+                 timeout=None):
+        self._processes = processes
+        self._directory = directory
+        self._results_dir = results_dir
+        self._read_results = read_results
+        self._data = data
+        self._fifo_writer = fifo_writer
+        self._deadline = None
+        if timeout is not None:
+            self._deadline = time.time() + timeout
+        self._callbacks = []
+        self._state = 'running'
+        self._timed_out = False
+        self._keep = False
+        self._result = None
+        self._error = None
+
+
+    @classmethod
+    def completed(cls, result):
+        """A run that has already finished with 'result'."""
+        run = cls([], None, None, None, None)
+        run._state = 'finished'
+        run._result = result
+        return run
+
+
+    def add_callback(self, f):
+        """
+        Transform the result with f(result) when the run finishes, or
+        now, if it has finished. Returns this run.
+
+        """
+        if self._state == 'running':
+            self._callbacks.append(f)
+        elif self._state == 'finished':
+            self._apply_(f)
+        return self
+
+
+    def _apply_(self, f):
+        try:
+            self._result = f(self._result)
+        except Exception as e:
+            self._state = 'failed'
+            self._error = e
+
+
+    def keep_files(self):
+        """
+        Keep the temporary directory after the run ends, until close()
+        is called, so that results can still be read from it as they
+        are streamed (see iter_cpb()). Returns this run.
+
+        """
+        self._keep = True
+        return self
+
+
+    @property
+    def results_dir(self):
+        """
+        The directory the binaries write results to, while the run
+        lasts; None for an already completed run.
+
+        """
+        return self._results_dir
+
+
+    def running(self):
+        """
+        True while any of the binaries is running. Unlike poll(), does
+        not read back the results when they exit. Kills the binaries
+        if the run is past its time limit.
+
+        """
+        if self._state != 'running':
+            return False
+        if any(p.poll() is None for _, p in self._processes):
+            if self._deadline is not None and time.time() > self._deadline:
+                self._time_out_()
+                return False
+            return True
+        return False
+
+
+    def check(self):
+        """
+        Raise an error if the run was cancelled, or if a binary that
+        has exited failed. A run that timed out is not an error; its
+        result holds the partial results.
+
+        """
+        if self._timed_out:
+            return
+        if self._state == 'cancelled':
+            raise WrapperCancelled('run was cancelled')
+        if self._state == 'failed':
+            raise self._error
+        for command, process in self._processes:
+            if process.returncode not in (None, 0):
+                raise subprocess.CalledProcessError(process.returncode,
+                                                    command)
+
+
+    def close(self):
+        """
+        End the run without reading back its results: kill any
+        binaries still running, and remove the temporary directory.
+
+        """
+        if self._state == 'running':
+            self._stop_('closed')
+        self._keep = False
+        self._cleanup_()
+
+
+    def poll(self):
+        """
+        Returns True if the run is over, without blocking. Kills the
+        binaries if the run is past its time limit.
+
+        """
+        if self._state != 'running':
+            return True
+        if any(p.poll() is None for _, p in self._processes):
+            if self._deadline is not None and time.time() > self._deadline:
+                self._time_out_()
+                return True
+            return False
+        self._finish_()
+        return True
+
+
+    def done(self):
+        """Alias of poll()."""
+        return self.poll()
+
+
+    def wait(self, timeout=None):
+        """
+        Wait for the run to end, for at most 'timeout' seconds.
+        Returns True if it has ended.
+
+        """
+        end = None if timeout is None else time.time() + timeout
+        while not self.poll():
+            if end is not None and time.time() >= end:
+                return False
+            time.sleep(POLL_INTERVAL)
+        return True
+
+
+    def cancel(self):
+        """Kill the binaries, if they are still running."""
+        if self._state == 'running':
+            self._stop_('cancelled')
+
+
+    def result(self, timeout=None):
+        """
+        Wait for the run to end, for at most 'timeout' seconds, and
+        return its result. If the run was killed for exceeding its
+        time limit, that is the partial results, with
+        properties['timed_out'] set.
+
+        Raises:
+            * WrapperTimeout if 'timeout' expires first.
+            * WrapperCancelled if the run was cancelled.
+            * Any error from the binaries or from reading the results.
+
+        """
+        if not self.wait(timeout):
+            raise WrapperTimeout('run did not finish within {0} seconds'
+                                 .format(timeout))
+        if self._state == 'cancelled':
+            raise WrapperCancelled('run was cancelled')
+        if self._state == 'failed':
+            raise self._error
+        if self._state == 'closed':
+            raise WrapperException('run was closed')
+        return self._result
+
+
+    def _finish_(self):
+        try:
+            if self._fifo_writer is not None:
+                self._fifo_writer.finish()
+            for command, process in self._processes:
+                if process.returncode != 0:
+                    raise subprocess.CalledProcessError(process.returncode,
+                                                        command)
+            if self._fifo_writer is not None and \
+                    self._fifo_writer.error is not None:
+                raise WrapperException(
+                    "error writing dataset to named pipe: {0}"
+                    .format(self._fifo_writer.error))
+            self._result = self._read_results(self._results_dir, self._data)
+            self._state = 'finished'
+        except Exception as e:
+            self._state = 'failed'
+            self._error = e
+        finally:
+            self._cleanup_()
+        self._run_callbacks_()
+
+
+    def _run_callbacks_(self):
+        for f in self._callbacks:
+            if self._state == 'finished':
+                self._apply_(f)
+        self._callbacks = []
+
+
+    def _kill_(self):
+        for command, process in self._processes:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+        if self._fifo_writer is not None:
+            self._fifo_writer.finish()
+
+
+    def _time_out_(self):
+        """Kill the binaries, keeping what they wrote, as wrapper_helper() does."""
+        self._kill_()
+        self._timed_out = True
+        logging.warning('run exceeded its time limit; keeping partial results')
+        try:
+            self._result = _read_partial_results_(self._read_results,
+                                                  self._results_dir,
+                                                  self._data)
+            self._state = 'finished'
+        except Exception as e:
+            self._state = 'failed'
+            self._error = e
+        finally:
+            self._cleanup_()
+        self._run_callbacks_()
+
+
+    def _stop_(self, state):
+        self._kill_()
+        self._cleanup_()
+        self._state = state
+        self._callbacks = []
+
+
+    def _cleanup_(self):
+        if self._keep:
+            return
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+
+
+def run_async(algorithm, *args, **kwargs):
+    """
+    Start a wrapped algorithm, such as qubic(), without waiting for
+    its binary to finish.
+
+    Args:
+        * algorithm: a function that calls wrapper_helper().
+        * args, kwargs: the arguments to 'algorithm'. The keyword
+          argument 'timeout', if given, is the number of seconds
+          after which the binary is killed.
+
+    Returns:
+        A WrapperRun, whose result() is what 'algorithm' would have
+        returned.
+
+    """
+    timeout = kwargs.pop('timeout', None)
+    saved = getattr(_local_, 'nowait', None)
+    _local_.nowait = dict(timeout=timeout)
+    try:
+        result = algorithm(*args, **kwargs)
+    finally:
+        _local_.nowait = saved
+    if not isinstance(result, WrapperRun):
+        #eg a cached result
+        result = WrapperRun.completed(result)
+    return result
+
+
+def as_completed(runs, timeout=None):
+    """
+    Iterate over WrapperRuns as they end, for at most 'timeout'
+    seconds.
+
+    """
+    pending = list(runs)
+    end = None if timeout is None else time.time() + timeout
+    while pending:
+        finished = [run for run in pending if run.poll()]
+        for run in finished:
+            pending.remove(run)
+            yield run
+        if pending and not finished:
+            if end is not None and time.time() >= end:
+                raise WrapperTimeout('{0} runs did not finish'
+                                     .format(len(pending)))
+            time.sleep(POLL_INTERVAL)
+
+
+def follow(filename, run):
+    """
+    Iterate over the lines of 'filename' as the binaries of 'run', a
+    WrapperRun, write them, until they exit. Lines are only yielded
+    once complete; a final line without a newline is yielded after
+    the binaries exit.
+
+    """
+    while not os.path.exists(filename):
+        if not run.running():
+            if os.path.exists(filename):
+                break
+            return
+        time.sleep(POLL_INTERVAL)
+
+    with open(filename) as f:
+        partial = ''
+        while True:
+            line = f.readline()
+            if line.endswith('\n'):
+                yield partial + line
+                partial = ''
+                continue
+            partial += line
+            if not run.running():
+                #the binaries are done; read what is left
+                for line in f:
+                    yield partial + line
+                    partial = ''
+                if partial:
+                    yield partial
+                return
+            time.sleep(POLL_INTERVAL)
+
+
+def link_file(source, destination):
+    """
+    Make 'destination' refer to the file 'source' without copying it,
+    if possible, with a hard link; otherwise, eg across filesystems,
+    copy it. A symbolic link is not used, since 'source' could then be
+    removed while a binary reads it.
+
+    """
+    try:
+        os.link(source, destination)
+        return
+    except (OSError, AttributeError):
+        if not os.path.exists(source):
+            raise
+    shutil.copyfile(source, destination)
+
+
 def wrapper_helper(binary,
                    write_dataset,
                    read_results,
@@ -96,7 +872,19 @@ def wrapper_helper(binary,
                  (results_dir, data)
 
      Returns:
-         * A BiclusterList of Biclusters.
+         * A BiclusterList of Biclusters, or a WrapperRun if called
+           through run_async().
+
+    If staging is enabled (see enable_staging()), the dataset is
+    exported only once per dataset and write_dataset function.
+    Temporary directories may be placed in RAM with set_scratch(), and
+    the dataset may be streamed through a named pipe with
+    enable_fifo().
+
+    Each step is timed as a phase of the current run, and the sizes
+    of the exported dataset and of the results are added to the
+    'dataset_bytes' and 'result_bytes' counters. See
+    bibench.profiling.
 
     """
     if util.which(binary) is None:
@@ -105,22 +893,111 @@ def wrapper_helper(binary,
 
 
     #get a temporary directory to hold dataset and results
-    directory = tempfile.mkdtemp()
+    with phase('mkdtemp'):
+        directory = tempfile.mkdtemp(dir=_scratch_dir_(data))
 
-    #write the dataset in the appropriate format
-    datafile = os.path.join(directory, "data.txt")
-    write_dataset(data, datafile)
+    fifo_writer = None
+    nowait = getattr(_local_, 'nowait', None)
+    run = None
+    try:
+        #write the dataset in the appropriate format
+        datafile = os.path.join(directory, "data.txt")
+        exported = getattr(_local_, 'exported', None)
+        with phase('write_dataset'):
+            if exported is not None and exported[0] is write_dataset:
+                link_file(exported[1], datafile)
+            elif _staging_ is not None:
+                _staging_.link(write_dataset, data, datafile)
+            elif binary in _fifo_binaries_:
+                os.mkfifo(datafile)
+                fifo_writer = _FifoWriter_(write_dataset, data, datafile)
+                fifo_writer.start()
+            else:
+                write_dataset(data, datafile)
+        count('dataset_bytes', _disk_usage_(directory))
 
-    #prepare location to hold results
-    results_dir = os.path.join(directory, "results")
-    os.mkdir(results_dir)
+        #prepare location to hold results
+        results_dir = os.path.join(directory, "results")
+        os.mkdir(results_dir)
 
-    do_call(data, datafile, results_dir, *args, **kwargs)
+        if nowait is not None:
+            launched = _local_.launched = []
+            try:
+                do_call(data, datafile, results_dir, *args, **kwargs)
+            except:
+                for command, process in launched:
+                    if process.poll() is None:
+                        process.kill()
+                        process.wait()
+                raise
+            finally:
+                _local_.launched = None
+            timeout = nowait['timeout']
+            if timeout is None:
+                timeout = (getattr(_local_, 'limits', None) or {}).get('wall')
+            run = WrapperRun(launched, directory, results_dir, read_results,
+                             data, fifo_writer, timeout)
+            return run
 
-    #read back the results
-    biclusters = read_results(results_dir, data)
+        with phase('do_call'):
+            try:
+                do_call(data, datafile, results_dir, *args, **kwargs)
+            except WrapperTimeout as e:
+                logging.warning('{0}; keeping partial results'.format(e))
+                return _read_partial_results_(read_results, results_dir, data)
+            finally:
+                if fifo_writer is not None:
+                    fifo_writer.finish()
+        if fifo_writer is not None and fifo_writer.error is not None:
+            raise WrapperException(
+                "error writing dataset to named pipe: {0}"
+                .format(fifo_writer.error))
+        count('result_bytes', _disk_usage_(results_dir))
 
-    #cleanup the temporary directory
-    shutil.rmtree(directory)
+        #read back the results
+        with phase('read_results'):
+            biclusters = read_results(results_dir, data)
+
+    finally:
+        #cleanup the temporary directory, unless a run is using it
+        if run is None:
+            with phase('cleanup'):
+                shutil.rmtree(directory, ignore_errors=True)
 
     return biclusters
+
+
+def _read_partial_results_(read_results, results_dir, data):
+    """
+    Read what a binary wrote before it was killed, as a BiclusterList
+    with properties['timed_out'] set.
+
+    'read_results' may return a list of biclusters, or, like BBC's, a
+    (biclusters, properties) tuple.
+
+    """
+    count('result_bytes', _disk_usage_(results_dir))
+    try:
+        with phase('read_results'):
+            result = read_results(results_dir, data)
+    except Exception as e:
+        logging.warning('could not read partial results: {0}'.format(e))
+        result = []
+    properties = None
+    if isinstance(result, tuple):
+        result, properties = result
+    elif isinstance(result, BiclusterList):
+        properties = result.properties
+    properties = dict(properties or {}, timed_out=True)
+    return BiclusterList(result, properties=properties)
+
+
+def _disk_usage_(directory):
+    """Total size, in bytes, of the files under 'directory'."""
+    total = 0
+    for dirpath, dirnames, filenames in os.walk(directory):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if os.path.isfile(path):
+                total += os.path.getsize(path)
+    return total
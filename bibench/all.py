@@ -33,10 +33,14 @@ project, making them available in one module.
 #import everything that is useful
 
 from bibench.bicluster import \
-    filter, Bicluster, BiclusterList, write_biclusters, read_biclusters
+    filter, Bicluster, BiclusterList, write_biclusters, read_biclusters, \
+    iter_biclusters, write_biclusters_binary, read_biclusters_binary, \
+    BiclusterFile
 
 from bibench.util import bootstrap
 
+from bibench.sweep import sweep, ResultStore
+
 from bibench.datasets.synthetic import \
     make_const_data, make_shift_data, make_scale_data, \
     make_shift_scale_data, make_fabia_data, make_isa_data, \
@@ -58,16 +62,18 @@ from bibench.datasets.rdata import \
 from bibench.algorithms.bbc import bbc
 from bibench.algorithms.biclust import \
     cheng_church, xmotifs, bimax, plaid, spectral
+from bibench.algorithms.chengchurch import cheng_church_numpy
 from bibench.algorithms.coalesce import coalesce
-from bibench.algorithms.cpb import cpb, cpb_filter
+from bibench.algorithms.cpb import cpb, cpb_filter, iter_cpb
 from bibench.algorithms.fabia import \
     fabia, fabiap, fabias, mfsc, nmfdiv, nmfeu
 from bibench.algorithms.isa import isa
 from bibench.algorithms.opsm import opsm
-from bibench.algorithms.qubic import qubic
+from bibench.algorithms.qubic import qubic, iter_qubic
 
 from bibench.validation.external import \
-    jaccard_list, prelic_list, f_measure_list, recovery_relevance_list
+    jaccard_list, prelic_list, f_measure_list, recovery_relevance_list, \
+    all_list_scores, ScoreContext
 
 from bibench.validation.enrichment import enrichment, goid_annot
 
@@ -30,6 +30,12 @@ common bicluster tasks, like IO.
 from __future__ import division
 
 import copy
+import itertools
+import mmap
+import os
+import struct
+import bibench.cache
+import bibench.profiling
 from bibench import util
 import numpy as np
 import inspect
@@ -72,15 +78,82 @@ def bicluster_algorithm(f, *args, **kwargs):
     Decorator to automatically set 'alg' and 'args' attribute of
     results of a biclustering algorithm.
 
+    If result caching is enabled (see bibench.cache), stored results
+    are returned without calling the algorithm. Every call is
+    measured, and its profile is stored in properties['profile'] (see
+    bibench.profiling); the profile of a cache hit has 'cached' set,
+    and times only the 'cache' phase.
+
+    If the algorithm returns a run that has not finished (see
+    bibench.algorithms.wrapper.run_async()), the BiclusterList is made
+    when it finishes.
+
     """
-    result = f(*args, **kwargs)
-    props = None
-    if hasattr(result, 'properties'):
-        props = result.properties
     args_dict = _get_args_dict_(f, args, kwargs)
     fname = '.'.join([f.__module__, f.__name__])
-    biclusters = BiclusterList(result, fname, args_dict, props)
-    return biclusters
+
+    cache = bibench.cache.get_cache()
+    stored = None
+    with bibench.profiling.run(fname) as profile:
+        if cache is not None:
+            with bibench.profiling.phase('cache'):
+                key = cache.key(fname, args_dict)
+                stored = cache.get(fname, key)
+        profile['cached'] = stored is not None
+        if stored is None:
+            result = f(*args, **kwargs)
+
+    if stored is not None:
+        return _from_stored_(stored, fname, args_dict, profile)
+
+    def finish(result, profile):
+        props = None
+        if hasattr(result, 'properties'):
+            props = result.properties
+        if props is None:
+            props = dict()
+        if isinstance(props, dict) and profile is not None:
+            props['profile'] = profile
+        biclusters = BiclusterList(result, fname, args_dict, props)
+
+        #partial results of a run that hit its limits are not kept, so
+        #that the next call runs again
+        timed_out = isinstance(props, dict) and props.get('timed_out')
+        if cache is not None and not timed_out:
+            cache.put(fname, key, _to_stored_(biclusters, args_dict))
+        return biclusters
+
+    if hasattr(result, 'add_callback'):
+        #a run that has not finished yet; see wrapper.run_async(). The
+        #profile would only cover starting it, so it is left out.
+        return result.add_callback(lambda result: finish(result, None))
+    return finish(result, profile)
+
+
+def _to_stored_(biclusters, args_dict):
+    """
+    Strip the dataset from each bicluster; it is part of the cache
+    key, so it is reattached on load instead of being stored.
+
+    """
+    stored = [(b.rows, b.cols, b.data is not None)
+              for b in biclusters]
+    return {'biclusters': stored, 'properties': biclusters.properties}
+
+
+def _from_stored_(stored, fname, args_dict, profile):
+    """
+    Rebuild a stored result, replacing the stored profile, which
+    describes the original run, with 'profile'.
+
+    """
+    data = args_dict.get('data')
+    biclusters = [Bicluster(rows, cols, data if has_data else None)
+                  for rows, cols, has_data in stored['biclusters']]
+    properties = stored['properties']
+    if isinstance(properties, dict):
+        properties = dict(properties, profile=profile)
+    return BiclusterList(biclusters, fname, args_dict, properties)
 
 
 class BiclusterList(list):
@@ -92,16 +165,281 @@ class BiclusterList(list):
     * properties: properties, such as likelihood, of this clustering,
       if any.
 
+    A BiclusterList can also be built column-wise, from membership
+    matrices, with from_matrices() or from_bitmasks(). It then keeps
+    two packed bitmask matrices, its members are Bicluster views onto
+    their rows, and the bulk operations (areas(), intersection_areas(),
+    membership_matrices()) work on those matrices directly. The
+    matrices are dropped when the list, or the rows or columns of one
+    of its members, are changed. Packed numpy bitmasks are used, not
+    scipy.sparse, so that these operations need only numpy; scipy is
+    the optional 'sparse' extra, needed only for sparse=True outputs.
+
     """
     def __init__(self, itr, algorithm=None, arguments=None, properties=None):
         list.__init__(self,itr)
         self.algorithm = algorithm
         self.arguments = arguments
         self.properties = properties
+        self._shape = None
+        self._bits = None
+        #members whose index lists have been handed out; see
+        #Bicluster._check_bits_()
+        self._exposed = []
+
+
+    @classmethod
+    def from_bitmasks(cls,
+                      rowbits,
+                      colbits,
+                      data=None,
+                      shape=None,
+                      algorithm=None,
+                      arguments=None,
+                      properties=None):
+        """
+        Make a BiclusterList from packed bitmask matrices.
+
+        Args:
+            * rowbits: k x nwords(nrows) numpy.ndarray of uint64; row i is
+                the row bitmask of bicluster i.
+            * colbits: k x nwords(ncols) numpy.ndarray of uint64.
+            * data: the dataset on which the biclusters are defined.
+            * shape: the (nrows, ncols) shape of the dataset, if 'data'
+                is not given.
+
+        """
+        assert len(rowbits) == len(colbits)
+        rowbits = np.asarray(rowbits, dtype=np.uint64)
+        colbits = np.asarray(colbits, dtype=np.uint64)
+        biclusters = cls((Bicluster.from_bitmasks(r, c, data)
+                          for r, c in zip(rowbits, colbits)),
+                         algorithm, arguments, properties)
+        if shape is None and data is not None:
+            shape = data.shape
+        biclusters._shape = shape
+        biclusters._bits = (rowbits, colbits)
+        for bicluster in biclusters:
+            bicluster._owner = biclusters
+        return biclusters
+
+
+    @classmethod
+    def from_matrices(cls,
+                      rowmatrix,
+                      colmatrix,
+                      data=None,
+                      algorithm=None,
+                      arguments=None,
+                      properties=None):
+        """
+        Make a BiclusterList from membership matrices, like those
+        returned by get_row_col_matrices().
+
+        Args:
+            * rowmatrix: nrows x k matrix; element [x, y] is nonzero if row
+                x is in bicluster y.
+            * colmatrix: ncols x k matrix; element [x, y] is nonzero if
+                column x is in bicluster y.
+            * data: the dataset on which the biclusters are defined.
+
+        """
+        assert rowmatrix.shape[1] == colmatrix.shape[1]
+        shape = (rowmatrix.shape[0], colmatrix.shape[0])
+        return cls.from_bitmasks(_pack_columns_(rowmatrix),
+                                 _pack_columns_(colmatrix),
+                                 data,
+                                 shape,
+                                 algorithm,
+                                 arguments,
+                                 properties)
+
+
+    def _get_shape_(self, shape):
+        if shape is None:
+            shape = self._shape
+        if shape is None and len(self) > 0:
+            shape = self[0]._datashape_()
+        if shape is None:
+            raise ValueError('the shape of the dataset is unknown')
+        return shape
+
+
+    def _stored_bitmasks_(self, nrows, ncols):
+        """
+        The matrices given to from_bitmasks(), if they are still
+        current and match a dataset of this shape; else None.
+
+        """
+        for bicluster in self._exposed:
+            bicluster._check_bits_()
+        if self._bits is None:
+            return None
+        rowbits, colbits = self._bits
+        if rowbits.shape[1] != util.nwords(nrows) or \
+                colbits.shape[1] != util.nwords(ncols):
+            return None
+        return rowbits, colbits
+
+
+    def bitmasks(self, shape=None):
+        """
+        Returns the tuple (rowbits, colbits) of packed bitmask
+        matrices; row i of each is the bitmask of bicluster i.
+
+        If this list was made by from_bitmasks() or from_matrices(),
+        and has not been changed since, its matrices are returned
+        without being copied.
+
+        Args:
+            * shape: the (nrows, ncols) shape of the dataset. Defaults to
+                the shape given at construction, or that of the first
+                bicluster's data member.
+
+        """
+        nrows, ncols = self._get_shape_(shape)
+        stored = self._stored_bitmasks_(nrows, ncols)
+        if stored is not None:
+            return stored
+        rowbits = np.empty((len(self), util.nwords(nrows)), dtype=np.uint64)
+        colbits = np.empty((len(self), util.nwords(ncols)), dtype=np.uint64)
+        for i, bicluster in enumerate(self):
+            rowbits[i], colbits[i] = bicluster.bitmasks((nrows, ncols))
+        return rowbits, colbits
+
+
+    def membership_matrices(self, shape=None):
+        """
+        Returns the row x number and col x number boolean matrices of
+        these biclusters. See get_row_col_matrices().
+
+        Args:
+            * shape: as in bitmasks().
+
+        """
+        nrows, ncols = self._get_shape_(shape)
+        rowbits, colbits = self.bitmasks((nrows, ncols))
+        return _unpack_rows_(rowbits)[:, :nrows].T, \
+            _unpack_rows_(colbits)[:, :ncols].T
+
+
+    def areas(self, shape=None):
+        """
+        Returns a numpy.ndarray with the area of each bicluster.
+
+        Args:
+            * shape: as in bitmasks().
+
+        """
+        rowbits, colbits = self.bitmasks(shape)
+        return util.popcount(rowbits) * util.popcount(colbits)
+
+
+    def intersection_counts(self, other, shape=None):
+        """
+        Returns the matrices of pairwise row and column intersection
+        sizes between the biclusters in this list and those in 'other'.
+
+        Args:
+            * other: a BiclusterList defined on the same dataset.
+            * shape: as in bitmasks().
+
+        Returns:
+            The tuple (rowcounts, colcounts) of len(self) x len(other)
+            numpy.ndarrays of ints. Element [i, j] of rowcounts is the
+            number of rows shared by self[i] and other[j].
+
+        """
+        shape = self._get_shape_(shape)
+        rowbits, colbits = self.bitmasks(shape)
+        other_rowbits, other_colbits = other.bitmasks(shape)
+        return _intersection_counts_(rowbits, other_rowbits), \
+            _intersection_counts_(colbits, other_colbits)
+
+
+    def intersection_areas(self, other, shape=None):
+        """
+        Returns the matrix of pairwise intersection areas between the
+        biclusters in this list and those in 'other'.
+
+        Args:
+            * other: a BiclusterList defined on the same dataset.
+            * shape: as in bitmasks().
+
+        Returns:
+            A len(self) x len(other) numpy.ndarray of ints. Element [i, j]
+            is self[i].intersection(other[j]).area().
+
+        """
+        rowcounts, colcounts = self.intersection_counts(other, shape)
+        return rowcounts * colcounts
+
+
+def _drops_bitmasks_(name):
+    """Wraps list method 'name' to drop the stored bitmask matrices."""
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        self._bits = None
+        return method(self, *args, **kwargs)
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
 
 
-class Bicluster:
-    """A class for representing biclusters."""
+for _name in ['__setitem__', '__delitem__', '__setslice__', '__delslice__',
+              '__iadd__', '__imul__', 'append', 'extend', 'insert', 'pop',
+              'remove', 'reverse', 'sort']:
+    setattr(BiclusterList, _name, _drops_bitmasks_(_name))
+del _name
+
+
+def _pack_columns_(matrix):
+    """Pack each column of a membership matrix into a row of bitmask words."""
+    nbits, k = matrix.shape
+    bools = np.zeros((k, util.nwords(nbits) * 64), dtype=np.bool_)
+    bools[:, :nbits] = matrix.T != 0
+    return np.packbits(bools, axis=1).view(np.uint64)
+
+
+def _unpack_rows_(bits):
+    """Inverse of _pack_columns_(), but not transposed or trimmed."""
+    return np.unpackbits(bits.view(np.uint8), axis=1).astype(np.bool_)
+
+
+def _intersection_counts_(bits, other_bits, blocksize=1024):
+    """
+    Returns the matrix of popcount(bits[i] & other_bits[j]).
+
+    Computed as a product of the unpacked matrices, in blocks of
+    'blocksize' rows to bound memory use. float64 is exact here for
+    counts up to 2**53, so for any number of rows or columns that fits
+    in memory.
+
+    """
+    counts = np.empty((len(bits), len(other_bits)), dtype=np.int64)
+    for j in range(0, len(other_bits), blocksize):
+        right = _unpack_rows_(other_bits[j:j + blocksize]).astype(np.float64).T
+        for i in range(0, len(bits), blocksize):
+            left = _unpack_rows_(bits[i:i + blocksize]).astype(np.float64)
+            counts[i:i + blocksize, j:j + blocksize] = np.dot(left, right)
+    return counts
+
+
+class Bicluster(object):
+    """
+    A class for representing biclusters.
+
+    The rows and columns may be stored as lists of indices, as packed
+    bitmasks (see util.pack_indices()), or both; each form is computed
+    from the other when it is first needed. Bitmasks packed from index
+    lists are checked against them before use, and packed again if
+    the lists were changed in place. Set operations work on
+    the bitmasks when both biclusters have them, or when both are
+    defined on the same dataset, and fall back to Python sets
+    otherwise.
+
+    """
 
 
     def __init__(self, rows, cols, data=None):
@@ -117,11 +455,155 @@ class Bicluster:
             A Bicluster instance.
 
         """
-        self.rows = rows
-        self.cols = cols
+        self._rows = rows
+        self._cols = cols
+        self._rowbits = None
+        self._colbits = None
+        self._rowkey = None
+        self._colkey = None
+        self._owner = None
         self.data = data
 
 
+    @classmethod
+    def from_bitmasks(cls, rowbits, colbits, data=None):
+        """
+        Make a bicluster from packed row and column bitmasks.
+
+        Args:
+            * rowbits: numpy.ndarray of uint64; see util.pack_indices().
+            * colbits: numpy.ndarray of uint64.
+            * data: An numpy.ndarray. Dataset on which this bicluster is defined.
+
+        """
+        bicluster = cls(None, None, data)
+        bicluster._rowbits = rowbits
+        bicluster._colbits = colbits
+        return bicluster
+
+
+    def _expose_(self):
+        """Note that an index list of a view is now in the caller's hands."""
+        if self._owner is not None:
+            self._owner._exposed.append(self)
+
+
+    def _get_rows_(self):
+        if self._rows is None:
+            self._rows = util.unpack_bits(self._rowbits)
+            self._rowkey = _index_key_(self._rows)
+            self._expose_()
+        return self._rows
+
+
+    def _drop_owner_bits_(self):
+        """Tell the BiclusterList whose matrices this is a view of."""
+        if self._owner is not None:
+            self._owner._bits = None
+            self._owner = None
+
+
+    def _set_rows_(self, rows):
+        self._rows = rows
+        self._rowbits = None
+        self._drop_owner_bits_()
+
+
+    def _get_cols_(self):
+        if self._cols is None:
+            self._cols = util.unpack_bits(self._colbits)
+            self._colkey = _index_key_(self._cols)
+            self._expose_()
+        return self._cols
+
+
+    def _set_cols_(self, cols):
+        self._cols = cols
+        self._colbits = None
+        self._drop_owner_bits_()
+
+
+    rows = property(_get_rows_, _set_rows_,
+                    doc="The row indices that make up this bicluster.")
+
+    cols = property(_get_cols_, _set_cols_,
+                    doc="The column indices that make up this bicluster.")
+
+
+    def _check_bits_(self):
+        """
+        Drop bitmasks that no longer match index lists changed in
+        place, eg with rows.append().
+
+        """
+        if self._rowbits is not None and self._rows is not None and \
+                _index_key_(self._rows) != self._rowkey:
+            self._rowbits = None
+            self._drop_owner_bits_()
+        if self._colbits is not None and self._cols is not None and \
+                _index_key_(self._cols) != self._colkey:
+            self._colbits = None
+            self._drop_owner_bits_()
+
+
+    def _datashape_(self):
+        if self.data is not None and np.ndim(self.data) == 2:
+            return self.data.shape
+        return None
+
+
+    def bitmasks(self, shape=None):
+        """
+        Returns the tuple (rowbits, colbits) of packed bitmasks,
+        packing them from the row and column indices if necessary.
+
+        Args:
+            * shape: the (nrows, ncols) shape of the dataset. Defaults to
+                the shape of this Bicluster's data member.
+
+        """
+        self._check_bits_()
+        if shape is None:
+            shape = self._datashape_()
+        if shape is None:
+            if self._rowbits is None or self._colbits is None:
+                raise ValueError('cannot pack a bicluster'
+                                 ' without the shape of its dataset')
+            return self._rowbits, self._colbits
+
+        nrows, ncols = shape
+        if self._rowbits is None or \
+                len(self._rowbits) != util.nwords(nrows):
+            self._rowbits = util.pack_indices(self.rows, nrows)
+            self._rowkey = _index_key_(self.rows)
+        if self._colbits is None or \
+                len(self._colbits) != util.nwords(ncols):
+            self._colbits = util.pack_indices(self.cols, ncols)
+            self._colkey = _index_key_(self.cols)
+        return self._rowbits, self._colbits
+
+
+    def _paired_bitmasks_(self, other):
+        """
+        Returns the bitmasks of self and other, as the tuple (rowbits,
+        colbits, other_rowbits, other_colbits), if they can be
+        compared word by word; else None.
+
+        """
+        self._check_bits_()
+        other._check_bits_()
+        if self._rowbits is not None and self._colbits is not None and \
+                other._rowbits is not None and other._colbits is not None:
+            if len(self._rowbits) == len(other._rowbits) and \
+                    len(self._colbits) == len(other._colbits):
+                return (self._rowbits, self._colbits,
+                        other._rowbits, other._colbits)
+        shape = self._datashape_()
+        if shape is not None and id(self.data) == id(other.data):
+            return self.bitmasks(shape) + other.bitmasks(shape)
+        return None
+
+
     def __eq__(self, other):
         """
         Test two biclusters for equality.
@@ -135,19 +617,37 @@ class Bicluster:
             * other: A bicluster to compare.
 
         """
+        if id(self.data) != id(other.data):
+            return False
+
+        bits = self._paired_bitmasks_(other)
+        if bits is not None:
+            rows, cols, other_rows, other_cols = bits
+            return np.array_equal(rows, other_rows) and \
+                np.array_equal(cols, other_cols)
 
         return set(self.rows) == set(other.rows) and \
-               set(self.cols) == set(other.cols) and \
-               id(self.data) == id(other.data)
+               set(self.cols) == set(other.cols)
+
+
+    def __ne__(self, other):
+        return not self == other
 
 
     def copy(self):
         """Returns a deep copy of this instance."""
-        other = Bicluster(copy.copy(self.rows), copy.copy(self.cols), self.data)
+        self._check_bits_()
+        other = Bicluster(copy.copy(self._rows), copy.copy(self._cols), self.data)
+        if self._rowbits is not None:
+            other._rowbits = self._rowbits.copy()
+            other._rowkey = self._rowkey
+        if self._colbits is not None:
+            other._colbits = self._colbits.copy()
+            other._colkey = self._colkey
         return other
 
 
-    def array(self, rows=None, cols=None):
+    def array(self, rows=None, cols=None, copy=True):
         """
         Get a numpy array bicluster from data, using the indices in bic_indices.
 
@@ -156,6 +656,9 @@ class Bicluster:
         Args:
             * rows: the row indices to use; defaults to this bicluster's rows.
             * cols: the column indices; defaults to this bicuster's columns.
+            * copy: if False, and the rows and columns are both
+                contiguous ranges, returns a view of the data instead of
+                a copy.
 
         """
         if not self.data is None:
@@ -163,28 +666,48 @@ class Bicluster:
                 rows = self.rows
             if cols is None:
                 cols = self.cols
-            array = self.data.take(rows, axis=0).take(list(cols), axis=1)
-            return array
+            rows = _as_index_(rows)
+            cols = _as_index_(cols)
+            if isinstance(rows, slice) and isinstance(cols, slice):
+                array = self.data[rows, cols]
+                return array.copy() if copy else array
+            if isinstance(rows, slice) or isinstance(cols, slice):
+                return self.data[rows, cols]
+            return self.data[np.ix_(rows, cols)]
 
 
-    def filter_rows(self):
+    def filter_rows(self, copy=True):
         """
         Returns the dataset with only the rows from this bicluster.
 
         Note: requires that this Bicluster's data member is not None.
 
+        Args:
+            * copy: as in array().
+
         """
-        return self.array(cols=np.arange(self.data.shape[1]))
+        rows = _as_index_(self.rows)
+        array = self.data[rows]
+        if copy and isinstance(rows, slice):
+            array = array.copy()
+        return array
 
 
-    def filter_cols(self):
+    def filter_cols(self, copy=True):
         """
         Returns the dataset with only the columns from this bicluster.
 
         Note: requires that this Bicluster's data member is not None.
 
+        Args:
+            * copy: as in array().
+
         """
-        return self.array(rows=np.arange(self.data.shape[0]))
+        cols = _as_index_(self.cols)
+        array = self.data[:, cols]
+        if copy and isinstance(cols, slice):
+            array = array.copy()
+        return array
 
 
     def intersection(self, other):
@@ -203,10 +726,17 @@ class Bicluster:
             None.
 
         """
+        data = _get_data_(self.data, other.data)
+        bits = self._paired_bitmasks_(other)
+        if bits is not None:
+            rows, cols, other_rows, other_cols = bits
+            return Bicluster.from_bitmasks(rows & other_rows,
+                                           cols & other_cols,
+                                           data)
 
         rows = set(self.rows).intersection(set(other.rows))
         cols = set(self.cols).intersection(set(other.cols))
-        return Bicluster(rows, cols, _get_data_(self.data, other.data))
+        return Bicluster(rows, cols, data)
 
 
     def union(self, other):
@@ -225,10 +755,17 @@ class Bicluster:
             None.
 
         """
+        data = _get_data_(self.data, other.data)
+        bits = self._paired_bitmasks_(other)
+        if bits is not None:
+            rows, cols, other_rows, other_cols = bits
+            return Bicluster.from_bitmasks(rows | other_rows,
+                                           cols | other_cols,
+                                           data)
 
         rows = set(self.rows).union(set(other.rows))
         cols = set(self.cols).union(set(other.cols))
-        return Bicluster(rows, cols, _get_data_(self.data, other.data))
+        return Bicluster(rows, cols, data)
 
 
     def symmetric_difference(self, other):
@@ -248,10 +785,17 @@ class Bicluster:
             None.
 
         """
+        data = _get_data_(self.data, other.data)
+        bits = self._paired_bitmasks_(other)
+        if bits is not None:
+            rows, cols, other_rows, other_cols = bits
+            return Bicluster.from_bitmasks(rows ^ other_rows,
+                                           cols ^ other_cols,
+                                           data)
 
         rows = set(self.rows).symmetric_difference(set(other.rows))
         cols = set(self.cols).symmetric_difference(set(other.cols))
-        return Bicluster(rows, cols, _get_data_(self.data, other.data))
+        return Bicluster(rows, cols, data)
 
 
     def difference(self, other):
@@ -270,6 +814,11 @@ class Bicluster:
 
 
         """
+        bits = self._paired_bitmasks_(other)
+        if bits is not None:
+            rows, cols, other_rows, other_cols = bits
+            return Bicluster.from_bitmasks(rows & ~other_rows,
+                                           cols & ~other_cols)
 
         rows = set(self.rows).difference(set(other.rows))
         cols = set(self.cols).difference(set(other.cols))
@@ -283,6 +832,11 @@ class Bicluster:
         other's; else False.
 
         """
+        bits = self._paired_bitmasks_(other)
+        if bits is not None:
+            rows, cols, other_rows, other_cols = bits
+            return not ((rows & ~other_rows).any() or
+                        (cols & ~other_cols).any())
 
         return (set(self.rows).issubset(set(other.rows)) and
                 set(self.cols).issubset(set(other.cols)))
@@ -290,16 +844,31 @@ class Bicluster:
 
     def shape(self):
         """Returns the number of rows and columns in this bicluster."""
-        return len(self.rows), len(self.cols)
+        if self._rows is None:
+            nrows = util.popcount(self._rowbits)
+        else:
+            nrows = len(self._rows)
+        if self._cols is None:
+            ncols = util.popcount(self._colbits)
+        else:
+            ncols = len(self._cols)
+        return nrows, ncols
 
 
     def area(self):
         """Returns the number of elements in this bicluster."""
-        return len(self.rows) * len(self.cols)
+        nrows, ncols = self.shape()
+        return nrows * ncols
 
 
     def overlap(self, other):
         """Returns the ratio of the overlap area to self's total size."""
+        bits = self._paired_bitmasks_(other)
+        if bits is not None:
+            rows, cols, other_rows, other_cols = bits
+            intersection_area = util.popcount(rows & other_rows) * \
+                util.popcount(cols & other_cols)
+            return intersection_area / self.area()
         return self.intersection(other).area() / self.area()
 
 
@@ -307,6 +876,62 @@ class Bicluster:
         return "Bicluster({0}, {1})".format(repr(self.rows), repr(self.cols))
 
 
+def _index_key_(indices):
+    """A checksum of an index list, to notice changes made in place."""
+    if isinstance(indices, np.ndarray):
+        return len(indices), hash(indices.tobytes())
+    return len(indices), hash(tuple(indices))
+
+
+def _as_index_(indices):
+    """
+    Returns a slice if the indices are a contiguous increasing range,
+    else an array of indices.
+
+    """
+    indices = np.asarray(list(indices), dtype=np.intp)
+    if len(indices) > 0 and indices[-1] - indices[0] == len(indices) - 1 \
+            and np.all(np.diff(indices) == 1):
+        return slice(indices[0], indices[-1] + 1)
+    return indices
+
+
+def arrays(biclusters, data=None):
+    """
+    Iterate over the submatrices of a list of biclusters, gathering
+    each into the same scratch buffer.
+
+    Each array yielded is a view into that buffer, and is overwritten
+    at the next iteration; copy it to keep it.
+
+    Args:
+        * biclusters: a list of biclusters defined on the same dataset.
+        * data: the dataset; defaults to the first bicluster's data member.
+
+    """
+    if len(biclusters) == 0:
+        return
+    if data is None:
+        data = biclusters[0].data
+    assert data is not None
+
+    flat = np.ascontiguousarray(data).reshape(-1)
+    ncols = data.shape[1]
+    size = max([b.area() for b in biclusters])
+    buf = np.empty(size, dtype=data.dtype)
+    index_buf = np.empty(size, dtype=np.intp)
+
+    for b in biclusters:
+        rows = np.asarray(list(b.rows), dtype=np.intp)
+        cols = np.asarray(list(b.cols), dtype=np.intp)
+        shape = (len(rows), len(cols))
+        index = index_buf[:rows.size * cols.size].reshape(shape)
+        np.add((rows * ncols)[:, np.newaxis], cols, out=index)
+        out = buf[:index.size].reshape(shape)
+        np.take(flat, index, out=out)
+        yield out
+
+
 def filter(biclusters,
            minrows=2,
            mincols=2,
@@ -348,21 +973,57 @@ def filter(biclusters,
                   and (len(b.rows) < nrows
                        or len(b.cols) < ncols)]
 
-    biclusters = sorted(biclusters,
-                        cmp = lambda x, y: cmp(x.area(), y.area()),
-                        reverse=True)
+    biclusters = sorted(biclusters, key=lambda b: b.area(), reverse=True)
 
-    def keep(b, accepted):
-        for a in accepted:
-            if b == a or b.overlap(a) > max_overlap or (remove_subsets
-                                                        and b.issubset(a)):
-                return False
-        return True
+    #A bicluster is rejected if it equals, overlaps too much with, or
+    #is a subset of an accepted one. Only accepted biclusters sharing
+    #a row with it can do any of these, so they are found through an
+    #inverted index from rows, and then all tested at once on their
+    #bitmasks.
+    shape = (nrows, ncols)
+    nbiclusters = len(biclusters)
+    accepted_rowbits = np.empty((nbiclusters, util.nwords(nrows)),
+                                dtype=np.uint64)
+    accepted_colbits = np.empty((nbiclusters, util.nwords(ncols)),
+                                dtype=np.uint64)
+    accepted_nrows = np.empty(nbiclusters, dtype=np.int64)
+    accepted_ncols = np.empty(nbiclusters, dtype=np.int64)
+    accepted_data = np.empty(nbiclusters, dtype=np.intp)
+    row_index = dict()
 
     accepted = []
     for b in biclusters:
-        if keep(b, accepted):
-            accepted.append(b)
+        rowbits, colbits = b.bitmasks(shape)
+        b_nrows = util.popcount(rowbits)
+        b_ncols = util.popcount(colbits)
+        b_rows = set(b.rows)
+
+        candidates = set()
+        for r in b_rows:
+            candidates.update(row_index.get(r, ()))
+
+        if candidates:
+            c = np.fromiter(candidates, dtype=np.intp, count=len(candidates))
+            shared_rows = util.popcount(accepted_rowbits[c] & rowbits)
+            shared_cols = util.popcount(accepted_colbits[c] & colbits)
+            subset = (shared_rows == b_nrows) & (shared_cols == b_ncols)
+            equal = subset & (accepted_nrows[c] == b_nrows) & \
+                (accepted_ncols[c] == b_ncols) & \
+                (accepted_data[c] == id(b.data))
+            overlap = shared_rows * shared_cols / b.area()
+            if np.any(equal | (overlap > max_overlap) |
+                      (remove_subsets & subset)):
+                continue
+
+        n = len(accepted)
+        accepted_rowbits[n] = rowbits
+        accepted_colbits[n] = colbits
+        accepted_nrows[n] = b_nrows
+        accepted_ncols[n] = b_ncols
+        accepted_data[n] = id(b.data)
+        for r in b_rows:
+            row_index.setdefault(r, []).append(n)
+        accepted.append(b)
     return accepted
 
 
@@ -400,7 +1061,19 @@ def read_biclusters(filename):
         * filename: a string.
 
     """
-    biclusters = []
+    return list(iter_biclusters(filename))
+
+
+def iter_biclusters(filename):
+    """
+    Like read_biclusters(), but yields the biclusters one at a time
+    as the file is read, so that memory use does not grow with the
+    size of the file.
+
+    Args:
+        * filename: a string.
+
+    """
     with open(filename) as infile:
         for str_rows, str_cols, newline in util.grouper(infile, 3):
             if str_rows is None or str_cols is None or newline is None:
@@ -410,11 +1083,229 @@ def read_biclusters(filename):
                 continue
             rows = map(int, str_rows)
             cols = map(int, str_cols)
-            biclusters.append(Bicluster(rows, cols))
-    return biclusters
+            yield Bicluster(rows, cols)
+
 
+def iter_bicluster_chunks(filename, shape, chunksize=1000, sparse=False):
+    """
+    Reads a file written by write_biclusters() in batches of
+    'chunksize' biclusters, yielding each batch as membership
+    matrices. See get_row_col_matrices().
+
+    Args:
+        * filename: a string.
+        * shape: the (nrows, ncols) shape of the dataset.
+        * chunksize: the maximum number of biclusters in each batch.
+        * sparse: if True, yield scipy.sparse CSC matrices.
+
+    Yields:
+        (rowmatrix, colmatrix) tuples, of dimensions nrows by k and
+        ncols by k, for k <= chunksize.
+
+    """
+    nrows, ncols = shape
+    biclusters = iter_biclusters(filename)
+    while True:
+        chunk = list(itertools.islice(biclusters, chunksize))
+        if not chunk:
+            return
+        yield _membership_matrix_([b.rows for b in chunk], nrows, sparse), \
+            _membership_matrix_([b.cols for b in chunk], ncols, sparse)
+
+
+#Binary bicluster files hold, after an 8 byte header, one record per
+#bicluster: its number of rows and columns, then its row and column
+#indices, all as little-endian uint32. A trailer follows: the uint64
+#offset of each record, the compressed metadata (see util.zdumps()),
+#and a footer giving the number of records, where the offsets start,
+#and the length of the metadata. Appending rewrites only the trailer.
+
+_BINARY_MAGIC_ = 'BIBENCH\x01'
+_FOOTER_ = struct.Struct('<QQQ')
+_INDEX_DTYPE_ = np.dtype('<u4')
+_OFFSET_DTYPE_ = np.dtype('<u8')
+
+
+def _binary_metadata_(biclusters):
+    """
+    The metadata of a BiclusterList to store in a binary file. Array
+    arguments, like the dataset, are left out.
 
-def get_row_col_matrices(biclusters):
+    """
+    if not isinstance(biclusters, BiclusterList):
+        return None
+    arguments = biclusters.arguments
+    if arguments is not None:
+        arguments = dict((k, v) for k, v in arguments.items()
+                         if not isinstance(v, np.ndarray))
+    return dict(algorithm=biclusters.algorithm,
+                arguments=arguments,
+                properties=biclusters.properties)
+
+
+def _read_trailer_(f):
+    """Returns (offsets, offsets_position, metadata) of an open binary file."""
+    f.seek(0)
+    if f.read(len(_BINARY_MAGIC_)) != _BINARY_MAGIC_:
+        raise IOError('not a binary bicluster file')
+    f.seek(-_FOOTER_.size, os.SEEK_END)
+    count, offsets_position, metadata_length = _FOOTER_.unpack(
+        f.read(_FOOTER_.size))
+    f.seek(offsets_position)
+    offsets = np.frombuffer(f.read(count * _OFFSET_DTYPE_.itemsize),
+                            dtype=_OFFSET_DTYPE_)
+    metadata = None
+    if metadata_length > 0:
+        metadata = util.zloads(f.read(metadata_length))
+    return offsets, offsets_position, metadata
+
+
+def write_biclusters_binary(biclusters, filename, append=False):
+    """
+    Write biclusters to a compact binary file, which can be read back
+    with read_biclusters_binary() or BiclusterFile.
+
+    If 'biclusters' is a BiclusterList, its algorithm, arguments and
+    properties are stored too, except for arguments that are arrays.
+
+    Args:
+        * biclusters: an iterable of biclusters.
+        * filename: a string containing the output file name.
+        * append: if True, and the file exists, add the biclusters
+            after those already in it. The stored metadata is replaced
+            only if 'biclusters' has some.
+
+    """
+    metadata = _binary_metadata_(biclusters)
+    if append and os.path.exists(filename):
+        f = open(filename, 'r+b')
+        offsets, position, old_metadata = _read_trailer_(f)
+        offsets = list(offsets)
+        if metadata is None:
+            metadata = old_metadata
+        f.seek(position)
+        f.truncate()
+    else:
+        f = open(filename, 'wb')
+        f.write(_BINARY_MAGIC_)
+        offsets = []
+        position = f.tell()
+
+    with f:
+        for bicluster in biclusters:
+            rows = np.asarray(list(bicluster.rows), dtype=_INDEX_DTYPE_)
+            cols = np.asarray(list(bicluster.cols), dtype=_INDEX_DTYPE_)
+            offsets.append(position)
+            record = np.concatenate([np.array([len(rows), len(cols)],
+                                              dtype=_INDEX_DTYPE_),
+                                     rows,
+                                     cols]).tobytes()
+            f.write(record)
+            position += len(record)
+
+        f.write(np.asarray(offsets, dtype=_OFFSET_DTYPE_).tobytes())
+        metadata = '' if metadata is None else util.zdumps(metadata)
+        f.write(metadata)
+        f.write(_FOOTER_.pack(len(offsets), position, len(metadata)))
+
+
+class BiclusterFile(object):
+    """
+    Random access to the biclusters in a file written by
+    write_biclusters_binary(). The file is memory-mapped, and each
+    bicluster is only decoded when it is indexed.
+
+    Attributes algorithm, arguments, and properties hold the stored
+    metadata, or None.
+
+    Usage::
+
+        with BiclusterFile(filename) as biclusters:
+            last = biclusters[-1]
+
+    """
+
+    def __init__(self, filename, data=None):
+        """
+        Args:
+            * filename: a string.
+            * data: if given, set as the data member of each bicluster.
+
+        """
+        self.data = data
+        self._file = open(filename, 'rb')
+        self._offsets, _, metadata = _read_trailer_(self._file)
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if metadata is None:
+            metadata = dict(algorithm=None, arguments=None, properties=None)
+        self.algorithm = metadata['algorithm']
+        self.arguments = metadata['arguments']
+        self.properties = metadata['properties']
+
+
+    def __len__(self):
+        return len(self._offsets)
+
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('bicluster index out of range')
+        offset = int(self._offsets[i])
+        nrows, ncols = np.frombuffer(self._map,
+                                     dtype=_INDEX_DTYPE_,
+                                     count=2,
+                                     offset=offset)
+        indices = np.frombuffer(self._map,
+                                dtype=_INDEX_DTYPE_,
+                                count=int(nrows + ncols),
+                                offset=offset + 2 * _INDEX_DTYPE_.itemsize)
+        indices = indices.astype(np.intp)
+        rows = indices[:nrows].tolist()
+        cols = indices[nrows:].tolist()
+        return Bicluster(rows, cols, self.data)
+
+
+    def __iter__(self):
+        for i in xrange(len(self)):
+            yield self[i]
+
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def read_biclusters_binary(filename, data=None):
+    """
+    Reads all the biclusters from a file written by
+    write_biclusters_binary().
+
+    Args:
+        * filename: a string.
+        * data: if given, set as the data member of each bicluster.
+
+    Returns:
+        A BiclusterList, with the stored metadata.
+
+    """
+    with BiclusterFile(filename, data) as biclusters:
+        return BiclusterList(biclusters,
+                             biclusters.algorithm,
+                             biclusters.arguments,
+                             biclusters.properties)
+
+
+def get_row_col_matrices(biclusters, sparse=False):
     """
     Returns the row x number and col x number matrices for the given
     set of biclusters.
@@ -423,6 +1314,8 @@ def get_row_col_matrices(biclusters):
 
     Args:
         * biclusters: a list of Bicluster instances.
+        * sparse: if True, return scipy.sparse CSC matrices instead of
+            dense numpy arrays. Requires scipy.
 
     Returns:
         The tuple (rowmatrix, colmatrix), where rowmatrix has
@@ -439,18 +1332,72 @@ def get_row_col_matrices(biclusters):
     assert(all([id(b.data) == id(data) for b in biclusters]))
 
     nrows, ncols = data.shape
-    nbiclusters = len(biclusters)
+    return _membership_matrix_([b.rows for b in biclusters], nrows, sparse), \
+        _membership_matrix_([b.cols for b in biclusters], ncols, sparse)
 
-    assert max([max(b.rows) for b in biclusters]) < nrows
-    assert max([max(b.cols) for b in biclusters]) < ncols
 
-    RowXNumber = np.zeros((nrows, nbiclusters), dtype=np.bool8)
-    ColXNumber = np.zeros((ncols, nbiclusters), dtype=np.bool8)
+def biclusters_from_matrices(rowmatrix, colmatrix, data=None, packed=False):
+    """
+    Decodes membership matrices, like those returned by
+    get_row_col_matrices() or by R's biclust, into biclusters.
+
+    Args:
+        * rowmatrix: nrows x k matrix; element [x, y] is nonzero if row
+            x is in bicluster y.
+        * colmatrix: ncols x k matrix; element [x, y] is nonzero if
+            column x is in bicluster y.
+        * data: the dataset on which the biclusters are defined.
+        * packed: if True, return a BiclusterList of views onto packed
+            bitmasks, as made by BiclusterList.from_matrices(), instead
+            of a list of Biclusters with index lists.
+
+    """
+    assert rowmatrix.shape[1] == colmatrix.shape[1]
+    if packed:
+        return BiclusterList.from_matrices(rowmatrix, colmatrix, data)
+    return [Bicluster(rows, cols, data)
+            for rows, cols in zip(_nonzero_columns_(rowmatrix),
+                                  _nonzero_columns_(colmatrix))]
+
+
+def _nonzero_columns_(matrix):
+    """
+    For each column of 'matrix', the list of the indices of its
+    nonzero elements. Uses one np.nonzero() call for the whole matrix.
+
+    """
+    k = matrix.shape[1]
+    #nonzero() on the transpose returns the indices ordered by column
+    numbers, indices = np.nonzero(matrix.T)
+    bounds = np.searchsorted(numbers, np.arange(k + 1))
+    indices = indices.tolist()
+    return [indices[bounds[i]:bounds[i + 1]] for i in range(k)]
 
-    for bindex, bicluster in enumerate(biclusters):
-        for r in bicluster.rows:
-            RowXNumber[r, bindex] = True
-        for c in bicluster.cols:
-            ColXNumber[c, bindex] = True
 
-    return RowXNumber, ColXNumber
+def _membership_matrix_(index_lists, size, sparse=False):
+    """
+    Returns the size x len(index_lists) boolean matrix in which
+    element [x, y] is True if x is in index_lists[y].
+
+    All elements are set in one fancy-indexing step.
+
+    """
+    lengths = [len(indices) for indices in index_lists]
+    indices = np.fromiter(itertools.chain.from_iterable(index_lists),
+                          dtype=np.intp,
+                          count=sum(lengths))
+    numbers = np.repeat(np.arange(len(index_lists)), lengths)
+
+    if len(indices) > 0:
+        assert indices.max() < size
+
+    shape = (size, len(index_lists))
+    if sparse:
+        import scipy.sparse
+        values = np.ones(len(indices), dtype=np.bool8)
+        return scipy.sparse.csc_matrix((values, (indices, numbers)),
+                                       shape=shape)
+
+    matrix = np.zeros(shape, dtype=np.bool8)
+    matrix[indices, numbers] = True
+    return matrix
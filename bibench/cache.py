@@ -0,0 +1,232 @@
+####################################################################
+###     ____  _ ____                  _                          ###
+###    | __ )(_) __ )  ___ _ __   ___| |__                       ###
+###    |  _ \| |  _ \ / _ \ '_ \ / __| '_ \                      ###
+###    | |_) | | |_) |  __/ | | | (__| | | |                     ###
+###    |____/|_|____/ \___|_| |_|\___|_| |_|                     ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### This file is part of the BiBench package for biclustering    ###
+### analysis.                                                    ###
+###                                                              ###
+### Copyright (c) 2011 by:                                       ###
+###   * Kemal Eren,                                              ###
+###   * Mehmet Deveci,                                           ###
+###   * Umit V. Catalyurek                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### For license info, please see the README and LICENSE files    ###
+### in the main directory.                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+
+"""
+An opt-in, on-disk cache of biclustering results.
+
+When enabled, every function decorated with bicluster_algorithm()
+looks up its result here before running, keyed by a digest of the
+input arrays and the remaining arguments. This makes re-running a
+sweep after a crash cheap: finished runs return immediately, without
+calling R or the external binary again.
+
+The cache is disabled by default. To use it::
+
+    import bibench.cache
+    bibench.cache.enable()
+
+Note that results of randomized algorithms are cached too, so a
+cached run always returns the same biclusters for the same
+arguments.
+
+"""
+
+import os
+import cPickle
+import hashlib
+import shutil
+import tempfile
+
+import numpy as np
+
+import bibench.util as util
+
+DEFAULT_MAXSIZE = 1 << 30
+
+_SUFFIX_ = '.pkl.z'
+
+_cache_ = None
+
+
+def enable(directory=None, maxsize=DEFAULT_MAXSIZE):
+    """
+    Turn on result caching for all biclustering algorithms.
+
+    Args:
+        * directory: where to store results; defaults to the 'cache'
+            subdirectory of the BiBench hidden directory.
+        * maxsize: the maximum total size, in bytes, of stored results.
+
+    Returns:
+        The ResultCache in use.
+
+    """
+    global _cache_
+    _cache_ = ResultCache(directory, maxsize)
+    return _cache_
+
+
+def disable():
+    """Turn off result caching. Stored results are kept on disk."""
+    global _cache_
+    _cache_ = None
+
+
+def get_cache():
+    """The ResultCache in use, or None if caching is disabled."""
+    return _cache_
+
+
+def _normalize_(value):
+    if isinstance(value, np.ndarray):
+        return ('ndarray', util.array_digest(value))
+    return repr(value)
+
+
+class ResultCache(object):
+    """
+    Stores pickled results in one subdirectory per algorithm, one
+    file per key. When the total size exceeds 'maxsize', the least
+    recently used results are removed.
+
+    """
+    def __init__(self, directory=None, maxsize=DEFAULT_MAXSIZE):
+        if directory is None:
+            directory = util.get_hidden_dir('cache')
+        elif not os.path.exists(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.maxsize = maxsize
+
+
+    def key(self, algorithm, arguments):
+        """
+        Compute the key for a call to 'algorithm' with 'arguments', a
+        dict of argument names to values. Arrays are identified by
+        their contents; everything else by its repr().
+
+        """
+        items = sorted((name, _normalize_(value))
+                       for name, value in arguments.items())
+        return hashlib.sha1(repr((algorithm, items))).hexdigest()
+
+
+    def _path_(self, algorithm, key):
+        return os.path.join(self.directory, algorithm, key + _SUFFIX_)
+
+
+    def get(self, algorithm, key):
+        """
+        Return the result stored under 'key', or None if there is
+        none.
+
+        """
+        path = self._path_(algorithm, key)
+        try:
+            with open(path, 'rb') as f:
+                result = util.zloads(f.read())
+        except (IOError, OSError):
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return result
+
+
+    def put(self, algorithm, key, result):
+        """
+        Store 'result' under 'key', then evict old results if needed.
+        Results that cannot be pickled are not stored.
+
+        """
+        try:
+            dumped = util.zdumps(result)
+        except (cPickle.PicklingError, TypeError):
+            return
+        destdir = os.path.join(self.directory, algorithm)
+        if not os.path.exists(destdir):
+            os.makedirs(destdir)
+        fd, tmpname = tempfile.mkstemp(dir=destdir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(dumped)
+            os.rename(tmpname, self._path_(algorithm, key))
+        except:
+            os.remove(tmpname)
+            raise
+        self.evict()
+
+
+    def _entries_(self):
+        entries = []
+        for algorithm in os.listdir(self.directory):
+            algdir = os.path.join(self.directory, algorithm)
+            if not os.path.isdir(algdir):
+                continue
+            for name in os.listdir(algdir):
+                if not name.endswith(_SUFFIX_):
+                    continue
+                path = os.path.join(algdir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+
+    def size(self):
+        """The total size, in bytes, of all stored results."""
+        return sum(size for _, size, _ in self._entries_())
+
+
+    def evict(self, maxsize=None):
+        """
+        Remove least recently used results until the total size is
+        at most 'maxsize', which defaults to self.maxsize.
+
+        """
+        if maxsize is None:
+            maxsize = self.maxsize
+        entries = sorted(self._entries_())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= maxsize:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+    def invalidate(self, algorithm=None):
+        """
+        Remove all stored results for 'algorithm', either the
+        algorithm function itself or its full name (eg
+        'bibench.algorithms.cpb.cpb'), or for all algorithms if it is
+        None.
+
+        """
+        if callable(algorithm):
+            algorithm = '.'.join([algorithm.__module__, algorithm.__name__])
+        if algorithm is None:
+            targets = [os.path.join(self.directory, name)
+                       for name in os.listdir(self.directory)]
+        else:
+            targets = [os.path.join(self.directory, algorithm)]
+        for target in targets:
+            if os.path.isdir(target):
+                shutil.rmtree(target)
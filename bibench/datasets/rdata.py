@@ -29,13 +29,7 @@ Utilities for finding and importing data from R and Bioconductor.
 
 import numpy
 import zlib
-import rpy2.interactive as r
-import rpy2.robjects as robjects
-import rpy2.robjects.numpy2ri
-import pkg_resources
-v = pkg_resources.get_distribution('rpy2').version
-if v[0:3] >= '2.2':
-    rpy2.robjects.numpy2ri.activate()
+from bibench import rutil
 from bibench.datasets.io import ExpressionArray
 import os
 from bibench.util import get_hidden_dir, zdumps, zloads
@@ -57,12 +51,14 @@ def get_r_data(dataset, library=None):
     Returns: An ExpressionArray.
 
     """
-    r.importr(library)
-    r.packages.utils.data(dataset)
+    robjects = rutil.robjects()
+    base = rutil.importr('base')
+    rutil.library(library)
+    rutil.importr('utils').data(dataset)
     rdata = robjects.r[dataset]
-    genes = list(r.packages.base.rownames(rdata))
-    samples = list(r.packages.base.colnames(rdata))
-    ndata = numpy.array(r.packages.base.as_matrix(rdata))
+    genes = list(base.rownames(rdata))
+    samples = list(base.colnames(rdata))
+    ndata = numpy.array(base.as_matrix(rdata))
     return ExpressionArray(ndata, genes, samples)
 
 
@@ -81,9 +77,10 @@ def get_bioc_data(dataset, library=None):
     """
     if library is None:
         library = dataset
-    r.importr(library)
-    r.importr('Biobase')
-    r.packages.utils.data(dataset)
+    robjects = rutil.robjects()
+    rutil.library(library)
+    rutil.library('Biobase')
+    rutil.importr('utils').data(dataset)
     eset = robjects.r[dataset]
     ndata = numpy.array(robjects.r['exprs'](eset))
     result = ExpressionArray(ndata,
@@ -127,7 +124,8 @@ def get_gds_data(gdsname, destdir=None, pkl=True):
             except Exception as e:
                 print '{0}'.format(e.message)
 
-    r.importr('GEOquery')
+    robjects = rutil.robjects()
+    rutil.library('GEOquery')
     gds = robjects.r['getGEO'](gdsname, destdir=destdir)
 
     gplname = robjects.r['Meta'](gds).rx2('platform')[0]
@@ -170,7 +168,8 @@ def geo_query(sqlquery):
     Downloads the database if it is not already present in $HOME/.bibench.
 
     """
-    r.importr('GEOmetadb')
+    robjects = rutil.robjects()
+    rutil.library('GEOmetadb')
     destdir = get_hidden_dir()
     sqlname = "GEOmetadb.sqlite"
     sqlpath = os.path.join(destdir, sqlname)
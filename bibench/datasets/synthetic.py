@@ -27,17 +27,12 @@ Methods for creating synthetic datasets with implanted biclusters.
 
 """
 
-from bibench.bicluster import Bicluster
+from bibench.bicluster import Bicluster, biclusters_from_matrices
+from bibench import rpool
+from bibench import rutil
 
 import numpy
 
-import rpy2.robjects as robjects
-import rpy2.robjects.numpy2ri
-import pkg_resources
-v = pkg_resources.get_distribution('rpy2').version
-if v[0:3] >= '2.2':
-    rpy2.robjects.numpy2ri.activate()
-
 import random
 
 
@@ -146,15 +141,7 @@ def _make_expected_biclusters_(row_matrix, col_matrix, data):
     make a list of Biclusters.
 
     """
-    nclust = row_matrix.shape[1]
-    assert nclust == col_matrix.shape[1]
-
-    biclusters = []
-    for row_line, col_line in zip(row_matrix.T, col_matrix.T):
-        rows = list(numpy.where(row_line > 0)[0])
-        cols = list(numpy.where(col_line > 0)[0])
-        biclusters.append(Bicluster(rows, cols, data))
-    return biclusters
+    return biclusters_from_matrices(row_matrix > 0, col_matrix > 0, data)
 
 
 def _make_biclusters_(row_matrix,
@@ -576,6 +563,33 @@ def make_plaid_data(nrows=300, ncols=50,
     return data, expected
 
 
+def _fabia_data_(function, *args):
+    """
+    Calls one of fabia's makeFabiaData functions, and returns the
+    noisy data and the 0-indexed rows and columns of each bicluster.
+    Called through bibench.rpool.
+
+    """
+    rutil.library('fabia')
+    func = rutil.robjects().r[function]
+    result = func(*args)
+
+    noisy_data = rutil.from_r_matrix(result[0], dtype=float)
+    cols_vector = result[2]
+    rows_vector = result[3]
+
+    f = lambda x: int(x) - 1
+    rows = []
+    for r in rows_vector:
+        rows.append(map(f, r))
+
+    cols = []
+    for c in cols_vector:
+        cols.append(map(f, c))
+
+    return noisy_data, rows, cols
+
+
 def make_fabia_data(nrows,
                     ncols,
                     nclusts,
@@ -621,43 +635,28 @@ def make_fabia_data(nrows,
         * pos: Use the MakeFabiaDataPos functions
 
     """
-    robjects.r.library('fabia')
-
     function = 'makeFabiaData'
     if not shuffle:
         function += "Blocks"
     if pos:
         function += "Pos"
-    func = robjects.r[function]
-
-    result = func(nrows,
-                  ncols,
-                  nclusts,
-                  f1,
-                  f2,
-                  of1,
-                  of2,
-                  sd_noise,
-                  sd_z_noise,
-                  mean_z,
-                  sd_z,
-                  sd_l_noise,
-                  mean_l,
-                  sd_l)
-
-    noisy_data = numpy.array(result[0]).copy()
-    noiseless_data = numpy.array(result[1]).copy()
-    cols_vector = result[2]
-    rows_vector = result[3]
 
-    f = lambda x: int(x) - 1
-    rows = []
-    for r in rows_vector:
-        rows.append(map(f, r))
-
-    cols = []
-    for c in cols_vector:
-        cols.append(map(f, c))
+    noisy_data, rows, cols = rpool.call(_fabia_data_,
+                                        function,
+                                        nrows,
+                                        ncols,
+                                        nclusts,
+                                        f1,
+                                        f2,
+                                        of1,
+                                        of2,
+                                        sd_noise,
+                                        sd_z_noise,
+                                        mean_z,
+                                        sd_z,
+                                        sd_l_noise,
+                                        mean_l,
+                                        sd_l)
 
     biclusters = []
     for r, c in zip(rows, cols):
@@ -666,6 +665,30 @@ def make_fabia_data(nrows,
     return noisy_data, biclusters
 
 
+def _isa_data_(**isa_args):
+    """
+    Calls isa2's isa.in.silico, and returns the data and the row and
+    column membership matrices. Called through bibench.rpool.
+
+    """
+    robjects = rutil.robjects()
+    for key in ['mod_signal', 'mod_noise']:
+        if key in isa_args:
+            isa_args[key] = robjects.FloatVector(isa_args[key])
+
+    rutil.library('isa2')
+
+    #get data
+    func = robjects.r['isa.in.silico']
+    result = func(**isa_args)
+
+    #convert to python
+    data = rutil.from_r_matrix(result[0], dtype=float)
+    rows = rutil.from_r_matrix(result[1])
+    cols = rutil.from_r_matrix(result[2])
+    return data, rows, cols
+
+
 def make_isa_data(nrows=300,
                   ncols=50,
                   nclusts=3,
@@ -735,34 +758,11 @@ def make_isa_data(nrows=300,
 
     for key in ['mod_signal', 'mod_noise']:
         if key in isa_args:
-            isa_args[key] = robjects.FloatVector(list(isa_args[key]))
-
-    robjects.r.library('isa2')
-
-    #get data
-    func = robjects.r['isa.in.silico']
-    result = func(**isa_args)
-
-    #convert to python
-    data = numpy.array(robjects.Matrix(result[0])).copy()
-    rows = numpy.array(robjects.Matrix(result[1])).copy()
-    cols = numpy.array(robjects.Matrix(result[2])).copy()
-
-    nbiclusters = rows.shape[1]
-
-    row_list = []
-    for i in range(nbiclusters):
-        row = list(rows[:,i].nonzero()[0])
-        row_list.append(row)
+            isa_args[key] = list(isa_args[key])
 
-    col_list = []
-    for i in range(nbiclusters):
-        col = list(cols[:,i].nonzero()[0])
-        col_list.append(col)
+    data, rows, cols = rpool.call(_isa_data_, **isa_args)
 
-    expected = []
-    for r, c, in zip(row_list, col_list):
-        expected.append(Bicluster(r, c, data))
+    expected = biclusters_from_matrices(rows, cols, data)
 
     if shuffle:
         data, expected = _shuffle_(data, expected)
@@ -31,35 +31,44 @@ discretization, and normalization.
 import math
 import numpy
 
-import rpy2.robjects as robjects
-import rpy2.interactive as r
 from bibench.util import flatten
-
-#enables automatic conversion from numpy to R:
-import rpy2.robjects.numpy2ri
-import pkg_resources
-v = pkg_resources.get_distribution('rpy2').version
-if v[0:3] >= '2.2':
-    rpy2.robjects.numpy2ri.activate()
+from bibench import rpool
+from bibench import rutil
 
 
 def _same_type_(data, orig):
-    newdata = orig.copy()
-    newdata[:,:] = data[:,:]
+    """
+    Returns 'data' with the dtype and array subclass of 'orig',
+    copying only if the dtype differs.
+
+    """
+    newdata = numpy.asarray(data, dtype=orig.dtype)
+    if type(orig) is not numpy.ndarray:
+        newdata = newdata.view(type(orig))
+        newdata.__array_finalize__(orig)
     return newdata
 
 
-def _rfunction_(functionname, data, **kwargs):
+def _rcall_(functionname, data, **kwargs):
     """
-    get an R object for the data
+    Calls a 'biclust' function on the data. Called through bibench.rpool.
+
     """
-    r_data = robjects.Matrix(data)
+    robjects = rutil.robjects()
+    r_data = rutil.to_r_matrix(data)
 
     #get the function
-    robjects.r.library('biclust')
+    rutil.library('biclust')
     func = robjects.r[functionname]
 
-    result = numpy.array(func(r_data, **kwargs))
+    return rutil.from_r_matrix(func(r_data, **kwargs))
+
+
+def _rfunction_(functionname, data, **kwargs):
+    """
+    get an R object for the data
+    """
+    result = rpool.call(_rcall_, functionname, data, **kwargs)
     return _same_type_(result, data)
 
 
@@ -370,10 +379,11 @@ def pca_impute(data, method='bpca', scale='none', center=True, npcs=5):
 
     """
     kwargs = locals()
-    r.importr('pcaMethods')
+    robjects = rutil.robjects()
+    rutil.library('pcaMethods')
     data = remove_na_rows(data)
-    r_data = robjects.Matrix(data)
+    r_data = rutil.to_r_matrix(data)
     prepped = robjects.r['prep'](r_data, scale=scale, center=center)
     result = robjects.r['pca'](prepped, method=method, center=False, nPcs=npcs)
-    imputed = numpy.array(robjects.r['completeObs'](result))
+    imputed = rutil.from_r_matrix(robjects.r['completeObs'](result))
     return _same_type_(imputed, data)
@@ -0,0 +1,239 @@
+####################################################################
+###     ____  _ ____                  _                          ###
+###    | __ )(_) __ )  ___ _ __   ___| |__                       ###
+###    |  _ \| |  _ \ / _ \ '_ \ / __| '_ \                      ###
+###    | |_) | | |_) |  __/ | | | (__| | | |                     ###
+###    |____/|_|____/ \___|_| |_|\___|_| |_|                     ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### This file is part of the BiBench package for biclustering    ###
+### analysis.                                                    ###
+###                                                              ###
+### Copyright (c) 2011 by:                                       ###
+###   * Kemal Eren,                                              ###
+###   * Mehmet Deveci,                                           ###
+###   * Umit V. Catalyurek                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### For license info, please see the README and LICENSE files    ###
+### in the main directory.                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+
+"""
+Timing and resource measurements for biclustering runs.
+
+Every call to a function decorated with bicluster_algorithm() is
+measured, and the measurements are stored in the 'profile' entry of
+the result's properties. A profile is a dict with these keys:
+
+* algorithm: the full name of the algorithm.
+* wall: elapsed wall clock time, in seconds.
+* cpu: user and system CPU time of this process, in seconds.
+* maxrss: peak resident set size of this process so far, in kilobytes.
+* children: a dict of 'utime' and 'stime' for child processes, such
+  as wrapped binaries, that finished during the run, and 'maxrss',
+  the largest peak resident set size of any child that finished so
+  far in this process's lifetime, in kilobytes. getrusage() keeps no
+  per-run peak, so 'maxrss' may come from an earlier run's child.
+* phases: a dict mapping phase names to dicts of 'wall', 'cpu', and
+  'count'. Algorithms mark phases with the phase() context manager;
+  rpy2 algorithms, for instance, time their R calls as phase 'r'.
+
+* counters: a dict of named totals added with count(), eg bytes
+  written and read by wrapped binaries.
+* cached: True if the result came from the result cache (see
+  bibench.cache), in which case only the 'cache' phase is timed.
+
+Profiles are also passed to every hook registered with add_hook(),
+eg to stream them to a JSON-lines file with JsonLinesSink. Errors
+raised by hooks are logged, not raised.
+
+For a closer look at the Python side of each phase, enable_cprofile()
+runs cProfile during phases and saves the statistics to files, whose
+names are listed under the phase's 'cprofile' key.
+
+"""
+
+import os
+import json
+import logging
+import time
+import cProfile
+import itertools
+import resource
+import threading
+from contextlib import contextmanager
+
+_hooks_ = []
+
+_local_ = threading.local()
+
+_cprofile_dir_ = None
+
+_cprofile_ids_ = itertools.count()
+
+
+def add_hook(hook):
+    """
+    Register a function to be called with each finished profile.
+
+    Args:
+        * hook: a callable that takes one argument, the profile dict.
+
+    """
+    if hook not in _hooks_:
+        _hooks_.append(hook)
+
+
+def remove_hook(hook):
+    """Unregister a hook added by add_hook()."""
+    if hook in _hooks_:
+        _hooks_.remove(hook)
+
+
+def _stack_():
+    stack = getattr(_local_, 'stack', None)
+    if stack is None:
+        stack = _local_.stack = []
+    return stack
+
+
+def current():
+    """The profile of the innermost active run in this thread, or None."""
+    stack = _stack_()
+    if stack:
+        return stack[-1]
+    return None
+
+
+def _cpu_time_():
+    times = os.times()
+    return times[0] + times[1]
+
+
+@contextmanager
+def run(algorithm):
+    """
+    Measure a run of 'algorithm'. Yields the profile dict, which is
+    filled in, and passed to the hooks, when the block exits.
+
+    """
+    profile = dict(algorithm=algorithm, phases=dict(), counters=dict())
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    wall = time.time()
+    cpu = _cpu_time_()
+    _stack_().append(profile)
+    try:
+        yield profile
+    finally:
+        _stack_().pop()
+        profile['wall'] = time.time() - wall
+        profile['cpu'] = _cpu_time_() - cpu
+        profile['maxrss'] = resource.getrusage(
+            resource.RUSAGE_SELF).ru_maxrss
+        after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        profile['children'] = dict(utime=after.ru_utime - children.ru_utime,
+                                   stime=after.ru_stime - children.ru_stime,
+                                   maxrss=after.ru_maxrss)
+        for hook in list(_hooks_):
+            #a raising hook must not hide the algorithm's own error
+            try:
+                hook(profile)
+            except Exception:
+                logging.exception('profiling hook {0!r} failed'.format(hook))
+
+
+def count(name, value):
+    """
+    Add 'value' to the counter 'name' of the current run. Does
+    nothing if no run is active.
+
+    """
+    profile = current()
+    if profile is not None:
+        counters = profile['counters']
+        counters[name] = counters.get(name, 0) + value
+
+
+def enable_cprofile(directory):
+    """
+    Run cProfile during every outermost phase, saving the statistics
+    of each to a file in 'directory'. The files can be read with the
+    'pstats' module.
+
+    """
+    global _cprofile_dir_
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    _cprofile_dir_ = directory
+
+
+def disable_cprofile():
+    """Stop running cProfile during phases."""
+    global _cprofile_dir_
+    _cprofile_dir_ = None
+
+
+@contextmanager
+def phase(name):
+    """
+    Time a phase of the current run. Times of phases with the same
+    name are summed. Does nothing if no run is active.
+
+    """
+    profile = current()
+    if profile is None:
+        yield
+        return
+
+    #cProfile cannot nest, so only outermost phases are profiled
+    profiler = None
+    if _cprofile_dir_ is not None and not getattr(_local_, 'profiling', False):
+        profiler = cProfile.Profile()
+        _local_.profiling = True
+
+    wall = time.time()
+    cpu = _cpu_time_()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            _local_.profiling = False
+        entry = profile['phases'].setdefault(
+            name, dict(wall=0.0, cpu=0.0, count=0))
+        entry['wall'] += time.time() - wall
+        entry['cpu'] += _cpu_time_() - cpu
+        entry['count'] += 1
+        if profiler is not None:
+            filename = os.path.join(
+                _cprofile_dir_,
+                '{0}.{1}.{2}.{3}.prof'.format(profile['algorithm'], name,
+                                              os.getpid(),
+                                              next(_cprofile_ids_)))
+            profiler.dump_stats(filename)
+            entry.setdefault('cprofile', []).append(filename)
+
+
+class JsonLinesSink(object):
+    """
+    A hook that appends each profile to a file, one JSON object per
+    line, stamped with the time the run finished.
+
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self._lock = threading.Lock()
+
+
+    def __call__(self, profile):
+        record = dict(profile, time=time.time())
+        line = json.dumps(record, default=repr)
+        with self._lock:
+            with open(self.filename, 'a') as f:
+                f.write(line + '\n')
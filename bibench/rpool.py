@@ -0,0 +1,327 @@
+####################################################################
+###     ____  _ ____                  _                          ###
+###    | __ )(_) __ )  ___ _ __   ___| |__                       ###
+###    |  _ \| |  _ \ / _ \ '_ \ / __| '_ \                      ###
+###    | |_) | | |_) |  __/ | | | (__| | | |                     ###
+###    |____/|_|____/ \___|_| |_|\___|_| |_|                     ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### This file is part of the BiBench package for biclustering    ###
+### analysis.                                                    ###
+###                                                              ###
+### Copyright (c) 2011 by:                                       ###
+###   * Kemal Eren,                                              ###
+###   * Mehmet Deveci,                                           ###
+###   * Umit V. Catalyurek                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### For license info, please see the README and LICENSE files    ###
+### in the main directory.                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+
+"""
+A pool of R worker processes for the rpy2-based algorithms.
+
+All rpy2 algorithms share a single embedded R interpreter, so they
+run one at a time, and each call loads its R library again. When the
+pool is enabled, the R calls are instead sent to worker processes
+that each have their own interpreter with the libraries already
+loaded. Algorithms called from several threads, or several runs
+started with call_async(), then use as many cores as there are
+workers.
+
+Large numpy arrays are not pickled through the pool's pipes; they are
+written once to a .npy file in shared memory (/dev/shm, if present)
+and memory mapped by the receiving process.
+
+The pool is disabled by default. To use it::
+
+    import bibench.rpool
+    bibench.rpool.enable(processes=4)
+
+Workers are forked, so R state loaded before enable() is inherited,
+and changes made afterwards in this process are not seen by the
+workers. Processes forked from this one after enable(), such as the
+workers of a sweep, cannot use the pool, and run R calls themselves.
+
+"""
+
+import os
+import atexit
+import tempfile
+import multiprocessing
+
+import numpy
+
+from bibench import rutil
+
+DEFAULT_LIBRARIES = ('biclust', 'fabia', 'isa2')
+
+DEFAULT_SHM = '/dev/shm'
+
+#arrays smaller than this many bytes are pickled instead of shared
+SHARE_THRESHOLD = 1 << 16
+
+_pool_ = None
+
+_in_worker_ = False
+
+
+def enable(processes=None,
+           libraries=DEFAULT_LIBRARIES,
+           directory=None,
+           maxtasks=None):
+    """
+    Start a pool of R workers, replacing any running pool.
+
+    Args:
+        * processes: number of workers; defaults to the number of CPUs.
+        * libraries: R libraries each worker loads at startup.
+        * directory: where to put shared arrays; defaults to /dev/shm
+            if it exists, otherwise the temporary directory.
+        * maxtasks: restart a worker after this many calls, to
+            release memory held by R. None keeps workers forever.
+
+    Returns:
+        The RPool in use.
+
+    """
+    global _pool_
+    disable()
+    _pool_ = RPool(processes, libraries, directory, maxtasks)
+    return _pool_
+
+
+def disable():
+    """Stop the pool. Later R calls run in this process again."""
+    global _pool_
+    if _pool_ is not None:
+        _pool_.close()
+    _pool_ = None
+
+
+def get_pool():
+    """The RPool in use, or None if the pool is disabled."""
+    return _pool_
+
+
+def _usable_pool_():
+    """
+    The pool, if this process can send it calls. A forked child
+    inherits the pool object but not the threads that serve it, so
+    calls from it would wait forever.
+
+    """
+    if _pool_ is None or _in_worker_ or _pool_.pid != os.getpid():
+        return None
+    return _pool_
+
+
+def call(function, *args, **kwargs):
+    """
+    Call 'function' in an R worker if the pool is enabled, and in
+    this process otherwise. The function must be defined at module
+    level, and its arguments and results must be picklable, ie they
+    cannot be R objects.
+
+    """
+    pool = _usable_pool_()
+    if pool is None:
+        return function(*args, **kwargs)
+    return pool.apply(function, *args, **kwargs)
+
+
+def call_async(function, *args, **kwargs):
+    """
+    Like call(), but returns at once. The return value has a
+    get(timeout=None) method that waits for the result.
+
+    """
+    pool = _usable_pool_()
+    if pool is None:
+        return _Done_(function(*args, **kwargs))
+    return pool.apply_async(function, *args, **kwargs)
+
+
+class _Done_(object):
+    """The result of a call that ran in this process."""
+    def __init__(self, value):
+        self.value = value
+
+    def get(self, timeout=None):
+        return self.value
+
+    def ready(self):
+        return True
+
+
+class _Shared_(object):
+    """A picklable reference to an array stored in a .npy file."""
+    def __init__(self, path):
+        self.path = path
+
+    def load(self, mmap_mode=None):
+        return numpy.load(self.path, mmap_mode=mmap_mode)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _shm_dir_(directory=None):
+    if directory is not None:
+        return directory
+    if os.path.isdir(DEFAULT_SHM) and os.access(DEFAULT_SHM, os.W_OK):
+        return DEFAULT_SHM
+    return tempfile.gettempdir()
+
+
+def _share_(value, directory, shared):
+    """
+    Replace a large array by a _Shared_ reference, appending the
+    reference to 'shared'. Lists and tuples are searched one level
+    deep, which covers the arguments and results of the R helpers.
+
+    """
+    if isinstance(value, (list, tuple)):
+        return type(value)(_share_array_(v, directory, shared)
+                           for v in value)
+    return _share_array_(value, directory, shared)
+
+
+def _share_array_(value, directory, shared):
+    if not isinstance(value, numpy.ndarray) or value.dtype.hasobject or \
+            value.nbytes < SHARE_THRESHOLD:
+        return value
+    fd, path = tempfile.mkstemp(prefix='bibench-r-', suffix='.npy',
+                                dir=directory)
+    os.close(fd)
+    ref = _Shared_(path)
+    shared.append(ref)
+    stored = numpy.lib.format.open_memmap(path, mode='w+',
+                                          dtype=value.dtype,
+                                          shape=value.shape)
+    stored[...] = value
+    stored.flush()
+    del stored
+    return ref
+
+
+def _unshare_(value, mmap_mode=None):
+    """Inverse of _share_(): load referenced arrays."""
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unshare_array_(v, mmap_mode) for v in value)
+    return _unshare_array_(value, mmap_mode)
+
+
+def _unshare_array_(value, mmap_mode):
+    if isinstance(value, _Shared_):
+        return value.load(mmap_mode)
+    return value
+
+
+def _init_worker_(libraries):
+    global _in_worker_, _pool_
+    _in_worker_ = True
+    _pool_ = None
+    for library in libraries:
+        rutil.library(library)
+
+
+def _run_(function, args, kwargs, directory):
+    """Runs in a worker: map shared arguments, call, share the result."""
+    args = _unshare_(args, mmap_mode='r')
+    kwargs = dict((k, _unshare_(v, mmap_mode='r'))
+                  for k, v in kwargs.iteritems())
+    result = function(*args, **kwargs)
+    return _share_(result, directory, [])
+
+
+class _PoolResult_(object):
+    """Loads shared results and removes the shared files."""
+    def __init__(self, async_result, shared):
+        self.async_result = async_result
+        self.shared = shared
+
+    def ready(self):
+        return self.async_result.ready()
+
+    def get(self, timeout=None):
+        try:
+            result = self.async_result.get(timeout)
+        except multiprocessing.TimeoutError:
+            raise
+        except:
+            self._cleanup_()
+            raise
+        self._cleanup_()
+        try:
+            return _unshare_(result)
+        finally:
+            for ref in _shared_refs_(result):
+                ref.remove()
+
+    def _cleanup_(self):
+        for ref in self.shared:
+            ref.remove()
+        self.shared = []
+
+
+def _shared_refs_(value):
+    if isinstance(value, _Shared_):
+        return [value]
+    if isinstance(value, (list, tuple)):
+        return [v for v in value if isinstance(v, _Shared_)]
+    return []
+
+
+class RPool(object):
+    """
+    Worker processes, each with an embedded R interpreter and
+    'libraries' loaded. Use through enable() and call().
+
+    """
+    def __init__(self,
+                 processes=None,
+                 libraries=DEFAULT_LIBRARIES,
+                 directory=None,
+                 maxtasks=None):
+        self.directory = _shm_dir_(directory)
+        self.libraries = tuple(libraries)
+        #the process that owns the pool; see _usable_pool_()
+        self.pid = os.getpid()
+        self._pool_ = multiprocessing.Pool(processes,
+                                           _init_worker_,
+                                           (self.libraries,),
+                                           maxtasks)
+
+    def apply_async(self, function, *args, **kwargs):
+        shared = []
+        args = _share_(args, self.directory, shared)
+        kwargs = dict((k, _share_(v, self.directory, shared))
+                      for k, v in kwargs.iteritems())
+        try:
+            async_result = self._pool_.apply_async(
+                _run_, (function, args, kwargs, self.directory))
+        except:
+            for ref in shared:
+                ref.remove()
+            raise
+        return _PoolResult_(async_result, shared)
+
+    def apply(self, function, *args, **kwargs):
+        return self.apply_async(function, *args, **kwargs).get()
+
+    def close(self):
+        self._pool_.close()
+        self._pool_.join()
+
+    def terminate(self):
+        self._pool_.terminate()
+        self._pool_.join()
+
+
+atexit.register(disable)
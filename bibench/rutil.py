@@ -22,18 +22,171 @@
 ###                                                              ###
 ###--------------------------------------------------------------###
 
-"""Utility functions for dealing with R"""
+"""
+Utility functions for dealing with R.
 
-from rpy2 import interactive as r
-import rpy2.robjects as robjects
-from rpy2.robjects.packages import importr
+Importing rpy2 starts an embedded R interpreter, which takes a
+while. BiBench therefore never imports rpy2 at module level; R-backed
+functions get it from robjects() instead, which starts R and turns on
+numpy conversion the first time it is called. Libraries are loaded
+with library() or importr(), which remember what has already been
+loaded.
+
+Matrices are passed with to_r_matrix() and from_r_matrix(), which
+copy the data once, straight between the numpy array and the memory
+of the R vector, instead of going through Python sequences.
+
+"""
+
+import threading
+
+import numpy
+
+_lock_ = threading.RLock()
+
+_robjects_ = None
+
+_libraries_ = set()
+
+_packages_ = dict()
+
+
+def robjects():
+    """
+    The rpy2.robjects module. The first call starts R and enables
+    automatic conversion from numpy to R.
+
+    """
+    global _robjects_
+    if _robjects_ is None:
+        with _lock_:
+            if _robjects_ is None:
+                import rpy2.robjects
+                #enables automatic conversion from numpy to R:
+                import rpy2.robjects.numpy2ri
+                import pkg_resources
+                v = pkg_resources.get_distribution('rpy2').version
+                if v[0:3] >= '2.2':
+                    rpy2.robjects.numpy2ri.activate()
+                _robjects_ = rpy2.robjects
+    return _robjects_
+
+
+def rinterface():
+    """The rpy2.rinterface module, eg for RRuntimeError."""
+    robjects()
+    import rpy2.rinterface
+    return rpy2.rinterface
+
+
+def library(name):
+    """Attach an R library, unless this was already done."""
+    if name not in _libraries_:
+        with _lock_:
+            if name not in _libraries_:
+                robjects().r.library(name)
+                _libraries_.add(name)
+
+
+def importr(name):
+    """Import an R package as a Python object, once per package."""
+    if name not in _packages_:
+        robjects()
+        with _lock_:
+            if name not in _packages_:
+                from rpy2.robjects.packages import importr as _importr_
+                _packages_[name] = _importr_(name)
+    return _packages_[name]
+
+
+#numpy dtype kind to R storage type, rinterface vector class, and zero
+_R_KINDS_ = dict(b=('logical', 'BoolSexpVector', False),
+                 i=('integer', 'IntSexpVector', 0),
+                 u=('integer', 'IntSexpVector', 0),
+                 f=('double', 'FloatSexpVector', 0.0))
+
+#how R stores each storage type in memory
+_R_MEMORY_ = dict(logical=numpy.int32, integer=numpy.int32,
+                  double=numpy.float64)
+
+
+def _typeof_(vector):
+    return str(rinterface().baseenv['typeof'](vector)[0])
+
+
+def _r_memory_(vector):
+    """
+    A flat numpy view of the memory of an R vector, or None if this
+    rpy2 version does not share it.
+
+    """
+    if hasattr(vector, 'memoryview'):
+        return numpy.frombuffer(vector.memoryview(),
+                                dtype=_R_MEMORY_[_typeof_(vector)])
+    if hasattr(vector, '__array_struct__'):
+        view = numpy.asarray(vector)
+        if view.flags.f_contiguous:
+            return view.reshape(-1, order='F')
+    return None
+
+
+def to_r_matrix(data):
+    """
+    Convert a 2-d numpy array to an R matrix.
+
+    Boolean arrays become logical matrices, integer arrays integer
+    matrices, and all others double matrices. The values are copied
+    once, directly into the memory of a new R matrix, which bypasses
+    rpy2's conversion.
+
+    """
+    ri = rinterface()
+    data = numpy.asarray(data)
+    if data.ndim != 2:
+        raise ValueError('expected a 2-d array, not {0}-d'.format(data.ndim))
+    kind = data.dtype.kind if data.dtype.kind in _R_KINDS_ else 'f'
+    nrows, ncols = data.shape
+    _, vectorclass, zero = _R_KINDS_[kind]
+    rmatrix = ri.baseenv['matrix'](getattr(ri, vectorclass)([zero]),
+                                   nrow=ri.IntSexpVector([nrows]),
+                                   ncol=ri.IntSexpVector([ncols]))
+    memory = _r_memory_(rmatrix)
+    if memory is None:
+        return robjects().Matrix(data)
+    #R stores matrices column by column
+    memory.reshape((ncols, nrows)).T[...] = data
+    return rmatrix
+
+
+def from_r_matrix(rmatrix, dtype=None):
+    """
+    Convert an R logical, integer, or double matrix to a numpy array,
+    with one copy.
+
+    Args:
+        * rmatrix: the R matrix. Arrays that rpy2 already converted
+            are accepted too.
+        * dtype: dtype of the result; defaults to bool for logical
+            matrices, int32 for integer, and float64 for double.
+
+    """
+    if isinstance(rmatrix, numpy.ndarray):
+        return numpy.array(rmatrix, dtype=dtype)
+    typeof = _typeof_(rmatrix)
+    if dtype is None:
+        dtype = bool if typeof == 'logical' else _R_MEMORY_.get(typeof)
+    memory = _r_memory_(rmatrix)
+    if memory is None:
+        return numpy.array(robjects().Matrix(rmatrix), dtype=dtype)
+    nrows, ncols = [int(d) for d in rinterface().baseenv['dim'](rmatrix)]
+    return numpy.array(memory.reshape((ncols, nrows)).T, dtype=dtype,
+                       order='C')
 
-base = importr('base')
 
 def get_bioclite():
     """
     Note: requires an internet connection.
 
     """
-    base.source("http://bioconductor.org/biocLite.R")
-    return robjects.r['biocLite']
+    importr('base').source("http://bioconductor.org/biocLite.R")
+    return robjects().r['biocLite']
@@ -0,0 +1,245 @@
+####################################################################
+###     ____  _ ____                  _                          ###
+###    | __ )(_) __ )  ___ _ __   ___| |__                       ###
+###    |  _ \| |  _ \ / _ \ '_ \ / __| '_ \                      ###
+###    | |_) | | |_) |  __/ | | | (__| | | |                     ###
+###    |____/|_|____/ \___|_| |_|\___|_| |_|                     ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### This file is part of the BiBench package for biclustering    ###
+### analysis.                                                    ###
+###                                                              ###
+### Copyright (c) 2011 by:                                       ###
+###   * Kemal Eren,                                              ###
+###   * Mehmet Deveci,                                           ###
+###   * Umit V. Catalyurek                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### For license info, please see the README and LICENSE files    ###
+### in the main directory.                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+
+"""
+Run biclustering algorithms over grids of parameters.
+
+A sweep runs an algorithm on one dataset once for every combination
+of parameters generated by util.dict_combinations(). Runs are spread
+over a pool of worker processes, and each result is written to a
+ResultStore as soon as it finishes. Combinations already in the store
+are skipped, so an interrupted sweep can simply be run again.
+
+Example::
+
+    store = ResultStore('results/cpb')
+    sweep(data, cpb, dict(nclus=[10, 20], targetpcc=[0.8, 0.9]), store)
+    for biclusters in store.results(data):
+        ...
+
+Results are keyed by the dataset as well as by the algorithm and its
+parameters, so a store directory reused with other data runs again.
+
+"""
+
+import os
+import hashlib
+import logging
+import itertools
+import tempfile
+import traceback
+import weakref
+import multiprocessing
+
+import bibench.rpool
+import bibench.util as util
+from bibench.bicluster import \
+    write_biclusters_binary, read_biclusters_binary
+
+_SUFFIX_ = '.bic'
+
+
+#the last dataset digested, as (weakref, digest); see _data_digest_()
+_digested_ = (None, None)
+
+
+def _data_digest_(data):
+    """
+    util.array_digest() of 'data', remembered for the last dataset
+    seen, so that checking every combination of a sweep hashes the
+    dataset once. The dataset must not be changed in place between
+    calls.
+
+    """
+    global _digested_
+    ref, digest = _digested_
+    if ref is None or ref() is not data:
+        digest = util.array_digest(data)
+        _digested_ = (weakref.ref(data), digest)
+    return digest
+
+
+class ResultStore(object):
+    """
+    A directory of results, one binary bicluster file (see
+    write_biclusters_binary()) per dataset, algorithm and combination
+    of parameters.
+
+    """
+    def __init__(self, directory):
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.directory = directory
+
+
+    def _path_(self, algorithm, params, data):
+        name = '.'.join([algorithm.__module__, algorithm.__name__])
+        items = sorted((k, repr(v)) for k, v in params.items())
+        digest = _data_digest_(data)
+        key = hashlib.sha1(repr((digest, name, items))).hexdigest()
+        return os.path.join(self.directory,
+                            '{0}.{1}{2}'.format(digest, key, _SUFFIX_))
+
+
+    def contains(self, algorithm, params, data):
+        """
+        True if a result for 'algorithm' with 'params' on 'data' is
+        stored.
+
+        """
+        return os.path.exists(self._path_(algorithm, params, data))
+
+
+    def put(self, algorithm, params, biclusters, data):
+        """
+        Store the result of running 'algorithm' with 'params' on
+        'data'. The file is written under a temporary name and then
+        renamed, so that an interrupted write does not leave a
+        partial result.
+
+        """
+        fd, tmpname = tempfile.mkstemp(dir=self.directory)
+        os.close(fd)
+        try:
+            write_biclusters_binary(biclusters, tmpname)
+            os.rename(tmpname, self._path_(algorithm, params, data))
+        except:
+            os.remove(tmpname)
+            raise
+
+
+    def get(self, algorithm, params, data):
+        """
+        Read the result of running 'algorithm' with 'params' on
+        'data', as a BiclusterList on 'data'.
+
+        """
+        return read_biclusters_binary(self._path_(algorithm, params, data),
+                                      data)
+
+
+    def results(self, data=None):
+        """
+        Iterate over the stored results, as BiclusterLists on
+        'data'. If 'data' is given, only its results are read;
+        otherwise all of them are.
+
+        """
+        prefix = ''
+        if data is not None:
+            prefix = _data_digest_(data) + '.'
+        for name in sorted(os.listdir(self.directory)):
+            if name.startswith(prefix) and name.endswith(_SUFFIX_):
+                yield read_biclusters_binary(
+                    os.path.join(self.directory, name), data)
+
+
+    def __len__(self):
+        return len([name for name in os.listdir(self.directory)
+                    if name.endswith(_SUFFIX_)])
+
+
+#the dataset, set once in each worker process by _init_worker_()
+_data_ = None
+
+
+def _init_worker_(data, forked=False):
+    global _data_
+    _data_ = data
+    if forked:
+        #the R pool's threads are not forked with it, so R calls run
+        #in this worker; see bibench.rpool
+        bibench.rpool._pool_ = None
+
+
+def _run_one_(task):
+    """
+    Run one combination and store its result. Returns (params, error),
+    where 'error' is None or a formatted traceback, so that one failed
+    run does not stop the sweep.
+
+    """
+    algorithm, params, store = task
+    try:
+        biclusters = algorithm(_data_, **params)
+        if (getattr(biclusters, 'properties', None) or {}).get('timed_out'):
+            #partial results are not stored, so the next sweep reruns it
+            return params, 'timed out; partial result not stored'
+        store.put(algorithm, params, biclusters, _data_)
+    except Exception:
+        return params, traceback.format_exc()
+    return params, None
+
+
+def sweep(data, algorithm, grid, store, processes=None, callback=None):
+    """
+    Run 'algorithm' on 'data' for each combination of parameters in
+    'grid', skipping those already in 'store'.
+
+    Args:
+        * data: numpy.ndarray.
+        * algorithm: a biclustering algorithm, such as
+            bibench.algorithms.cpb.cpb.
+        * grid: a dict mapping parameter names to lists of values.
+            See util.dict_combinations().
+        * store: a ResultStore.
+        * processes: the number of worker processes; defaults to the
+            number of CPUs. If 1, runs in this process.
+        * callback: if given, called as callback(params, error) as
+            each run finishes. 'error' is None on success, or the
+            formatted traceback. A run that hit its time limit (see
+            wrapper.limits()) is not stored, and counts as failed.
+
+    Returns:
+        A list of the parameter dicts whose runs failed.
+
+    """
+    tasks = [(algorithm, params, store)
+             for params in util.dict_combinations(grid)
+             if not store.contains(algorithm, params, data)]
+
+    if processes == 1:
+        _init_worker_(data)
+        finished = itertools.imap(_run_one_, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(processes, _init_worker_, (data, True))
+        finished = pool.imap_unordered(_run_one_, tasks)
+
+    failed = []
+    try:
+        for params, error in finished:
+            if error is not None:
+                logging.error('{0} failed with parameters {1}:\n{2}'
+                              .format(algorithm.__name__, params, error))
+                failed.append(params)
+            if callback is not None:
+                callback(params, error)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        else:
+            _init_worker_(None)
+    return failed
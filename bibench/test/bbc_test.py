@@ -27,6 +27,8 @@
 import unittest
 
 import bibench.all as bb
+from bibench.bicluster import BiclusterList
+from bibench.algorithms.bbc import _monotone_cutoffs_, _selectable_
 
 class BbcTest(unittest.TestCase):
 
@@ -38,6 +40,23 @@ class BbcTest(unittest.TestCase):
         result = bb.bbc(self.data, nclus)
         self.assertEquals(len(result), nclus)
 
+    def test_bbc_multiple(self):
+        result = bb.bbc(self.data, [1, 2, 3], processes=2)
+        self.assertTrue(result.arguments['nclus'] in [1, 2, 3])
+
+    def test_monotone_cutoffs(self):
+        results = dict((k, BiclusterList([], properties=dict(bic=bic)))
+                       for k, bic in [(1, 5.0), (2, 3.0), (4, 4.0), (5, 2.0)])
+        self.assertEquals(_monotone_cutoffs_(results), [4])
+
+    def test_selectable(self):
+        self.assertTrue(_selectable_(BiclusterList([], properties=dict(bic=1.0))))
+        self.assertFalse(_selectable_(None))
+        self.assertFalse(_selectable_(BiclusterList([], properties=dict())))
+        #partial results of a run that hit its time limit
+        timed_out = BiclusterList([], properties=dict(bic=1.0, timed_out=True))
+        self.assertFalse(_selectable_(timed_out))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -26,11 +26,18 @@
 
 from __future__ import division
 
+import os
+import tempfile
 import unittest
 import numpy as np
 
 import bibench.all as bb
-from bibench.bicluster import get_row_col_matrices, Bicluster
+from bibench.bicluster import get_row_col_matrices, Bicluster, BiclusterList
+from bibench.bicluster import filter as bb_filter, arrays as bb_arrays
+from bibench.bicluster import \
+    write_biclusters_binary, read_biclusters_binary, BiclusterFile, \
+    write_biclusters, iter_biclusters, iter_bicluster_chunks, \
+    biclusters_from_matrices
 
 class BiclusterTest(unittest.TestCase):
 
@@ -44,6 +51,22 @@ class BiclusterTest(unittest.TestCase):
         bicluster = Bicluster(rows, cols, data)
         self.assertTrue(np.alltrue(array == bicluster.array()))
 
+    def test_get_bicluster_views(self):
+        data = np.arange(60).reshape(10, 6)
+        bicluster = Bicluster([4, 5, 6], [1, 2], data)
+
+        view = bicluster.array(copy=False)
+        self.assertTrue(np.may_share_memory(view, data))
+        self.assertTrue(np.all(view == data[4:7, 1:3]))
+        self.assertFalse(np.may_share_memory(bicluster.array(), data))
+
+        self.assertTrue(np.all(bicluster.filter_rows() == data[4:7]))
+        self.assertTrue(np.all(bicluster.filter_cols() == data[:, 1:3]))
+
+        biclusters = [bicluster, Bicluster([9, 0], [5, 3, 4], data)]
+        for i, array in enumerate(bb_arrays(biclusters)):
+            self.assertTrue(np.all(biclusters[i].array() == array))
+
     def test_bicluster_eq(self):
         bic_a = Bicluster([1, 2, 3], [1, 2, 3])
         bic_b = Bicluster([1, 2, 3], [1, 2, 3])
@@ -72,6 +95,178 @@ class BiclusterTest(unittest.TestCase):
         self.assertTrue((rowxnumber == exp_rows).all())
         self.assertTrue((colxnumber == exp_cols).all())
 
+        rowxnumber, colxnumber = get_row_col_matrices(biclusters, sparse=True)
+
+        self.assertTrue((rowxnumber.toarray() == exp_rows).all())
+        self.assertTrue((colxnumber.toarray() == exp_cols).all())
+
+
+    def test_bitmask_set_operations(self):
+        data = np.random.randn(100, 70)
+        bic_a = Bicluster([0, 5, 64, 99], [1, 2, 69], data)
+        bic_b = Bicluster([5, 6, 64], [2, 3], data)
+        packed_a = Bicluster.from_bitmasks(*bic_a.bitmasks(), data=data)
+        packed_b = Bicluster.from_bitmasks(*bic_b.bitmasks(), data=data)
+
+        self.assertEquals(packed_a.rows, [0, 5, 64, 99])
+        self.assertEquals(packed_a.cols, [1, 2, 69])
+        self.assertEquals(packed_a, bic_a)
+        self.assertEquals(packed_a.area(), 12)
+
+        intersection = packed_a.intersection(packed_b)
+        self.assertEquals(intersection.rows, [5, 64])
+        self.assertEquals(intersection.cols, [2])
+        self.assertEquals(packed_a.union(packed_b).shape(), (5, 4))
+        self.assertEquals(packed_a.difference(packed_b).rows, [0, 99])
+        self.assertEquals(packed_a.symmetric_difference(packed_b).cols,
+                          [1, 3, 69])
+        self.assertAlmostEquals(packed_a.overlap(packed_b), 2 / 12)
+        self.assertTrue(intersection.issubset(packed_a))
+        self.assertFalse(packed_a.issubset(packed_b))
+
+        packed_a.rows = [0, 5]
+        self.assertEquals(packed_a.intersection(packed_b).rows, [5])
+
+        #index lists changed in place are packed again
+        packed_a.rows.append(6)
+        self.assertEquals(packed_a.intersection(packed_b).rows, [5, 6])
+        bic_a.cols.remove(69)
+        self.assertEquals(Bicluster.from_bitmasks(*bic_a.bitmasks()).cols,
+                          [1, 2])
+
+
+    def test_bicluster_list_from_matrices(self):
+        data = np.random.randn(100, 10)
+        biclusters = BiclusterList([Bicluster([0, 1, 70], [1, 2], data),
+                                    Bicluster([1, 2], [0, 1, 2], data),
+                                    Bicluster([99], [9], data)])
+        rowmatrix, colmatrix = get_row_col_matrices(biclusters)
+
+        packed = BiclusterList.from_matrices(rowmatrix, colmatrix, data)
+        self.assertEquals(len(packed), 3)
+        self.assertEquals(packed[0], biclusters[0])
+        self.assertEquals(packed[2].rows, [99])
+
+        rows, cols = packed.membership_matrices()
+        self.assertTrue((rows == rowmatrix).all())
+        self.assertTrue((cols == colmatrix).all())
+
+        self.assertEquals(list(packed.areas()), [6, 6, 1])
+        expected = [[b.intersection(c).area() for c in biclusters]
+                    for b in biclusters]
+        self.assertEquals(packed.intersection_areas(biclusters).tolist(),
+                          expected)
+
+        rowbits, colbits = packed.bitmasks()
+        self.assertTrue(packed.bitmasks()[0] is rowbits)
+        packed[1].rows = [3]
+        self.assertEquals(packed.membership_matrices()[0][:, 1].nonzero()[0].tolist(),
+                          [3])
+        packed.append(Bicluster([4], [4], data))
+        self.assertEquals(list(packed.areas()), [6, 3, 1, 1])
+
+        packed = BiclusterList.from_matrices(rowmatrix, colmatrix, data)
+        packed[2].rows.append(98)
+        self.assertEquals(list(packed.areas()), [6, 6, 2])
+
+
+    def test_biclusters_from_matrices(self):
+        data = np.random.randn(100, 10)
+        biclusters = [Bicluster([0, 1, 70], [1, 2], data),
+                      Bicluster([], [0, 1, 2], data),
+                      Bicluster([99], [9], data)]
+        rowmatrix, colmatrix = get_row_col_matrices(biclusters)
+
+        decoded = biclusters_from_matrices(rowmatrix * 2.5, colmatrix, data)
+        self.assertEquals([(b.rows, b.cols) for b in decoded],
+                          [(b.rows, b.cols) for b in biclusters])
+        self.assertTrue(decoded[0].data is data)
+
+        packed = biclusters_from_matrices(rowmatrix, colmatrix, data,
+                                          packed=True)
+        self.assertTrue(isinstance(packed, BiclusterList))
+        self.assertEquals(packed[2].rows, [99])
+        self.assertEquals(packed[1].cols, [0, 1, 2])
+
+        empty = biclusters_from_matrices(np.zeros((100, 0)),
+                                         np.zeros((10, 0)))
+        self.assertEquals(empty, [])
+
+
+    def test_filter(self):
+        data = np.random.randn(50, 20)
+        biclusters = [Bicluster(sorted(np.random.permutation(50)[:n]),
+                                sorted(np.random.permutation(20)[:m]),
+                                data)
+                      for n, m in np.random.randint(4, 15, size=(60, 2))]
+        biclusters.append(biclusters[0].copy())
+        biclusters.append(Bicluster(biclusters[1].rows[:-1],
+                                    biclusters[1].cols, data))
+
+        def reference(biclusters, max_overlap, remove_subsets):
+            accepted = []
+            for b in sorted(biclusters, key=lambda b: b.area(), reverse=True):
+                if not any([b == a or b.overlap(a) > max_overlap or
+                            (remove_subsets and b.issubset(a))
+                            for a in accepted]):
+                    accepted.append(b)
+            return accepted
+
+        for max_overlap in (0.0, 0.25, 1.0):
+            for remove_subsets in (True, False):
+                result = bb_filter(biclusters,
+                                   max_overlap=max_overlap,
+                                   remove_subsets=remove_subsets)
+                expected = reference(biclusters, max_overlap, remove_subsets)
+                self.assertEquals([id(b) for b in result],
+                                  [id(b) for b in expected])
+
+
+    def test_binary_file(self):
+        filename = tempfile.mktemp()
+        data = np.random.randn(10, 10)
+        biclusters = BiclusterList([Bicluster([0, 1, 2], [3, 4], data),
+                                    Bicluster([9], [0, 9], data)],
+                                   algorithm='alg',
+                                   arguments=dict(data=data, k=2),
+                                   properties=dict(bic=1.5))
+        try:
+            write_biclusters_binary(biclusters, filename)
+            write_biclusters_binary([Bicluster([5], [5])], filename,
+                                    append=True)
+
+            result = read_biclusters_binary(filename, data)
+            self.assertEquals(result, biclusters + [Bicluster([5], [5], data)])
+            self.assertEquals(result.algorithm, 'alg')
+            self.assertEquals(result.arguments, dict(k=2))
+            self.assertEquals(result.properties, dict(bic=1.5))
+
+            with BiclusterFile(filename) as infile:
+                self.assertEquals(len(infile), 3)
+                self.assertEquals(infile[1].rows, [9])
+                self.assertEquals(infile[-1].cols, [5])
+        finally:
+            os.remove(filename)
+
+
+    def test_iter_biclusters(self):
+        filename = tempfile.mktemp()
+        biclusters = [Bicluster([0, 1], [2, 3]),
+                      Bicluster([4], [5, 6]),
+                      Bicluster([7, 8, 9], [0])]
+        try:
+            write_biclusters(biclusters, filename)
+            self.assertEquals(list(iter_biclusters(filename)), biclusters)
+
+            chunks = list(iter_bicluster_chunks(filename, (10, 7), 2))
+            self.assertEquals(len(chunks), 2)
+            rows, cols = chunks[1]
+            self.assertEquals(rows.shape, (10, 1))
+            self.assertEquals(list(np.flatnonzero(rows[:, 0])), [7, 8, 9])
+            self.assertEquals(list(np.flatnonzero(cols[:, 0])), [0])
+        finally:
+            os.remove(filename)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,97 @@
+####################################################################
+###     ____  _ ____                  _                          ###
+###    | __ )(_) __ )  ___ _ __   ___| |__                       ###
+###    |  _ \| |  _ \ / _ \ '_ \ / __| '_ \                      ###
+###    | |_) | | |_) |  __/ | | | (__| | | |                     ###
+###    |____/|_|____/ \___|_| |_|\___|_| |_|                     ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### This file is part of the BiBench package for biclustering    ###
+### analysis.                                                    ###
+###                                                              ###
+### Copyright (c) 2011 by:                                       ###
+###   * Kemal Eren,                                              ###
+###   * Mehmet Deveci,                                           ###
+###   * Umit V. Catalyurek                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### For license info, please see the README and LICENSE files    ###
+### in the main directory.                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+
+"""Unit tests for the 'cache' module"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import bibench.cache
+from bibench.bicluster import Bicluster, bicluster_algorithm
+
+_calls_ = []
+
+@bicluster_algorithm
+def _counting_algorithm_(data, nclus, scale=1):
+    _calls_.append(nclus)
+    return [Bicluster([i], [0], data) for i in range(nclus)]
+
+
+class CacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = bibench.cache.enable(self.directory)
+        del _calls_[:]
+
+    def tearDown(self):
+        bibench.cache.disable()
+        shutil.rmtree(self.directory)
+
+    def test_cache_hit(self):
+        data = np.arange(20.0).reshape(10, 2)
+        first = _counting_algorithm_(data, 3)
+        second = _counting_algorithm_(data.copy(), 3)
+        self.assertEquals(_calls_, [3])
+        self.assertEquals([(b.rows, b.cols) for b in first],
+                          [(b.rows, b.cols) for b in second])
+        self.assertEquals(second.algorithm, first.algorithm)
+        self.assertTrue(second[0].data is not None)
+
+        #a hit gets its own profile, not that of the first run
+        first_profile = first.properties['profile']
+        second_profile = second.properties['profile']
+        self.assertFalse(first_profile['cached'])
+        self.assertTrue(second_profile['cached'])
+        self.assertTrue(second_profile is not first_profile)
+        self.assertEquals(set(second_profile['phases']), set(['cache']))
+
+        #different data or arguments must miss
+        _counting_algorithm_(data + 1, 3)
+        _counting_algorithm_(data, 3, 2)
+        self.assertEquals(_calls_, [3, 3, 3])
+
+    def test_invalidate(self):
+        data = np.arange(20.0).reshape(10, 2)
+        _counting_algorithm_(data, 2)
+        self.cache.invalidate(_counting_algorithm_)
+        _counting_algorithm_(data, 2)
+        self.assertEquals(_calls_, [2, 2])
+
+    def test_evict(self):
+        data = np.arange(20.0).reshape(10, 2)
+        for nclus in range(1, 5):
+            _counting_algorithm_(data, nclus)
+        self.assertTrue(self.cache.size() > 0)
+        self.cache.evict(0)
+        self.assertEquals(self.cache.size(), 0)
+        _counting_algorithm_(data, 1)
+        self.assertEquals(_calls_, [1, 2, 3, 4, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+####################################################################
+###     ____  _ ____                  _                          ###
+###    | __ )(_) __ )  ___ _ __   ___| |__                       ###
+###    |  _ \| |  _ \ / _ \ '_ \ / __| '_ \                      ###
+###    | |_) | | |_) |  __/ | | | (__| | | |                     ###
+###    |____/|_|____/ \___|_| |_|\___|_| |_|                     ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### This file is part of the BiBench package for biclustering    ###
+### analysis.                                                    ###
+###                                                              ###
+### Copyright (c) 2011 by:                                       ###
+###   * Kemal Eren,                                              ###
+###   * Mehmet Deveci,                                           ###
+###   * Umit V. Catalyurek                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### For license info, please see the README and LICENSE files    ###
+### in the main directory.                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+
+"""Unit tests for the numpy Cheng and Church implementation"""
+
+import unittest
+import numpy as np
+
+import bibench.all as bb
+from bibench.algorithms.chengchurch import \
+    _Submatrix_, _find_bicluster_, cheng_church_numpy
+from bibench.datasets.synthetic import make_const_data, make_shift_data
+
+
+def _residue_scores_(data, rows, cols):
+    submatrix = data[np.ix_(rows, cols)]
+    residue = submatrix - submatrix.mean(1)[:, np.newaxis] - \
+        submatrix.mean(0) + submatrix.mean()
+    squares = residue ** 2
+    return squares.mean(1), squares.mean(0), squares.mean()
+
+
+class ChengChurchTest(unittest.TestCase):
+
+    def test_scores(self):
+        data = np.random.randn(300, 20)
+        sub = _Submatrix_(data)
+        for step in range(150):
+            rows, cols = sub.rows.copy(), sub.cols.copy()
+            row_scores, col_scores, h = _residue_scores_(data, rows, cols)
+
+            fast_rows, fast_cols, _, fast_h = sub.scores()
+            self.assertTrue(np.allclose(fast_rows[rows], row_scores))
+            self.assertTrue(np.allclose(fast_cols[cols], col_scores))
+            self.assertAlmostEquals(fast_h, h)
+
+            row, score = sub.worst_row()
+            self.assertEquals(row, np.flatnonzero(rows)[row_scores.argmax()])
+            self.assertAlmostEquals(score, row_scores.max())
+
+            if step % 40 == 39:
+                sub.remove_cols([np.flatnonzero(cols)[0]])
+            elif step % 25 == 24:
+                sub.add_rows(np.flatnonzero(~rows)[:2])
+            else:
+                sub.remove_rows([np.random.choice(np.flatnonzero(rows))])
+
+    def test_inverse_scores(self):
+        data = np.random.randn(50, 10)
+        rows = np.arange(50) < 30
+        sub = _Submatrix_(data, rows)
+        _, _, inverse_scores, _ = sub.scores(everything=True)
+
+        flipped = data.copy()
+        flipped[40] *= -1
+        row_scores = _Submatrix_(flipped, rows).scores(everything=True)[0]
+        self.assertAlmostEquals(inverse_scores[40], row_scores[40])
+
+    def test_const_data(self):
+        data, expected = make_const_data(nclusts=1, background_scale=10,
+                                         bicluster_signals=[5])
+        rows, cols = _find_bicluster_(data.astype(float), 0.01, 1.5)
+        self.assertTrue(set(expected[0].rows) <= set(np.flatnonzero(rows)))
+        self.assertTrue(set(expected[0].cols) <= set(np.flatnonzero(cols)))
+
+    def test_masking(self):
+        data, expected = make_shift_data(nclusts=3)
+        original = data.copy()
+        found = cheng_church_numpy(data, delta=0.1, number=3)
+        self.assertTrue((data == original).all())
+        self.assertEquals(len(found), 3)
+        pairs = set((tuple(b.rows), tuple(b.cols)) for b in found)
+        self.assertEquals(len(pairs), 3)
+
+    def test_matches_r(self):
+        """
+        Compare with BCCC in R's biclust, the only check against it.
+        Needs rpy2 and the R package 'biclust'.
+
+        """
+        for make in (make_const_data, make_shift_data):
+            data, expected = make(nclusts=1)
+            from_r = bb.cheng_church(data, delta=0.1, number=1)
+            from_numpy = cheng_church_numpy(data, delta=0.1, number=1)
+            self.assertEquals([(b.rows, b.cols) for b in from_numpy],
+                              [(b.rows, b.cols) for b in from_r])
+
+
+if __name__ == '__main__':
+    unittest.main()
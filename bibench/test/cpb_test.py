@@ -22,9 +22,14 @@
 ###                                                              ###
 ###--------------------------------------------------------------###
 
+import os
+import time
 import unittest
 
 import bibench.all as bb
+from bibench.algorithms import cpb, wrapper
+from bibench.test.wrapper_util import run_script
+
 
 class TestCpb(unittest.TestCase):
 
@@ -41,6 +46,12 @@ class TestCpb(unittest.TestCase):
         self.assertTrue(len(result) <= nclus)
         self.assertTrue(len(result) > 0)
 
+    def test_iter_cpb(self):
+        nclus = 2
+        streamed = list(bb.iter_cpb(self.data, nclus, targetpcc=0.9))
+        self.assertTrue(len(streamed) <= nclus)
+        self.assertTrue(len(streamed) > 0)
+
 
     def test_cpb_filter(self):
         nclus = 100
@@ -53,6 +64,45 @@ class TestCpb(unittest.TestCase):
         self.assertTrue(len(filtered) <= len(biclusters))
         self.assertTrue(score >= oldscore)
 
+    def test_watch_outfiles(self):
+        #while CPB runs, the newest .out file is held back, since it
+        #may still be being written
+        script = 'echo > {0}/1.out; sleep 0.5; echo > {0}/2.out; sleep 0.5'
+        start = time.time()
+        run = wrapper.run_async(run_script, script)
+        try:
+            seen = [(os.path.basename(f), run.running(), time.time() - start)
+                    for f in cpb._watch_outfiles_(run)]
+        finally:
+            run.close()
+        self.assertEquals([(name, running) for name, running, _ in seen],
+                          [('1.out', True), ('2.out', False)])
+        self.assertTrue(seen[0][2] >= 0.5)
+
+        #after a timeout, the file held back is still yielded
+        script = 'echo > {0}/1.out; echo > {0}/2.out; sleep 10'
+        run = wrapper.run_async(run_script, script, timeout=0.3)
+        run.keep_files()
+        try:
+            seen = [os.path.basename(f) for f in cpb._watch_outfiles_(run)]
+            self.assertTrue(run.result().properties['timed_out'])
+        finally:
+            run.close()
+        self.assertEquals(sorted(seen), ['1.out', '2.out'])
+
+    def test_watch_outfiles_same_mtime(self):
+        #files with the newest timestamp are all held back, since any
+        #of them may be the one still being written
+        script = 'echo > {0}/1.out; echo > {0}/2.out;' \
+            ' touch -r {0}/1.out {0}/2.out; sleep 0.5'
+        run = wrapper.run_async(run_script, script)
+        try:
+            seen = [(os.path.basename(f), run.running())
+                    for f in cpb._watch_outfiles_(run)]
+        finally:
+            run.close()
+        self.assertEquals(sorted(seen), [('1.out', False), ('2.out', False)])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -24,10 +24,13 @@
 
 from __future__ import division
 
+import os
+import tempfile
 import unittest
 import numpy as np
 
 from bibench.bicluster import Bicluster
+from bibench.datasets.io import write_expression_data, read_expression_data
 
 class DatasetTest(unittest.TestCase):
 
@@ -41,5 +44,21 @@ class DatasetTest(unittest.TestCase):
         bicluster = Bicluster(rows, cols, data)
         self.assertTrue(np.alltrue(array == bicluster.array()))
 
+    def test_write_expression_data(self):
+        data = np.random.randn(2000, 7)
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            write_expression_data(data, filename)
+            result = read_expression_data(filename)
+            self.assertTrue(np.all(result == data))
+            self.assertEquals(result.genes[-1], 'row1999')
+
+            write_expression_data(data, filename, precision=4)
+            result = read_expression_data(filename)
+            self.assertTrue(np.allclose(result, data, rtol=1e-3, atol=1e-4))
+        finally:
+            os.remove(filename)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,156 @@
+####################################################################
+###     ____  _ ____                  _                          ###
+###    | __ )(_) __ )  ___ _ __   ___| |__                       ###
+###    |  _ \| |  _ \ / _ \ '_ \ / __| '_ \                      ###
+###    | |_) | | |_) |  __/ | | | (__| | | |                     ###
+###    |____/|_|____/ \___|_| |_|\___|_| |_|                     ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### This file is part of the BiBench package for biclustering    ###
+### analysis.                                                    ###
+###                                                              ###
+### Copyright (c) 2011 by:                                       ###
+###   * Kemal Eren,                                              ###
+###   * Mehmet Deveci,                                           ###
+###   * Umit V. Catalyurek                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### For license info, please see the README and LICENSE files    ###
+### in the main directory.                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+
+"""Unit tests for the 'profiling' module"""
+
+import json
+import logging
+import os
+import tempfile
+import unittest
+import numpy as np
+
+import bibench.profiling as profiling
+from bibench.bicluster import Bicluster, bicluster_algorithm
+from bibench.algorithms.wrapper import wrapper_helper
+from bibench.test.wrapper_util import write_dataset
+
+
+@bicluster_algorithm
+def _phased_algorithm_(data, nclus=2):
+    for i in range(nclus):
+        with profiling.phase('step'):
+            pass
+    return [Bicluster([0], [0], data)]
+
+
+@bicluster_algorithm
+def _failing_algorithm_(data, nclus=2):
+    raise ValueError('failed')
+
+
+def _failing_hook_(profile):
+    raise RuntimeError('hook failed')
+
+
+class _Records_(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _do_call_(data, datafile, results_dir):
+    with open(os.path.join(results_dir, 'out'), 'w') as f:
+        f.write('y' * 10)
+
+
+def _read_results_(results_dir, data):
+    return [Bicluster([0], [0], data)]
+
+
+@bicluster_algorithm
+def _wrapped_algorithm_(data, binary='true'):
+    return wrapper_helper(binary, write_dataset, _read_results_,
+                          _do_call_, data)
+
+
+class ProfilingTest(unittest.TestCase):
+
+    def test_profile_properties(self):
+        result = _phased_algorithm_(np.zeros((3, 3)), 3)
+        profile = result.properties['profile']
+        self.assertEquals(profile['algorithm'], result.algorithm)
+        self.assertEquals(profile['phases']['step']['count'], 3)
+        for key in ['wall', 'cpu', 'maxrss', 'children']:
+            self.assertTrue(key in profile)
+        self.assertTrue(profile['wall'] >= profile['phases']['step']['wall'])
+
+    def test_wrapper_phases(self):
+        profile = _wrapped_algorithm_(np.zeros((3, 3))).properties['profile']
+        #write_dataset() writes each row as '0.0\t0.0\t0.0\n'
+        self.assertEquals(profile['counters'],
+                          dict(dataset_bytes=36, result_bytes=10))
+        self.assertEquals(set(profile['phases']),
+                          set(['mkdtemp', 'write_dataset', 'do_call',
+                               'read_results', 'cleanup']))
+
+    def test_cprofile(self):
+        directory = tempfile.mkdtemp()
+        profiling.enable_cprofile(directory)
+        try:
+            result = _phased_algorithm_(np.zeros((3, 3)), 2)
+        finally:
+            profiling.disable_cprofile()
+        filenames = result.properties['profile']['phases']['step']['cprofile']
+        self.assertEquals(len(filenames), 2)
+        for filename in filenames:
+            self.assertTrue(os.path.exists(filename))
+            os.remove(filename)
+        os.rmdir(directory)
+
+    def test_phase_without_run(self):
+        with profiling.phase('nothing'):
+            pass
+        self.assertTrue(profiling.current() is None)
+
+    def test_json_lines_sink(self):
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        sink = profiling.JsonLinesSink(filename)
+        profiling.add_hook(sink)
+        try:
+            _phased_algorithm_(np.zeros((3, 3)))
+            _phased_algorithm_(np.zeros((3, 3)))
+        finally:
+            profiling.remove_hook(sink)
+        with open(filename) as f:
+            records = [json.loads(line) for line in f]
+        os.remove(filename)
+        self.assertEquals(len(records), 2)
+        self.assertEquals(records[0]['phases']['step']['count'], 2)
+
+    def test_failing_hook(self):
+        #the hook's error is logged, and the algorithm's is raised
+        handler = _Records_()
+        logging.getLogger().addHandler(handler)
+        profiling.add_hook(_failing_hook_)
+        try:
+            self.assertRaises(ValueError, _failing_algorithm_,
+                              np.zeros((3, 3)))
+            result = _phased_algorithm_(np.zeros((3, 3)))
+        finally:
+            profiling.remove_hook(_failing_hook_)
+            logging.getLogger().removeHandler(handler)
+        self.assertEquals(len(handler.records), 2)
+        self.assertTrue(isinstance(handler.records[0].exc_info[1],
+                                   RuntimeError))
+        self.assertTrue('profile' in result.properties)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -22,9 +22,24 @@
 ###                                                              ###
 ###--------------------------------------------------------------###
 
+import os
+import shutil
+import tempfile
 import unittest
 
 import bibench.all as bb
+from bibench.algorithms import qubic
+
+#two biclusters, as QUBIC writes them to its .blocks file
+_BLOCKS_ = """\
+BC000	S=6
+ Genes [3]: gene0 gene2 gene4
+ Conds [2]: cond1 cond3
+
+BC001	S=4
+ Genes [2]: gene1 gene2
+ Conds [2]: cond0 cond1
+"""
 
 class TestQubic(unittest.TestCase):
 
@@ -37,6 +52,40 @@ class TestQubic(unittest.TestCase):
         result = bb.qubic(self.data, nblocks)
         self.assertTrue(len(result) == nblocks)
 
+    def test_iter_qubic(self):
+        nblocks = 2
+        result = bb.qubic(self.data, nblocks)
+        streamed = list(bb.iter_qubic(self.data, nblocks))
+        self.assertEquals(streamed, list(result))
+
+    def test_read_results(self):
+        #the names are not read back from data.txt, which may be a FIFO
+        directory = tempfile.mkdtemp()
+        try:
+            results_dir = os.path.join(directory, 'results')
+            os.mkdir(results_dir)
+            with open(os.path.join(directory, 'data.txt.blocks'), 'w') as f:
+                f.write(_BLOCKS_)
+            result = qubic._read_results_(results_dir, self.data)
+        finally:
+            shutil.rmtree(directory)
+        self.assertEquals([(b.rows, b.cols) for b in result],
+                          [([0, 2, 4], [1, 3]), ([1, 2], [0, 1])])
+
+    def test_iter_blocks(self):
+        lines = _BLOCKS_.splitlines(True)
+        self.assertEquals(len(list(qubic._iter_blocks_(lines))), 2)
+
+        #a last block cut off before its conditions are complete, as
+        #when QUBIC is killed, is dropped
+        for end in [len(_BLOCKS_) - 1,
+                    _BLOCKS_.rindex(' Conds'),
+                    _BLOCKS_.rindex('gene2')]:
+            lines = _BLOCKS_[:end].splitlines(True)
+            blocks = list(qubic._iter_blocks_(lines))
+            self.assertEquals(len(blocks), 1)
+            self.assertTrue(blocks[0].startswith(' Genes [3]'))
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,109 @@
+####################################################################
+###     ____  _ ____                  _                          ###
+###    | __ )(_) __ )  ___ _ __   ___| |__                       ###
+###    |  _ \| |  _ \ / _ \ '_ \ / __| '_ \                      ###
+###    | |_) | | |_) |  __/ | | | (__| | | |                     ###
+###    |____/|_|____/ \___|_| |_|\___|_| |_|                     ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### This file is part of the BiBench package for biclustering    ###
+### analysis.                                                    ###
+###                                                              ###
+### Copyright (c) 2011 by:                                       ###
+###   * Kemal Eren,                                              ###
+###   * Mehmet Deveci,                                           ###
+###   * Umit V. Catalyurek                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### For license info, please see the README and LICENSE files    ###
+### in the main directory.                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+
+"""Unit tests for the 'rpool' module"""
+
+import os
+import glob
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import bibench.rpool as rpool
+from bibench.bicluster import Bicluster, bicluster_algorithm
+from bibench.sweep import ResultStore, sweep
+
+
+def _describe_(data, scale=1):
+    return (os.getpid(), rpool._in_worker_, data.sum() * scale,
+            data * scale)
+
+
+@bicluster_algorithm
+def _pooled_algorithm_(data, nrows=1):
+    rpool.call_async(_describe_, data).get(5)
+    rpool.call(_describe_, data)
+    return [Bicluster(range(nrows), [0], data)]
+
+
+class RPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        rpool.disable()
+        shutil.rmtree(self.directory)
+
+    def test_disabled(self):
+        data = np.ones((3, 2))
+        pid, in_worker, total, scaled = rpool.call(_describe_, data, scale=2)
+        self.assertEquals(pid, os.getpid())
+        self.assertFalse(in_worker)
+        self.assertEquals(total, 12)
+
+    def test_call(self):
+        rpool.enable(2, libraries=(), directory=self.directory)
+        data = np.arange(20000.0).reshape(200, 100)
+        pid, in_worker, total, scaled = rpool.call(_describe_, data, scale=2)
+        self.assertNotEquals(pid, os.getpid())
+        self.assertTrue(in_worker)
+        self.assertEquals(total, data.sum() * 2)
+        self.assertTrue((scaled == data * 2).all())
+        self.assertEquals(glob.glob(os.path.join(self.directory, '*')), [])
+
+    def test_call_async(self):
+        rpool.enable(2, libraries=(), directory=self.directory)
+        datasets = [np.ones((100, 100)) * i for i in range(4)]
+        pending = [rpool.call_async(_describe_, d) for d in datasets]
+        totals = [p.get()[2] for p in pending]
+        self.assertEquals(totals, [d.sum() for d in datasets])
+        self.assertEquals(glob.glob(os.path.join(self.directory, '*')), [])
+
+    def test_share(self):
+        shared = []
+        small = np.ones(2)
+        large = np.ones((100, 100))
+        args = rpool._share_((small, large, 'x'), self.directory, shared)
+        self.assertTrue(args[0] is small)
+        self.assertEquals(len(shared), 1)
+        self.assertTrue(isinstance(args[1], rpool._Shared_))
+        loaded = rpool._unshare_(args, mmap_mode='r')
+        self.assertTrue((loaded[1] == large).all())
+        self.assertEquals(loaded[2], 'x')
+
+    def test_forked(self):
+        #sweep workers inherit the pool but not its threads
+        rpool.enable(2, libraries=(), directory=self.directory)
+        store = ResultStore(os.path.join(self.directory, 'store'))
+        failed = sweep(np.ones((4, 2)), _pooled_algorithm_,
+                       dict(nrows=[1, 2, 3]), store, processes=2)
+        self.assertEquals(failed, [])
+        self.assertEquals(len(store), 3)
+        self.assertTrue(rpool.call(_describe_, np.ones(2))[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
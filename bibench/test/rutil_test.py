@@ -0,0 +1,90 @@
+####################################################################
+###     ____  _ ____                  _                          ###
+###    | __ )(_) __ )  ___ _ __   ___| |__                       ###
+###    |  _ \| |  _ \ / _ \ '_ \ / __| '_ \                      ###
+###    | |_) | | |_) |  __/ | | | (__| | | |                     ###
+###    |____/|_|____/ \___|_| |_|\___|_| |_|                     ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### This file is part of the BiBench package for biclustering    ###
+### analysis.                                                    ###
+###                                                              ###
+### Copyright (c) 2011 by:                                       ###
+###   * Kemal Eren,                                              ###
+###   * Mehmet Deveci,                                           ###
+###   * Umit V. Catalyurek                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### For license info, please see the README and LICENSE files    ###
+### in the main directory.                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+
+"""
+Unit tests for the 'rutil' module, and a benchmark of numpy to R
+matrix transfers.
+
+"""
+
+import time
+import unittest
+import numpy as np
+
+from bibench import rutil
+
+
+def transfer_time(nrows=20000, ncols=500, repeats=3):
+    """
+    Best times, in seconds, to send a random nrows x ncols matrix to R
+    and back, with rpy2's conversion and with rutil's.
+
+    """
+    robjects = rutil.robjects()
+    data = np.random.rand(nrows, ncols)
+
+    def best(function):
+        times = []
+        for _ in range(repeats):
+            start = time.time()
+            function()
+            times.append(time.time() - start)
+        return min(times)
+
+    rpy2_time = best(lambda: np.array(robjects.Matrix(data)))
+    rutil_time = best(lambda: rutil.from_r_matrix(rutil.to_r_matrix(data)))
+    return rpy2_time, rutil_time
+
+
+class RutilTest(unittest.TestCase):
+
+    def test_roundtrip(self):
+        for data in [np.arange(12.0).reshape(3, 4),
+                     np.arange(12).reshape(4, 3),
+                     np.arange(12).reshape(3, 4) % 2 == 0,
+                     np.asfortranarray(np.arange(6.0).reshape(2, 3))]:
+            result = rutil.from_r_matrix(rutil.to_r_matrix(data),
+                                         dtype=data.dtype)
+            self.assertEquals(result.shape, data.shape)
+            self.assertTrue((result == data).all())
+
+    def test_r_layout(self):
+        data = np.arange(6.0).reshape(2, 3)
+        rmatrix = rutil.to_r_matrix(data)
+        self.assertEquals(list(rutil.robjects().r['dim'](rmatrix)), [2, 3])
+        self.assertEquals(list(rutil.robjects().r['c'](rmatrix)),
+                          [0.0, 3.0, 1.0, 4.0, 2.0, 5.0])
+
+    def test_transfer(self):
+        #a benchmark; timings vary too much to assert on, so they are
+        #only reported
+        rpy2_time, rutil_time = transfer_time(repeats=1)
+        print '20000 x 500 round trip: rpy2 {0:.3f}s, rutil {1:.3f}s'.format(
+            rpy2_time, rutil_time)
+
+
+if __name__ == '__main__':
+    rpy2_time, rutil_time = transfer_time()
+    print '20000 x 500 round trip: rpy2 {0:.3f}s, rutil {1:.3f}s'.format(
+        rpy2_time, rutil_time)
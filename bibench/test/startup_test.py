@@ -0,0 +1,79 @@
+####################################################################
+###     ____  _ ____                  _                          ###
+###    | __ )(_) __ )  ___ _ __   ___| |__                       ###
+###    |  _ \| |  _ \ / _ \ '_ \ / __| '_ \                      ###
+###    | |_) | | |_) |  __/ | | | (__| | | |                     ###
+###    |____/|_|____/ \___|_| |_|\___|_| |_|                     ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### This file is part of the BiBench package for biclustering    ###
+### analysis.                                                    ###
+###                                                              ###
+### Copyright (c) 2011 by:                                       ###
+###   * Kemal Eren,                                              ###
+###   * Mehmet Deveci,                                           ###
+###   * Umit V. Catalyurek                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### For license info, please see the README and LICENSE files    ###
+### in the main directory.                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+
+"""
+Import-time benchmark: importing bibench must not start R, and should
+stay fast enough for pure-numpy work such as scoring.
+
+"""
+
+import os
+import sys
+import json
+import subprocess
+import unittest
+
+import bibench
+
+#generous, to leave room for slow machines; starting R takes longer
+MAX_IMPORT_SECONDS = 2.0
+
+_SCRIPT_ = """
+import sys, time, json
+start = time.time()
+import bibench.all
+elapsed = time.time() - start
+print json.dumps(dict(
+    seconds=elapsed,
+    rpy2=sorted(m for m in sys.modules if m.startswith('rpy2'))))
+"""
+
+
+def import_time():
+    """
+    Import bibench.all in a fresh interpreter. Returns the seconds it
+    took and the rpy2 modules it loaded.
+
+    """
+    #run from the directory holding this bibench, wherever the tests
+    #are run from
+    root = os.path.dirname(os.path.dirname(os.path.abspath(bibench.__file__)))
+    output = subprocess.check_output([sys.executable, '-c', _SCRIPT_],
+                                     cwd=root)
+    result = json.loads(output.splitlines()[-1])
+    return result['seconds'], result['rpy2']
+
+
+class StartupTest(unittest.TestCase):
+
+    def test_import(self):
+        seconds, rpy2_modules = import_time()
+        self.assertEquals(rpy2_modules, [])
+        self.assertTrue(seconds < MAX_IMPORT_SECONDS,
+                        'importing bibench took {0:.2f}s'.format(seconds))
+
+
+if __name__ == '__main__':
+    seconds, rpy2_modules = import_time()
+    print 'import bibench.all: {0:.3f}s'.format(seconds)
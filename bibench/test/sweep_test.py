@@ -0,0 +1,109 @@
+####################################################################
+###     ____  _ ____                  _                          ###
+###    | __ )(_) __ )  ___ _ __   ___| |__                       ###
+###    |  _ \| |  _ \ / _ \ '_ \ / __| '_ \                      ###
+###    | |_) | | |_) |  __/ | | | (__| | | |                     ###
+###    |____/|_|____/ \___|_| |_|\___|_| |_|                     ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### This file is part of the BiBench package for biclustering    ###
+### analysis.                                                    ###
+###                                                              ###
+### Copyright (c) 2011 by:                                       ###
+###   * Kemal Eren,                                              ###
+###   * Mehmet Deveci,                                           ###
+###   * Umit V. Catalyurek                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### For license info, please see the README and LICENSE files    ###
+### in the main directory.                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+
+"""Unit tests for the 'sweep' module"""
+
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from bibench.bicluster import Bicluster, BiclusterList, bicluster_algorithm
+from bibench.sweep import ResultStore, sweep
+
+
+@bicluster_algorithm
+def _rows_algorithm_(data, nrows, ncols=1):
+    if nrows > data.shape[0]:
+        raise ValueError('too many rows')
+    return [Bicluster(range(nrows), range(ncols), data)]
+
+
+@bicluster_algorithm
+def _timed_out_algorithm_(data, nrows):
+    return BiclusterList([Bicluster(range(nrows), [0], data)],
+                         properties=dict(timed_out=True))
+
+
+class SweepTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.data = np.arange(20.0).reshape(5, 4)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_sweep(self):
+        store = ResultStore(self.directory)
+        grid = dict(nrows=[1, 2, 3], ncols=[1, 2])
+        failed = sweep(self.data, _rows_algorithm_, grid, store, processes=2)
+        self.assertEquals(failed, [])
+        self.assertEquals(len(store), 6)
+
+        result = store.get(_rows_algorithm_, dict(nrows=3, ncols=2), self.data)
+        self.assertEquals(result[0].shape(), (3, 2))
+        self.assertEquals(result.arguments['nrows'], 3)
+        self.assertTrue(np.all(result[0].array() == self.data[:3, :2]))
+
+    def test_resume(self):
+        store = ResultStore(self.directory)
+        sweep(self.data, _rows_algorithm_, dict(nrows=[1, 2]), store,
+              processes=1)
+        finished = []
+        failed = sweep(self.data, _rows_algorithm_, dict(nrows=[1, 2, 9]),
+                       store, processes=1,
+                       callback=lambda params, error: finished.append(params))
+        self.assertEquals(finished, [dict(nrows=9)])
+        self.assertEquals(failed, [dict(nrows=9)])
+        self.assertEquals(len(store), 2)
+        self.assertEquals(len(list(store.results())), 2)
+
+    def test_other_data(self):
+        store = ResultStore(self.directory)
+        sweep(self.data, _rows_algorithm_, dict(nrows=[1, 2]), store,
+              processes=1)
+        other = self.data + 1
+        finished = []
+        sweep(other, _rows_algorithm_, dict(nrows=[1, 2]), store,
+              processes=1,
+              callback=lambda params, error: finished.append(params))
+        self.assertEquals(len(finished), 2)
+        self.assertEquals(len(store), 4)
+        self.assertEquals(len(list(store.results(other))), 2)
+        result = store.get(_rows_algorithm_, dict(nrows=2), other)
+        self.assertTrue(np.all(result[0].array() == other[:2, :1]))
+
+    def test_timed_out(self):
+        store = ResultStore(self.directory)
+        failed = sweep(self.data, _timed_out_algorithm_, dict(nrows=[1, 2]),
+                       store, processes=1)
+        self.assertEquals(len(failed), 2)
+        self.assertEquals(len(store), 0)
+        self.assertFalse(store.contains(_timed_out_algorithm_, dict(nrows=1),
+                                        self.data))
+
+
+if __name__ == '__main__':
+    unittest.main()
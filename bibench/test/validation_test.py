@@ -95,5 +95,46 @@ class TestValidation(unittest.TestCase):
         self.assertAlmostEqual(rec, 0.25)
 
 
+    def test_vectorized_matches_pairwise(self):
+        data = numpy.random.randn(30, 20)
+        def random_list(n):
+            return [Bicluster(list(numpy.random.permutation(30)[:8]),
+                              list(numpy.random.permutation(20)[:5]),
+                              data)
+                    for i in range(n)]
+        expected, found = random_list(4), random_list(7)
+
+        for f, kwargs in [(bb.jaccard_list, {}),
+                          (bb.prelic_list, {}),
+                          (bb.recovery_relevance_list, {}),
+                          (bb.f_measure_list, dict(modified=True)),
+                          (bb.f_measure_list, dict(modified=False, beta=2))]:
+            slow = f(expected, found, vectorized=False, **kwargs)
+            fast = f(expected, found, vectorized=True, **kwargs)
+            self.assertAlmostEqual(slow.relevance, fast.relevance)
+            self.assertAlmostEqual(slow.recovery, fast.recovery)
+
+
+    def test_all_list_scores(self):
+        context = bb.ScoreContext(self.list1, self.list2)
+        scores = bb.all_list_scores(self.list1, self.list2, context=context)
+        self.assertEqual(scores['jaccard'],
+                         bb.jaccard_list(self.list1, self.list2))
+        self.assertEqual(scores['prelic'],
+                         bb.prelic_list(self.list1, self.list2))
+        self.assertEqual(scores['f_measure'],
+                         bb.f_measure_list(self.list1, self.list2,
+                                           context=context))
+        self.assertEqual(scores['recovery_relevance'],
+                         bb.recovery_relevance_list(self.list1, self.list2))
+
+        #a context for other biclusters is refused
+        self.assertRaises(ValueError, bb.jaccard_list, self.list2,
+                          self.list1, context=context)
+        self.assertRaises(ValueError, bb.jaccard_list, self.list1,
+                          self.list2 * 2, context=context)
+        bb.jaccard_list(list(self.list1), list(self.list2), context=context)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,276 @@
+####################################################################
+###     ____  _ ____                  _                          ###
+###    | __ )(_) __ )  ___ _ __   ___| |__                       ###
+###    |  _ \| |  _ \ / _ \ '_ \ / __| '_ \                      ###
+###    | |_) | | |_) |  __/ | | | (__| | | |                     ###
+###    |____/|_|____/ \___|_| |_|\___|_| |_|                     ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### This file is part of the BiBench package for biclustering    ###
+### analysis.                                                    ###
+###                                                              ###
+### Copyright (c) 2011 by:                                       ###
+###   * Kemal Eren,                                              ###
+###   * Mehmet Deveci,                                           ###
+###   * Umit V. Catalyurek                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### For license info, please see the README and LICENSE files    ###
+### in the main directory.                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+
+"""Unit tests for the 'wrapper' module"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import numpy as np
+
+import bibench.cache
+from bibench.bicluster import Bicluster, bicluster_algorithm
+from bibench.algorithms import wrapper
+from bibench.algorithms.wrapper import wrapper_helper
+from bibench.test.wrapper_util import \
+    written, write_dataset as _write_dataset_, run_script
+
+_datafiles_ = []
+
+
+def _do_call_(data, datafile, results_dir):
+    shutil.copyfile(datafile, os.path.join(results_dir, 'out'))
+
+
+def _cat_call_(data, datafile, results_dir):
+    _datafiles_.append(datafile)
+    with open(os.path.join(results_dir, 'out'), 'w') as out:
+        wrapper.call(['cat', datafile], stdout=out)
+
+
+def _read_results_(results_dir, data):
+    result = np.loadtxt(os.path.join(results_dir, 'out'))
+    return [Bicluster(range(len(result)), [0], data)]
+
+
+def _read_results_with_properties_(results_dir, data):
+    return _read_results_(results_dir, data), dict(nstable=1)
+
+
+def _sleep_call_(data, datafile, results_dir, seconds):
+    _datafiles_.append(datafile)
+    script = 'sleep {0}; cat {1} > {2}'.format(
+        seconds, datafile, os.path.join(results_dir, 'out'))
+    wrapper.call(['sh', '-c', script])
+
+
+def _partial_call_(data, datafile, results_dir, script):
+    _datafiles_.append(datafile)
+    script = 'cat {0} > {1}; '.format(
+        datafile, os.path.join(results_dir, 'out')) + script
+    wrapper.call(['sh', '-c', script])
+
+
+@bicluster_algorithm
+def _partial_algorithm_(data, script='true'):
+    return wrapper_helper('true', _write_dataset_, _read_results_,
+                          _partial_call_, data, script)
+
+
+@bicluster_algorithm
+def _partial_properties_algorithm_(data, script='true'):
+    return wrapper_helper('true', _write_dataset_,
+                          _read_results_with_properties_,
+                          _partial_call_, data, script)
+
+
+@bicluster_algorithm
+def _sleeping_algorithm_(data, seconds=0):
+    return wrapper_helper('true', _write_dataset_, _read_results_,
+                          _sleep_call_, data, seconds)
+
+
+class WrapperTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        del written[:]
+        del _datafiles_[:]
+
+    def tearDown(self):
+        wrapper.disable_staging()
+        wrapper.disable_fifo('true')
+        wrapper.set_scratch(None)
+        bibench.cache.disable()
+        shutil.rmtree(self.directory)
+
+    def test_staging(self):
+        staging = wrapper.enable_staging(self.directory)
+        data = np.arange(12.0).reshape(4, 3)
+        for i in range(3):
+            result = wrapper_helper('true', _write_dataset_, _read_results_,
+                                    _do_call_, data)
+            self.assertEquals(result[0].rows, [0, 1, 2, 3])
+        self.assertEquals(len(written), 1)
+
+        wrapper_helper('true', _write_dataset_, _read_results_,
+                       _do_call_, data + 1)
+        self.assertEquals(len(written), 2)
+        self.assertEquals(len(os.listdir(self.directory)), 2)
+
+        staging.evict(0)
+        self.assertEquals(staging.size(), 0)
+
+        #the writers' format version is part of the key
+        data = np.arange(6.0).reshape(2, 3)
+        path = staging.stage(_write_dataset_, data)
+        self.assertTrue(path.endswith('.v{0}'.format(
+            wrapper._STAGING_VERSION_)))
+
+    def test_link_file(self):
+        #across filesystems the file is copied, not symlinked, so that
+        #removing the source cannot affect a binary reading the link
+        shm = '/dev/shm'
+        if not os.path.isdir(shm) or \
+                os.stat(shm).st_dev == os.stat(self.directory).st_dev:
+            return
+        fd, source = tempfile.mkstemp(dir=shm)
+        with os.fdopen(fd, 'w') as f:
+            f.write('data')
+        destination = os.path.join(self.directory, 'data.txt')
+        wrapper.link_file(source, destination)
+        os.remove(source)
+        self.assertFalse(os.path.islink(destination))
+        with open(destination) as f:
+            self.assertEquals(f.read(), 'data')
+
+    def test_fifo(self):
+        wrapper.enable_fifo('true')
+        data = np.arange(30000.0).reshape(10000, 3)
+        result = wrapper_helper('true', _write_dataset_, _read_results_,
+                                _cat_call_, data)
+        self.assertEquals(len(result[0].rows), 10000)
+
+    def test_scratch(self):
+        data = np.arange(12.0).reshape(4, 3)
+        wrapper.set_scratch([self.directory])
+        wrapper_helper('true', _write_dataset_, _read_results_,
+                       _cat_call_, data)
+        self.assertTrue(_datafiles_[-1].startswith(self.directory))
+
+        #not enough room; fall back to the default
+        wrapper.set_scratch([self.directory], reserve=1 << 62)
+        wrapper_helper('true', _write_dataset_, _read_results_,
+                       _cat_call_, data)
+        self.assertFalse(_datafiles_[-1].startswith(self.directory))
+        self.assertEquals(os.listdir(self.directory), [])
+
+    def test_async(self):
+        runs = [wrapper.run_async(_sleeping_algorithm_,
+                                  np.zeros((n, 2)), 0.6 - 0.1 * n)
+                for n in range(2, 6)]
+        self.assertFalse(any(run.poll() for run in runs))
+        finished = [run.result() for run in wrapper.as_completed(runs)]
+        self.assertEquals(sorted(len(r[0].rows) for r in finished),
+                          [2, 3, 4, 5])
+        self.assertEquals(finished[0].algorithm, _sleeping_algorithm_.__module__
+                          + '._sleeping_algorithm_')
+        for datafile in _datafiles_:
+            self.assertFalse(os.path.exists(datafile))
+
+    def test_async_timeout(self):
+        #the partial results are kept, as by wrapper_helper()
+        run = wrapper.run_async(_partial_algorithm_, np.zeros((3, 2)),
+                                'sleep 10', timeout=0.3)
+        result = run.result()
+        self.assertTrue(result.properties['timed_out'])
+        self.assertEquals(len(result[0].rows), 3)
+        run.check()
+        self.assertFalse(os.path.exists(_datafiles_[-1]))
+
+        run = wrapper.run_async(_sleeping_algorithm_, np.zeros((3, 2)), 10)
+        self.assertRaises(wrapper.WrapperTimeout, run.result, 0.1)
+        run.cancel()
+        self.assertRaises(wrapper.WrapperCancelled, run.result)
+
+    def test_limits(self):
+        data = np.zeros((3, 2))
+        with wrapper.limits(wall=0.3):
+            result = _partial_algorithm_(data, 'sleep 10')
+        self.assertTrue(result.properties['timed_out'])
+        self.assertEquals(len(result[0].rows), 3)
+        self.assertFalse(os.path.exists(_datafiles_[-1]))
+
+        with wrapper.limits(cpu=1):
+            result = _partial_algorithm_(data, 'while :; do :; done')
+        self.assertTrue(result.properties['timed_out'])
+
+        with wrapper.limits(wall=10, cpu=10):
+            result = _partial_algorithm_(data)
+        self.assertFalse('timed_out' in result.properties)
+
+        #a reader that returns (biclusters, properties), like BBC's
+        with wrapper.limits(wall=0.3):
+            result = _partial_properties_algorithm_(data, 'sleep 10')
+        self.assertEquals(len(result), 1)
+        self.assertEquals(result[0].rows, [0, 1, 2])
+        self.assertTrue(result.properties['timed_out'])
+        self.assertEquals(result.properties['nstable'], 1)
+
+    def test_limits_not_cached(self):
+        bibench.cache.enable(os.path.join(self.directory, 'cache'))
+        data = np.zeros((3, 2))
+        with wrapper.limits(wall=0.3):
+            result = _partial_algorithm_(data, 'sleep 1')
+        self.assertTrue(result.properties['timed_out'])
+
+        #the same call without limits runs the binary again
+        result = _partial_algorithm_(data, 'sleep 1')
+        self.assertFalse('timed_out' in result.properties)
+        self.assertFalse(result.properties['profile']['cached'])
+        self.assertEquals(len(_datafiles_), 2)
+
+    def test_follow(self):
+        #lines written in pieces are yielded whole, as they complete
+        script = "printf a >> {0}/out; sleep 0.4;" \
+            " printf 'b\\nc' >> {0}/out; sleep 0.4;" \
+            " printf 'd\\n' >> {0}/out; sleep 0.4;" \
+            " printf e >> {0}/out"
+        run = wrapper.run_async(run_script, script)
+        try:
+            lines = [(line, run.running()) for line in
+                     wrapper.follow(os.path.join(run.results_dir, 'out'), run)]
+        finally:
+            run.close()
+        self.assertEquals(lines, [('ab\n', True), ('cd\n', True), ('e', False)])
+
+        #a file that never appears
+        run = wrapper.run_async(run_script, 'true')
+        try:
+            lines = list(wrapper.follow(os.path.join(run.results_dir, 'out'),
+                                        run))
+        finally:
+            run.close()
+        self.assertEquals(lines, [])
+
+    def test_cancel(self):
+        event = threading.Event()
+        event.set()
+        with wrapper.cancellable(event):
+            self.assertRaises(wrapper.WrapperCancelled,
+                              wrapper.call, ['sleep', '10'])
+
+        event = threading.Event()
+        timer = threading.Timer(0.2, event.set)
+        timer.start()
+        with wrapper.cancellable(event):
+            self.assertRaises(wrapper.WrapperCancelled,
+                              wrapper.call, ['sleep', '10'])
+        timer.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
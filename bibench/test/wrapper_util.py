@@ -0,0 +1,58 @@
+####################################################################
+###     ____  _ ____                  _                          ###
+###    | __ )(_) __ )  ___ _ __   ___| |__                       ###
+###    |  _ \| |  _ \ / _ \ '_ \ / __| '_ \                      ###
+###    | |_) | | |_) |  __/ | | | (__| | | |                     ###
+###    |____/|_|____/ \___|_| |_|\___|_| |_|                     ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### This file is part of the BiBench package for biclustering    ###
+### analysis.                                                    ###
+###                                                              ###
+### Copyright (c) 2011 by:                                       ###
+###   * Kemal Eren,                                              ###
+###   * Mehmet Deveci,                                           ###
+###   * Umit V. Catalyurek                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+###                                                              ###
+### For license info, please see the README and LICENSE files    ###
+### in the main directory.                                       ###
+###                                                              ###
+###--------------------------------------------------------------###
+
+"""
+Helpers shared by the tests of the wrapped binaries: a dataset
+writer, and runs of shell scripts standing in for the binaries.
+
+"""
+
+import numpy as np
+
+from bibench.algorithms import wrapper
+from bibench.algorithms.wrapper import wrapper_helper
+from bibench.datasets.io import write_matrix
+
+#the names of the files written by write_dataset()
+written = []
+
+
+def write_dataset(data, filename):
+    written.append(filename)
+    with open(filename, 'w') as f:
+        write_matrix(f, data)
+
+
+def read_nothing(results_dir, data):
+    return []
+
+
+def script_call(data, datafile, results_dir, script):
+    wrapper.call(['sh', '-c', script.format(results_dir)])
+
+
+def run_script(script):
+    """Run 'script', with '{0}' replaced by the results directory."""
+    return wrapper_helper('true', write_dataset, read_nothing,
+                          script_call, np.zeros((1, 1)), script)
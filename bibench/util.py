@@ -23,6 +23,7 @@
 ###--------------------------------------------------------------###
 
 import os
+import hashlib
 import itertools
 import bibench
 import numpy as np
@@ -144,6 +145,85 @@ def get_hidden_dir(subdir=None):
     return destdir
 
 
+_POPCOUNT_TABLE_ = np.array([bin(i).count('1') for i in range(256)],
+                            dtype=np.uint8)
+
+
+def nwords(nbits):
+    """
+    The number of 64 bit words needed to hold 'nbits' bits.
+
+    >>> nwords(64), nwords(65)
+    (1, 2)
+
+    """
+    return (nbits + 63) // 64
+
+
+def pack_indices(indices, nbits):
+    """
+    Pack a collection of indices into a bitmask of uint64 words.
+
+    Args:
+        * indices: an iterable of ints, all less than 'nbits'.
+        * nbits: the number of bits the bitmask must hold.
+
+    Returns:
+        A numpy.ndarray of dtype uint64 and length nwords(nbits).
+
+    >>> unpack_bits(pack_indices([70, 3, 0, 3], 100))
+    [0, 3, 70]
+
+    """
+    bools = np.zeros(nwords(nbits) * 64, dtype=np.bool_)
+    bools[np.fromiter(indices, dtype=np.intp)] = True
+    return np.packbits(bools).view(np.uint64)
+
+
+def unpack_bits(words):
+    """
+    Inverse of pack_indices(). Returns the sorted list of set bits.
+
+    """
+    return np.flatnonzero(np.unpackbits(words.view(np.uint8))).tolist()
+
+
+def popcount(words):
+    """
+    Count the set bits in an array of uint64 words. For a 2D array,
+    returns the count for each row.
+
+    >>> popcount(pack_indices(range(10), 100))
+    10
+
+    """
+    counts = _POPCOUNT_TABLE_[np.ascontiguousarray(words).view(np.uint8)]
+    if counts.ndim == 1:
+        return int(counts.sum())
+    return counts.sum(axis=-1).astype(np.int64)
+
+
+def array_digest(array):
+    """
+    A hex digest of the contents of a numpy array: its shape, its
+    dtype, and its bytes. Equal arrays have equal digests, regardless
+    of memory layout.
+
+    >>> a = np.arange(6).reshape(2, 3)
+    >>> array_digest(a) == array_digest(a.copy(order='F'))
+    True
+    >>> array_digest(a) == array_digest(a.reshape(3, 2))
+    False
+
+    """
+    array = np.ascontiguousarray(array)
+    h = hashlib.sha1()
+    h.update(repr(array.shape))
+    h.update(array.dtype.str)
+    h.update(array.data)
+    return h.hexdigest()
+
+
 def zdumps(obj):
     """dump an object, compressing as much as possible"""
     return zlib.compress(cPickle.dumps(obj,cPickle.HIGHEST_PROTOCOL),9)
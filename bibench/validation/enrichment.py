@@ -40,13 +40,9 @@ TODO:
 
 """
 
-import rpy2
-from rpy2 import robjects
-#from rpy2.interactive import importr # WAD: this does not seem to be the correct way to get to importr anymore
-from rpy2.robjects.packages import importr # WAD: this works for me
-from rpy2.rinterface import RRuntimeError
 from collections import namedtuple
-from bibench.rutil import get_bioclite
+from bibench import rutil
+from bibench.rutil import get_bioclite, importr
 
 ontologies = ["BP", "CC", "MF"]
 correction_methods = ["Bonferroni",
@@ -141,6 +137,9 @@ def gene_enrichment(genes,
         raise Exception("'genes' is not a subset of 'gene_universe'")
 
 
+    robjects = rutil.robjects()
+    rinterface = rutil.rinterface()
+
     importr('multtest')
     importr('MASS')
     importr('GOstats')
@@ -149,11 +148,11 @@ def gene_enrichment(genes,
     if annotation_db_name[-3:] != '.db':
         annotation_db_name = annotation_db_name + '.db'
     try:
-        robjects.r.library(annotation_db_name)
-    except RRuntimeError:
+        rutil.library(annotation_db_name)
+    except rinterface.RRuntimeError:
         bioclite = get_bioclite()
         bioclite(annotation_db_name)
-        robjects.r.library(annotation_db_name)
+        rutil.library(annotation_db_name)
 
     #convert gene names to R data structures
     genes = robjects.StrVector(genes)
@@ -184,7 +183,7 @@ def gene_enrichment(genes,
         return robjects.DataFrame({})
 
     #multiple test correction
-    pvalues = rpy2.rinterface.globalenv.get("pvalues")
+    pvalues = rinterface.globalenv.get("pvalues")
     mt = robjects.r['mt.rawp2adjp'](pvalues(hg_over)[0:length], proc= mtc)
 
     result =  [EnrichedGO(gs, p, pc)
@@ -209,6 +208,7 @@ def goid_annot(goid):
     result
 
     """
+    robjects = rutil.robjects()
     importr('GO.db')
     term = str(robjects.r['Term'](goid)[0])
     ont = str(robjects.r['Ontology'](goid)[0])
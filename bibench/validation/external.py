@@ -29,10 +29,14 @@ Metrics for evaluating biclusters and sets of biclusters.
 
 from __future__ import division
 
+import itertools
 from collections import namedtuple
 
 import numpy as np
 
+from bibench import util
+from bibench.bicluster import BiclusterList
+
 class ExternalError(Exception):
     pass
 
@@ -290,7 +294,191 @@ def _sym_scores_(expected, found, f, comp=max):
     return _asym_scores_(expected, found, f, f)
 
 
-def prelic_list(expected, found):
+###########################################################
+### vectorized scores of all (expected, found) pairs     ###
+###########################################################
+
+def _dataset_shape_(expected, found):
+    """
+    The shape of the dataset on which the biclusters are defined:
+    that of the first one with a 2D data member, or else just large
+    enough to hold every row and column index.
+
+    """
+    biclusters = list(itertools.chain(expected, found))
+    for b in biclusters:
+        if b.data is not None and np.ndim(b.data) == 2:
+            return b.data.shape
+    nrows = max([max(b.rows) if len(b.rows) else -1 for b in biclusters])
+    ncols = max([max(b.cols) if len(b.cols) else -1 for b in biclusters])
+    return nrows + 1, ncols + 1
+
+
+class ScoreContext(object):
+    r"""
+    The row, column, and area intersections of every (expected, found)
+    pair of two lists of biclusters, computed once, at construction,
+    as products of the row and column membership matrices:
+
+    .. math:: |e \cap f| = (R_e^T R_f) \circ (C_e^T C_f)
+
+    Pass a ScoreContext to any of the list metrics below, or to
+    all_list_scores(), to avoid recomputing them for each
+    metric. Score matrices are also cached, so that e.g. the recovery
+    matrix is shared by recovery_relevance_list() and f_measure_list().
+
+    Attributes (numpy.ndarrays):
+        * row_intersections: element [i, j] is the number of rows
+            shared by expected[i] and found[j].
+        * col_intersections: the same, for columns.
+        * intersections: the intersection areas.
+        * expected_nrows, found_nrows: the number of distinct rows in
+            each bicluster.
+        * expected_areas, found_areas: the area of each bicluster.
+        * nelts: the size of each expected bicluster's dataset; None
+            if any expected bicluster has no data member.
+
+    """
+
+    def __init__(self, expected, found):
+        """
+        Args:
+            * expected: list of target biclusters.
+            * found: list of biclusters for comparison.
+
+        """
+        _check_list_(expected)
+        _check_list_(found)
+        self.expected = expected
+        self.found = found
+
+        shape = _dataset_shape_(expected, found)
+        expected = BiclusterList(expected)
+        found = BiclusterList(found)
+
+        rows, cols = expected.intersection_counts(found, shape)
+        expected_rowbits, _ = expected.bitmasks(shape)
+        found_rowbits, _ = found.bitmasks(shape)
+
+        self.row_intersections = rows
+        self.col_intersections = cols
+        self.intersections = rows * cols
+        self.expected_nrows = util.popcount(expected_rowbits)
+        self.found_nrows = util.popcount(found_rowbits)
+        self.expected_areas = np.array([e.area() for e in expected])
+        self.found_areas = np.array([f.area() for f in found])
+
+        self.nelts = None
+        if all([isinstance(e.data, np.ndarray) for e in expected]):
+            self.nelts = np.array([e.data.size for e in expected])
+
+        self._matrices = {}
+
+
+    def matrix(self, f, *args):
+        """
+        Returns the score matrix f(self, *args), computing it only the
+        first time it is requested.
+
+        """
+        key = (f, args)
+        if key not in self._matrices:
+            self._matrices[key] = f(self, *args)
+        return self._matrices[key]
+
+
+def _divide_(numerator, denominator, msg):
+    """Elementwise division; raises ExternalError on division by zero."""
+    if np.any(denominator == 0):
+        raise ExternalError(msg)
+    return numerator / denominator
+
+
+def _union_areas_(context):
+    """Element-wise union areas of all pairs; see _union_area_()."""
+    return context.expected_areas[:, np.newaxis] + \
+        context.found_areas[np.newaxis, :] - context.intersections
+
+
+#matrix versions of the bicluster comparisons above: element [i, j]
+#scores the i-th expected bicluster against the j-th found bicluster.
+
+def _recovery_matrix_(context):
+    return _divide_(context.intersections,
+                    context.expected_areas[:, np.newaxis],
+                    'an expected bicluster is ill defined: zero area')
+
+
+def _modified_relevance_matrix_(context):
+    return _divide_(context.intersections,
+                    context.found_areas[np.newaxis, :],
+                    'a found bicluster is ill defined: zero area')
+
+
+def _relevance_matrix_(context):
+    assert context.nelts is not None #because we need to know negatives
+    nelts = context.nelts[:, np.newaxis]
+    return _divide_(nelts - _union_areas_(context),
+                    nelts - context.expected_areas[:, np.newaxis],
+                    'an expected bicluster covers the whole dataset')
+
+
+def _f_measure_matrix_(context, beta=1, modified=True):
+    if modified:
+        spec = context.matrix(_modified_relevance_matrix_)
+    else:
+        spec = context.matrix(_relevance_matrix_)
+    sens = context.matrix(_recovery_matrix_)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = (1 + beta**2) * (spec * sens) / (beta**2 * spec + sens)
+    scores[(spec == 0) & (sens == 0)] = 0
+    return scores
+
+
+def _row_jaccard_matrix_(context):
+    union = context.expected_nrows[:, np.newaxis] + \
+        context.found_nrows[np.newaxis, :] - context.row_intersections
+    scores = np.zeros(union.shape)
+    nonzero = union > 0
+    scores[nonzero] = context.row_intersections[nonzero] / union[nonzero]
+    return scores
+
+
+def _jaccard_matrix_(context):
+    return _divide_(context.intersections,
+                    _union_areas_(context),
+                    'the union of two biclusters is empty')
+
+
+def _matrix_scores_(context, rel_f, rec_f, *args):
+    """
+    Vectorized version of _asym_scores_(). Here rel_f and rec_f take
+    a ScoreContext, and any extra 'args', and return the matrix of
+    scores for all pairs.
+
+    """
+    rec_scores = context.matrix(rec_f, *args)
+    rel_scores = context.matrix(rel_f, *args)
+    return ListScore(recovery=np.mean(rec_scores.max(axis=1)),
+                     relevance=np.mean(rel_scores.max(axis=0)))
+
+
+def _same_biclusters_(a, b):
+    """True if 'a' and 'b' hold the same Bicluster objects, in order."""
+    return a is b or (len(a) == len(b) and
+                      all(x is y for x, y in zip(a, b)))
+
+
+def _get_context_(expected, found, context):
+    if context is None:
+        return ScoreContext(expected, found)
+    if not (_same_biclusters_(context.expected, expected) and
+            _same_biclusters_(context.found, found)):
+        raise ValueError('the ScoreContext was built for other biclusters')
+    return context
+
+
+def prelic_list(expected, found, vectorized=True, context=None):
     """
     Calculates both the relevance and the recovery scores of the
     algorithm result according to Prelics row jaccard score.
@@ -298,13 +486,27 @@ def prelic_list(expected, found):
     Args:
         * expected: list of target biclusters
         * found: list of biclusters for comparison
+        * vectorized: if True, score all pairs at once from the
+            membership matrices; else score each pair separately.
+        * context: a ScoreContext for 'expected' and 'found', to reuse
+            its intersections. Implies vectorized. Raises ValueError
+            if it was built for other biclusters.
 
     """
+    if vectorized or context is not None:
+        context = _get_context_(expected, found, context)
+        return _matrix_scores_(context,
+                               _row_jaccard_matrix_, _row_jaccard_matrix_)
     f = row_jaccard
     return _sym_scores_(expected, found, f)
 
 
-def f_measure_list(expected, found, beta=1, modified=True):
+def f_measure_list(expected,
+                   found,
+                   beta=1,
+                   modified=True,
+                   vectorized=True,
+                   context=None):
     r"""
     Calculates both the relevance and the recovery scores of the
     algorithm result according to f_measure score with the given beta
@@ -320,13 +522,19 @@ def f_measure_list(expected, found, beta=1, modified=True):
         * expected: list of target biclusters
         * found: list of biclusters for comparison
         * beta: scale factor in the formula of f_measure.
+        * vectorized: as in prelic_list().
+        * context: as in prelic_list().
 
     """
+    if vectorized or context is not None:
+        context = _get_context_(expected, found, context)
+        f = _f_measure_matrix_
+        return _matrix_scores_(context, f, f, beta, modified)
     f = lambda x, y: f_measure(x, y, beta=beta, modified=modified)
     return _sym_scores_(expected, found, f)
 
 
-def jaccard_list(expected, found):
+def jaccard_list(expected, found, vectorized=True, context=None):
     r"""
     Recovery and relevance scores of a set of biclusters using Jaccard
     coefficient.
@@ -340,13 +548,22 @@ def jaccard_list(expected, found):
     Args:
         * expected: list of target biclusters
         * found: list of biclusters for comparison
+        * vectorized: as in prelic_list().
+        * context: as in prelic_list().
 
     """
+    if vectorized or context is not None:
+        context = _get_context_(expected, found, context)
+        return _matrix_scores_(context, _jaccard_matrix_, _jaccard_matrix_)
     f = jaccard
     return _sym_scores_(expected, found, f)
 
 
-def recovery_relevance_list(expected, found, modified=True):
+def recovery_relevance_list(expected,
+                            found,
+                            modified=True,
+                            vectorized=True,
+                            context=None):
     r"""
     N.B.: The f-measure calculated as the harmonic mean of the
     recovery and relevance scores returned by this function is
@@ -362,6 +579,41 @@ def recovery_relevance_list(expected, found, modified=True):
     Args:
         * expected: list of target biclusters
         * found: list of biclusters for comparison
+        * vectorized: as in prelic_list().
+        * context: as in prelic_list().
 
     """
+    if vectorized or context is not None:
+        context = _get_context_(expected, found, context)
+        return _matrix_scores_(context,
+                               _modified_relevance_matrix_, _recovery_matrix_)
     return _asym_scores_(expected, found, modified_relevance, recovery)
+
+
+def all_list_scores(expected, found, beta=1, modified=True, context=None):
+    """
+    Computes every list metric in this module in one pass, sharing
+    the pairwise intersections between them.
+
+    Args:
+        * expected: list of target biclusters
+        * found: list of biclusters for comparison
+        * beta: scale factor for f_measure_list().
+        * modified: passed to f_measure_list() and
+            recovery_relevance_list().
+        * context: as in prelic_list().
+
+    Returns:
+        A dictionary mapping 'jaccard', 'prelic', 'f_measure', and
+        'recovery_relevance' to ListScores.
+
+    """
+    context = _get_context_(expected, found, context)
+    return dict(jaccard=jaccard_list(expected, found, context=context),
+                prelic=prelic_list(expected, found, context=context),
+                f_measure=f_measure_list(expected, found,
+                                         beta=beta,
+                                         modified=modified,
+                                         context=context),
+                recovery_relevance=recovery_relevance_list(
+                    expected, found, modified=modified, context=context))
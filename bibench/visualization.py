@@ -26,38 +26,33 @@
 
 import os
 
-from rpy2 import robjects as r
-from rpy2.robjects.packages import importr
+from bibench import rutil
+from bibench.bicluster import get_row_col_matrices, BiclusterList
 
-#enables automatic conversion from numpy to R
-import rpy2.robjects.numpy2ri
 
-import pkg_resources
-v = pkg_resources.get_distribution('rpy2').version
-if v[0:3] >= '2.2':
-    rpy2.robjects.numpy2ri.activate()
-
-from bibench.bicluster import get_row_col_matrices
-
-
-grdevices = importr('grDevices')
-
-devices = dict(png=grdevices.png,
-               ps=grdevices.postscript,
-               pdf=grdevices.pdf,
-               jpg=grdevices.jpeg,
-               jpeg=grdevices.jpeg
+#names of the grDevices functions for each file extension
+devices = dict(png='png',
+               ps='postscript',
+               pdf='pdf',
+               jpg='jpeg',
+               jpeg='jpeg'
                )
 
-read_csv = r.r['read.csv'] #use to read a csv file as a data frame
+def read_csv(*args, **kwargs):
+    """Use to read a csv file as an R data frame."""
+    return rutil.robjects().r['read.csv'](*args, **kwargs)
 
 def _get_r_biclust_(biclusters):
     """Takes a list of biclusters and returns an instance of the R Biclust class."""
     #TODO: This is a hacky way to get visualizations.
-    r.r.library('biclust')
+    r = rutil.robjects()
+    rutil.library('biclust')
     classfunc = r.r["BiclustResult"]
 
-    RowxNumber, ColxNumber = get_row_col_matrices(biclusters)
+    if isinstance(biclusters, BiclusterList):
+        RowxNumber, ColxNumber = biclusters.membership_matrices()
+    else:
+        RowxNumber, ColxNumber = get_row_col_matrices(biclusters)
     NumberxCol = ColxNumber.T
     number = len(biclusters)
 
@@ -65,12 +60,17 @@ def _get_r_biclust_(biclusters):
     params = empty_list
     info = empty_list
 
-    return classfunc(empty_list, RowxNumber, NumberxCol, number, info)
+    return classfunc(empty_list,
+                     rutil.to_r_matrix(RowxNumber),
+                     rutil.to_r_matrix(NumberxCol),
+                     number,
+                     info)
 
 
 def _rplot_(functionname, *args, **kwargs):
     """Utility function for calling plotting functions in R."""
-    r.r.library('biclust')
+    r = rutil.robjects()
+    rutil.library('biclust')
     func = r.r[functionname]
 
     dkwargs = dict()
@@ -83,7 +83,8 @@ def _rplot_(functionname, *args, **kwargs):
     extension = None
     if 'file' in dkwargs:
         extension = os.path.splitext(dkwargs['file'])[1][1:]
-        device = devices[extension]
+        grdevices = rutil.importr('grDevices')
+        device = getattr(grdevices, devices[extension])
         device(**dkwargs)
         func(*args, **kwargs)
         grdevices.dev_off()
@@ -124,7 +125,7 @@ def heatmap(data, bicluster=None, local=False, palette=None, **kwargs):
     if palette is not None:
         kwargs["beamercolor"] = True
         kwargs["paleta"] = palette
-    _rplot_("drawHeatmap", r.Matrix(data), **kwargs)
+    _rplot_("drawHeatmap", rutil.to_r_matrix(data), **kwargs)
 
 
 def parallel_coordinates(bicluster,
@@ -163,7 +164,7 @@ def parallel_coordinates(bicluster,
     number = 1
 
     assert bicluster.data is not None
-    data = r.Matrix(bicluster.data)
+    data = rutil.to_r_matrix(bicluster.data)
 
     if plot == 'rows':
         kwargs["plotcol"] = False
@@ -214,4 +215,4 @@ def bubbleplot(data,
         bicResult3 = _get_r_biclust_(biclusters3)
         kwargs['bicResult3'] = bicResult3
 
-    _rplot_("bubbleplot", r.Matrix(data), **kwargs)
+    _rplot_("bubbleplot", rutil.to_r_matrix(data), **kwargs)
@@ -33,6 +33,7 @@ setup(
 
     extras_require = {
         "test" : ["nose"],
+        "sparse" : ["scipy"],
         "doc" : ["sphinx"]
         },
 